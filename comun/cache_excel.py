@@ -0,0 +1,132 @@
+"""
+Caché columnar de los archivos Excel de entrada.
+
+Cada libro se convierte una sola vez (con `limpiar_dataframe` ya aplicado) a
+un archivo Feather sin comprimir en `.cache_excel/`, junto con un JSON con la
+ruta, el mtime, el tamaño y el sha256 del Excel. Las lecturas siguientes
+abren el Feather con memory map en lugar de pasar por openpyxl:
+  - mismo mtime y tamaño: se usa la caché directamente
+  - mtime distinto pero mismo contenido (copia, checkout): se reutiliza y se
+    actualiza el JSON
+  - contenido distinto: se vuelve a convertir
+
+Sin pyarrow, o si el DataFrame no se puede guardar en Feather, se lee el
+Excel como siempre.
+
+Uso:
+    from comun.cache_excel import leer_excel
+    df = leer_excel('formularios/formularios_unificado.xlsx')
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow es opcional
+    pa = None
+    feather = None
+
+from comun.limpieza import limpiar_dataframe
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DIRECTORIO_CACHE = os.path.join(PROJECT_ROOT, ".cache_excel")
+VERSION_CACHE = 1
+
+
+def _hash_contenido(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def rutas_cache(ruta, directorio=DIRECTORIO_CACHE):
+    """Feather y JSON de metadatos asociados a un Excel (la clave es su ruta absoluta)."""
+    ruta_abs = os.path.abspath(ruta)
+    clave = hashlib.sha1(ruta_abs.encode("utf-8")).hexdigest()[:16]
+    base = os.path.join(directorio, f"{os.path.splitext(os.path.basename(ruta_abs))[0]}-{clave}")
+    return base + ".feather", base + ".json"
+
+
+def _leer_meta(ruta_meta):
+    try:
+        with open(ruta_meta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_atomico(ruta, escribir):
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def _guardar_meta(ruta_meta, meta):
+    def escribir(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    _escribir_atomico(ruta_meta, escribir)
+
+
+def _cache_vigente(meta, ruta_abs, estado, ruta_feather, ruta_meta):
+    if not meta or meta.get("version") != VERSION_CACHE or meta.get("ruta") != ruta_abs:
+        return False
+    if not os.path.exists(ruta_feather):
+        return False
+    if meta.get("mtime_ns") == estado.st_mtime_ns and meta.get("tamano") == estado.st_size:
+        return True
+    if meta.get("tamano") == estado.st_size and meta.get("sha256") == _hash_contenido(ruta_abs):
+        meta.update(mtime_ns=estado.st_mtime_ns)
+        _guardar_meta(ruta_meta, meta)
+        return True
+    return False
+
+
+def leer_excel(ruta, directorio_cache=DIRECTORIO_CACHE):
+    """
+    Lee un Excel con `limpiar_dataframe` aplicado, usando la caché Feather
+    cuando está vigente y creándola en caso contrario.
+    """
+    if feather is None:
+        return limpiar_dataframe(pd.read_excel(ruta, engine="openpyxl"))
+
+    ruta_abs = os.path.abspath(ruta)
+    estado = os.stat(ruta_abs)
+    ruta_feather, ruta_meta = rutas_cache(ruta_abs, directorio_cache)
+
+    if _cache_vigente(_leer_meta(ruta_meta), ruta_abs, estado, ruta_feather, ruta_meta):
+        return feather.read_table(ruta_feather, memory_map=True).to_pandas()
+
+    sha256 = _hash_contenido(ruta_abs)
+    df = limpiar_dataframe(pd.read_excel(ruta_abs, engine="openpyxl"))
+    try:
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        os.makedirs(directorio_cache, exist_ok=True)
+        _escribir_atomico(
+            ruta_feather,
+            lambda temporal: feather.write_feather(tabla, temporal, compression="uncompressed"),
+        )
+    except (pa.ArrowException, TypeError, ValueError, OSError) as e:
+        print(f"[WARN] No se pudo guardar la caché de {ruta}: {e}")
+        return df
+
+    # El JSON se escribe al final: una caché a medio escribir no se reconoce
+    _guardar_meta(ruta_meta, {
+        "version": VERSION_CACHE,
+        "ruta": ruta_abs,
+        "mtime_ns": estado.st_mtime_ns,
+        "tamano": estado.st_size,
+        "sha256": sha256,
+    })
+    return df
@@ -0,0 +1,33 @@
+"""
+Reparación de texto de los archivos de entrada (mojibake y normalización NFC).
+"""
+
+import unicodedata
+
+
+def reparar_texto(texto):
+    """
+    Intenta corregir mojibake común y normaliza en Unicode NFC.
+    """
+    if not isinstance(texto, str):
+        return texto
+    reparado = texto.strip()
+    if any(token in reparado for token in ("Ã", "Â")):
+        try:
+            reparado = reparado.encode("latin-1").decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    reparado = unicodedata.normalize("NFC", reparado)
+    return reparado
+
+
+def limpiar_dataframe(df):
+    """
+    Aplica reparaciones de encoding a columnas y valores string.
+    """
+    df = df.copy()
+    df.columns = [reparar_texto(col) if isinstance(col, str) else col for col in df.columns]
+    object_cols = df.select_dtypes(include=["object"]).columns
+    for col in object_cols:
+        df[col] = df[col].apply(reparar_texto)
+    return df
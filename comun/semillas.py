@@ -0,0 +1,38 @@
+"""
+Registro de semillas compartido por todos los generadores sintéticos.
+
+Cada etapa (y cada shard de una etapa) recibe su propio `np.random.Generator`
+derivado de una única `SeedSequence` raíz. Los flujos son independientes
+entre sí, de modo que cualquier etapa puede ejecutarse por separado o en
+paralelo y reproducir bit a bit el mismo resultado.
+
+Uso:
+    from comun.semillas import flujo
+    rng = flujo("feedbacks.fechas")           # etapa
+    rng = flujo("feedbacks.bloque", 3)        # shard 3 de una etapa
+"""
+
+import hashlib
+
+import numpy as np
+
+RANDOM_SEED = 42
+
+
+def _clave_etapa(etapa):
+    """Convierte el nombre de la etapa en un entero estable (no depende de PYTHONHASHSEED)."""
+    return int.from_bytes(hashlib.sha256(etapa.encode("utf-8")).digest()[:4], "little")
+
+
+def secuencia(etapa, *fragmentos, semilla=RANDOM_SEED):
+    """
+    Devuelve la `SeedSequence` hija de la raíz para (etapa, *fragmentos).
+    Útil para pasar semillas a procesos hijos sin compartir estado.
+    """
+    spawn_key = (_clave_etapa(etapa),) + tuple(int(f) for f in fragmentos)
+    return np.random.SeedSequence(semilla, spawn_key=spawn_key)
+
+
+def flujo(etapa, *fragmentos, semilla=RANDOM_SEED):
+    """Devuelve un `np.random.Generator` nuevo para (etapa, *fragmentos)."""
+    return np.random.default_rng(secuencia(etapa, *fragmentos, semilla=semilla))
@@ -0,0 +1,117 @@
+"""
+Tabla de hashes de 64 bits con direccionamiento abierto sobre numpy.
+
+Sirve para deduplicar millones de textos guardando solo un uint64 por hueco
+(con un factor de carga entre 0.35 y 0.7, de 11 a 23 bytes por texto) en
+lugar de un `set` con las cadenas completas. La probabilidad de colisión entre
+hashes distintos de 64 bits es despreciable para decenas de millones de
+elementos.
+
+Uso:
+    from comun.tabla_hashes import TablaHashes, hash_texto
+    tabla = TablaHashes()
+    if tabla.agregar(hash_texto(comentario)):
+        ...  # primera vez que aparece
+"""
+
+import hashlib
+
+import numpy as np
+
+VACIO = np.uint64(0)
+CARGA_MAXIMA = 0.7
+
+
+def hash_texto(texto):
+    """Hash estable de 64 bits de un texto (no depende de PYTHONHASHSEED). Nunca es 0."""
+    h = int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest(), "little")
+    return h or 1
+
+
+def hash_textos(textos):
+    """Versión vectorial de `hash_texto`: devuelve un array uint64."""
+    return np.fromiter((hash_texto(t) for t in textos), dtype=np.uint64, count=len(textos))
+
+
+class TablaHashes:
+    """Conjunto de hashes uint64 con sondeo lineal; el 0 marca hueco libre."""
+
+    def __init__(self, capacidad=1024):
+        tamano = 1
+        while tamano * CARGA_MAXIMA < capacidad:
+            tamano *= 2
+        self.claves = np.zeros(tamano, dtype=np.uint64)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def nbytes(self):
+        return self.claves.nbytes
+
+    def _crecer(self, n_nuevos):
+        if (self.n + n_nuevos) <= len(self.claves) * CARGA_MAXIMA:
+            return
+        viejas = self.claves[self.claves != VACIO]
+        tamano = len(self.claves)
+        while (self.n + n_nuevos) > tamano * CARGA_MAXIMA:
+            tamano *= 2
+        self.claves = np.zeros(tamano, dtype=np.uint64)
+        self.n = 0
+        self.agregar_lote(viejas)
+
+    def agregar(self, h):
+        """Inserta un hash. Devuelve True si no estaba en la tabla."""
+        self._crecer(1)
+        h = np.uint64(h)
+        mascara = len(self.claves) - 1
+        pos = int(h) & mascara
+        while True:
+            actual = self.claves[pos]
+            if actual == h:
+                return False
+            if actual == VACIO:
+                self.claves[pos] = h
+                self.n += 1
+                return True
+            pos = (pos + 1) & mascara
+
+    def __contains__(self, h):
+        h = np.uint64(h)
+        mascara = len(self.claves) - 1
+        pos = int(h) & mascara
+        while self.claves[pos] != VACIO:
+            if self.claves[pos] == h:
+                return True
+            pos = (pos + 1) & mascara
+        return False
+
+    def agregar_lote(self, hashes):
+        """
+        Inserta un array de hashes. Devuelve una máscara con True en los que
+        eran nuevos (solo la primera aparición dentro del lote cuenta como nueva).
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        nuevos = np.zeros(len(hashes), dtype=bool)
+        if len(hashes) == 0:
+            return nuevos
+        _, primeros = np.unique(hashes, return_index=True)
+        self._crecer(len(primeros))
+
+        mascara = np.uint64(len(self.claves) - 1)
+        pendientes = np.sort(primeros)
+        pos = (hashes[pendientes] & mascara).astype(np.int64)
+        while len(pendientes):
+            h = hashes[pendientes]
+            actual = self.claves[pos]
+            libres = actual == VACIO
+            # Varios hashes pueden apuntar al mismo hueco: gana el último escrito
+            self.claves[pos[libres]] = h[libres]
+            insertados = libres & (self.claves[pos] == h)
+            nuevos[pendientes[insertados]] = True
+            resueltos = insertados | (actual == h)
+            pendientes = pendientes[~resueltos]
+            pos = (pos[~resueltos] + 1) & int(mascara)
+        self.n += int(nuevos.sum())
+        return nuevos
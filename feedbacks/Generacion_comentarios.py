@@ -1,11 +1,34 @@
-import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+
+import numpy as np
 import pandas as pd
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from comun.semillas import RANDOM_SEED, flujo
+from comun.tabla_hashes import TablaHashes, hash_texto, hash_textos
+
 # Parámetros principales (pueden ajustarse según la necesidad del pipeline)
 OUTPUT_PATH = "feedbacks/comentarios_sinteticos_1500.csv"
 N_OBJETIVO = 1500
-RANDOM_SEED = 42
-random.seed(RANDOM_SEED)
+# "enumerativo" muestrea sin reemplazo el espacio de combinaciones; "aleatorio" es el sorteo original
+METODO = "enumerativo"
+# Filas por lote al componer y al escribir el CSV
+TAMANO_LOTE = 10_000
+
+COLUMNAS_CATALOGO = [
+    "comentario", "polaridad", "tema", "tono", "longitud",
+    "satisfaccion_min", "satisfaccion_max",
+    "aspecto_variable", "aspecto_valor_min", "aspecto_valor_max",
+]
 
 # -----------------------------
 # 1. Dominios de cada columna
@@ -182,6 +205,18 @@ variaciones_por_tema = {
 }
 
 
+# Frase que añade cada tono (formal e informal no añaden nada)
+frases_por_tono = {
+    "constructivo": "Creo que aún se podrían mejorar algunos detalles.",
+    "queja": "Este punto me genera bastante frustración.",
+    "elogio": "Valoro mucho este aspecto del curso.",
+    "sugerencia": "Me gustaría que se introdujeran cambios en este sentido.",
+}
+
+# Número de cierres que admite la longitud "medio" (la "larga" admite todos)
+N_CIERRES_MEDIO = 5
+
+
 def _minuscular_inicio(texto):
     for idx, caracter in enumerate(texto):
         if caracter.isalpha():
@@ -431,100 +466,265 @@ plantillas = {
 }
 
 # ------------------------------------------------
-# 3. Función para generar un comentario concreto
+# 3. Fragmentos precompilados
+# ------------------------------------------------
+#
+# Todos los fragmentos se normalizan una sola vez: espacios simples y punto
+# final garantizado. Las "cabezas" (apertura + plantilla) se precalculan para
+# cada par, tanto completas como truncadas a la primera frase (longitud
+# "corto"). Los fragmentos que se añaden detrás llevan ya el espacio inicial,
+# así que un comentario es la concatenación de cuatro fragmentos indexados:
+#     CABEZAS[apertura, base] + FRASES_TONO[tono] + VARIACIONES[variacion] + CIERRES[cierre]
+# El índice 0 de aperturas, tonos, variaciones y cierres es "sin fragmento".
+
+def _normalizar(texto):
+    return _asegurar_punto_final(" ".join(texto.split()))
+
+
+def _primera_frase(texto):
+    return _asegurar_punto_final(texto.split(".")[0].strip())
+
+
+def _precompilar_fragmentos():
+    indice_base = {}
+    bases = []
+    for tema in temas:
+        for polaridad in polaridades:
+            indice_base[(tema, polaridad)] = len(bases)
+            bases.extend(b.strip() for b in plantillas[tema][polaridad])
+
+    cabezas = np.empty((1 + len(aperturas_contexto), len(bases)), dtype=object)
+    cabezas_cortas = np.empty_like(cabezas)
+    for j, base in enumerate(bases):
+        cabezas[0, j] = _normalizar(base)
+        cabezas_cortas[0, j] = _primera_frase(base)
+        for i, apertura in enumerate(aperturas_contexto, start=1):
+            cabeza = f"{apertura} {_minuscular_inicio(base)}"
+            cabezas[i, j] = _normalizar(cabeza)
+            cabezas_cortas[i, j] = _primera_frase(cabeza)
+
+    def _colas(textos):
+        return np.array([""] + [" " + _normalizar(t) for t in textos], dtype=object)
+
+    indice_tono = {tono: 0 for tono in tonos}
+    for i, tono in enumerate(frases_por_tono, start=1):
+        indice_tono[tono] = i
+
+    # Variaciones de todos los temas en un solo array; INDICE_VARIACION[tema] es la primera
+    indice_variacion = {}
+    variaciones = []
+    for tema in temas:
+        indice_variacion[tema] = 1 + len(variaciones)
+        variaciones.extend(variaciones_por_tema.get(tema, []))
+
+    return {
+        "indice_base": indice_base,
+        "cabezas": cabezas,
+        "cabezas_cortas": cabezas_cortas,
+        "frases_tono": _colas(frases_por_tono.values()),
+        "indice_tono": indice_tono,
+        "variaciones": _colas(variaciones),
+        "indice_variacion": indice_variacion,
+        "cierres": _colas(cierre_reflexiones),
+    }
+
+
+FRAGMENTOS = _precompilar_fragmentos()
+
+
+def ensamblar_comentarios(i_apertura, i_base, i_tono, i_variacion, i_cierre, truncar=None):
+    """
+    Ensambla comentarios a partir de arrays de índices globales de fragmentos
+    (ver FRAGMENTOS). Con `truncar` se usa la cabeza truncada a la primera
+    frase y se descarta el resto. Devuelve un array de objetos str.
+    """
+    f = FRAGMENTOS
+    comentarios = (
+        f["cabezas"][i_apertura, i_base]
+        + f["frases_tono"][i_tono]
+        + f["variaciones"][i_variacion]
+        + f["cierres"][i_cierre]
+    )
+    if truncar is not None:
+        comentarios = np.where(truncar, f["cabezas_cortas"][i_apertura, i_base], comentarios)
+    return comentarios
+
+
+# ------------------------------------------------
+# 4. Función para generar un comentario concreto
 # ------------------------------------------------
 
-def generar_comentario(polaridad, tema, tono, longitud):
+def _elegir(rng, opciones):
+    return opciones[rng.integers(len(opciones))]
+
+
+def generar_comentario(polaridad, tema, tono, longitud, rng):
     """
     Genera un comentario en texto plano coherente con polaridad y tema.
     El tono y la longitud pueden matizar el texto con pequeñas variaciones.
     """
-    base = random.choice(plantillas[tema][polaridad]).strip()
+    f = FRAGMENTOS
+    i_base = f["indice_base"][(tema, polaridad)] + int(rng.integers(len(plantillas[tema][polaridad])))
+    i_apertura = 1 + int(rng.integers(len(aperturas_contexto))) if rng.random() < 0.65 else 0
 
-    if random.random() < 0.65:
-        apertura = random.choice(aperturas_contexto)
-        comentario = f"{apertura} {_minuscular_inicio(base)}"
-    else:
-        comentario = base
-
-    tono_extra = ""
-    if tono == "constructivo":
-        tono_extra = "Creo que aún se podrían mejorar algunos detalles."
-    elif tono == "queja":
-        tono_extra = "Este punto me genera bastante frustración."
-    elif tono == "elogio":
-        tono_extra = "Valoro mucho este aspecto del curso."
-    elif tono == "sugerencia":
-        tono_extra = "Me gustaría que se introdujeran cambios en este sentido."
-
-    if tono_extra:
-        comentario = _asegurar_punto_final(comentario)
-        comentario += " " + tono_extra
-
-    variaciones = variaciones_por_tema.get(tema, [])
-    if variaciones and random.random() < 0.65:
-        comentario = _asegurar_punto_final(comentario)
-        comentario += " " + random.choice(variaciones)
+    n_variaciones = len(variaciones_por_tema.get(tema, []))
+    i_variacion = 0
+    if n_variaciones and rng.random() < 0.65:
+        i_variacion = f["indice_variacion"][tema] + int(rng.integers(n_variaciones))
 
+    i_cierre = 0
     if longitud == "corto":
-        if random.random() < 0.5:
-            comentario = comentario.split(".")[0].strip()
-            comentario = _asegurar_punto_final(comentario)
+        if rng.random() < 0.5:
+            return f["cabezas_cortas"][i_apertura, i_base]
     elif longitud == "medio":
-        if random.random() < 0.35:
-            comentario = _asegurar_punto_final(comentario)
-            comentario += " " + random.choice(cierre_reflexiones[:5])
+        if rng.random() < 0.35:
+            i_cierre = 1 + int(rng.integers(N_CIERRES_MEDIO))
     elif longitud == "largo":
-        comentario = _asegurar_punto_final(comentario)
-        comentario += " " + random.choice(cierre_reflexiones)
+        i_cierre = 1 + int(rng.integers(len(cierre_reflexiones)))
 
-    comentario = _asegurar_punto_final(comentario)
-    return " ".join(comentario.split())
+    return (
+        f["cabezas"][i_apertura, i_base]
+        + f["frases_tono"][f["indice_tono"][tono]]
+        + f["variaciones"][i_variacion]
+        + f["cierres"][i_cierre]
+    )
 
 
 # ------------------------------------------------
-# 4. Generación del dataset (1000 filas)
+# 5. Espacio de combinaciones y generación enumerativa
 # ------------------------------------------------
+#
+# El texto de un comentario queda determinado por (tema, polaridad, plantilla,
+# apertura, frase de tono, variación, cierre), donde apertura, frase de tono,
+# variación y cierre pueden faltar. Los tonos formal e informal no añaden
+# frase, así que comparten texto. La versión "corto" truncada coincide con la
+# combinación sin frase de tono, variación ni cierre. Cada índice del espacio
+# es, por tanto, un texto distinto: muestrear índices sin reemplazo da
+# comentarios únicos sin reintentos.
+
+def _extras_de_tono(polaridad):
+    """Frases de tono distintas que admite una polaridad (None = sin frase)."""
+    extras = []
+    for tono in tonos_por_polaridad[polaridad]:
+        extra = frases_por_tono.get(tono)
+        if extra not in extras:
+            extras.append(extra)
+    return extras
+
+
+def espacio_combinaciones():
+    """
+    Tabla con un bloque por (tema, polaridad): radices de cada componente
+    (plantilla, apertura, tono, variación, cierre), tamaño del bloque y
+    offset de su primer índice global.
+    """
+    bloques = []
+    offset = 0
+    for tema in temas:
+        for polaridad in polaridades:
+            radices = (
+                len(plantillas[tema][polaridad]),
+                1 + len(aperturas_contexto),
+                len(_extras_de_tono(polaridad)),
+                1 + len(variaciones_por_tema.get(tema, [])),
+                1 + len(cierre_reflexiones),
+            )
+            tamano = int(np.prod(radices))
+            bloques.append({
+                "tema": tema,
+                "polaridad": polaridad,
+                "radices": radices,
+                "tamano": tamano,
+                "offset": offset,
+            })
+            offset += tamano
+    return bloques
+
+
+def capacidad_combinaciones():
+    """Número total de comentarios distintos que pueden generarse."""
+    return sum(bloque["tamano"] for bloque in espacio_combinaciones())
+
+
+def desordenar_indices(indices, bloques=None):
+    """
+    Convierte índices globales en (bloque, plantilla, apertura, tono,
+    variación, cierre) con aritmética de base mixta. En cada componente
+    opcional el 0 significa "sin fragmento".
+    """
+    if bloques is None:
+        bloques = espacio_combinaciones()
+    indices = np.asarray(indices, dtype=np.int64)
+    offsets = np.array([b["offset"] for b in bloques], dtype=np.int64)
+    radices = np.array([b["radices"] for b in bloques], dtype=np.int64)
+
+    bloque = np.searchsorted(offsets, indices, side="right") - 1
+    resto = indices - offsets[bloque]
+    componentes = []
+    # El último componente varía más rápido
+    for j in range(radices.shape[1] - 1, -1, -1):
+        resto, digito = np.divmod(resto, radices[bloque, j])
+        componentes.append(digito)
+    return (bloque, *reversed(componentes))
+
+
+def _indice_frase_tono(extra):
+    return list(frases_por_tono.values()).index(extra) + 1 if extra else 0
+
+
+def _indices_fragmentos(bloque, i_plantilla, i_apertura, i_extra, i_variacion, i_cierre, bloques):
+    """Pasa arrays de componentes de combinaciones a índices globales de FRAGMENTOS."""
+    f = FRAGMENTOS
+    base_bloque = np.array([f["indice_base"][(b["tema"], b["polaridad"])] for b in bloques])
+    variacion_bloque = np.array([f["indice_variacion"][b["tema"]] for b in bloques])
+    tono_bloque = np.zeros((len(bloques), max(b["radices"][2] for b in bloques)), dtype=np.int64)
+    for k, b in enumerate(bloques):
+        for j, extra in enumerate(_extras_de_tono(b["polaridad"])):
+            tono_bloque[k, j] = _indice_frase_tono(extra)
+
+    i_base = base_bloque[bloque] + i_plantilla
+    i_tono = tono_bloque[bloque, i_extra]
+    i_variacion_global = np.where(i_variacion > 0, variacion_bloque[bloque] + i_variacion - 1, 0)
+    return i_apertura, i_base, i_tono, i_variacion_global, i_cierre
+
+
+def componer_comentario(tema, polaridad, i_plantilla, i_apertura, i_extra, i_variacion, i_cierre):
+    """Construye el texto de una combinación (mismo ensamblado que generar_comentario)."""
+    f = FRAGMENTOS
+    i_base = f["indice_base"][(tema, polaridad)] + i_plantilla
+    i_tono = _indice_frase_tono(_extras_de_tono(polaridad)[i_extra])
+    i_variacion_global = f["indice_variacion"][tema] + i_variacion - 1 if i_variacion else 0
+    return (
+        f["cabezas"][i_apertura, i_base]
+        + f["frases_tono"][i_tono]
+        + f["variaciones"][i_variacion_global]
+        + f["cierres"][i_cierre]
+    )
+
+
+def _etiquetas(polaridad, extra, i_cierre, rng):
+    """
+    Tono y longitud coherentes con el texto: el tono sale de la frase de tono
+    (o formal/informal si no hay) y la longitud del cierre.
+    """
+    if extra:
+        tono = next(t for t, f in frases_por_tono.items() if f == extra)
+    else:
+        tono = _elegir(rng, [t for t in tonos_por_polaridad[polaridad] if t not in frases_por_tono])
 
-rows = []
-n_objetivo = N_OBJETIVO
-
-# Para evitar texto idéntico, podemos almacenar comentarios ya usados
-comentarios_usados = set()
-
-# Contador para evitar bucles infinitos
-intentos_maximos = n_objetivo * 50  # Ampliamos margen para combinaciones únicas
-intentos = 0
-
-print(f"Generando {n_objetivo} comentarios únicos...")
-
-while len(rows) < n_objetivo and intentos < intentos_maximos:
-    intentos += 1
-    
-    # Mostrar progreso cada 100 intentos
-    if intentos % 100 == 0:
-        print(f"  Progreso: {len(rows)}/{n_objetivo} comentarios generados (intentos: {intentos})")
-    
-    polaridad = random.choice(polaridades)
-    tema = random.choice(temas)
-    tono = random.choice(tonos_por_polaridad[polaridad])
-    longitud = random.choice(longitudes)
-
-    # Generar comentario
-    comentario = generar_comentario(polaridad, tema, tono, longitud)
+    if i_cierre == 0:
+        longitud = _elegir(rng, ["corto", "medio"])
+    elif i_cierre <= N_CIERRES_MEDIO:
+        longitud = _elegir(rng, ["medio", "largo"])
+    else:
+        longitud = "largo"
+    return tono, longitud
 
-    # Evitar duplicados exactos de texto
-    if comentario in comentarios_usados:
-        continue
-    comentarios_usados.add(comentario)
 
-    # Rango de satisfacción general según polaridad
+def fila_comentario(tema, polaridad, tono, longitud, comentario, rng):
+    """Fila del catálogo con los rangos de satisfacción y aspecto de la polaridad."""
     sat_min, sat_max = satisfaccion_ranges[polaridad]
-
-    # Aspecto
-    posibles_aspectos = aspecto_por_tema[tema]
-    aspecto_variable = random.choice(posibles_aspectos)
-
+    aspecto_variable = _elegir(rng, aspecto_por_tema[tema])
     if aspecto_variable == "ninguno":
         aspecto_valor_min, aspecto_valor_max = 1, 5
     else:
@@ -532,7 +732,7 @@ while len(rows) < n_objetivo and intentos < intentos_maximos:
         # En el matching, convertiremos las variables texto a números usando matriz_a_numero
         aspecto_valor_min, aspecto_valor_max = aspecto_ranges[polaridad]
 
-    row = {
+    return {
         "comentario": comentario,
         "polaridad": polaridad,
         "tema": tema,
@@ -544,21 +744,253 @@ while len(rows) < n_objetivo and intentos < intentos_maximos:
         "aspecto_valor_min": aspecto_valor_min,
         "aspecto_valor_max": aspecto_valor_max,
     }
-    rows.append(row)
 
-# Crear DataFrame
-df_comentarios = pd.DataFrame(rows)
 
-# Verificar si se generaron todos los comentarios
-if len(df_comentarios) < n_objetivo:
-    print(f"\n[ADVERTENCIA] Solo se generaron {len(df_comentarios)} comentarios únicos de {n_objetivo} solicitados.")
-    print(f"Se agotaron las combinaciones posibles después de {intentos} intentos.")
-else:
-    print(f"\n[OK] Se generaron exitosamente {len(df_comentarios)} comentarios únicos.")
+def _filas_enumerativas(n, rng, tamano_lote=TAMANO_LOTE):
+    """Genera `n` filas distintas del espacio de combinaciones, por lotes."""
+    bloques = espacio_combinaciones()
+    capacidad = sum(b["tamano"] for b in bloques)
+    if n > capacidad:
+        raise ValueError(f"Se piden {n} comentarios pero solo hay {capacidad} combinaciones distintas")
+
+    # 8 bytes por comentario: los índices elegidos son todo el estado
+    indices = rng.choice(capacidad, size=n, replace=False)
+    for inicio in range(0, n, tamano_lote):
+        componentes = desordenar_indices(indices[inicio:inicio + tamano_lote], bloques)
+        bloque, _, _, i_extra, _, i_cierre = componentes
+        comentarios = ensamblar_comentarios(*_indices_fragmentos(*componentes, bloques))
+        for k in range(len(bloque)):
+            tema = bloques[bloque[k]]["tema"]
+            polaridad = bloques[bloque[k]]["polaridad"]
+            extra = _extras_de_tono(polaridad)[i_extra[k]]
+            tono, longitud = _etiquetas(polaridad, extra, i_cierre[k], rng)
+            yield fila_comentario(tema, polaridad, tono, longitud, comentarios[k], rng)
+
+
+def _candidato_aleatorio(rng):
+    """Sortea etiquetas y genera el texto de un comentario candidato."""
+    polaridad = _elegir(rng, polaridades)
+    tema = _elegir(rng, temas)
+    tono = _elegir(rng, tonos_por_polaridad[polaridad])
+    longitud = _elegir(rng, longitudes)
+
+    # Generar comentario
+    comentario = generar_comentario(polaridad, tema, tono, longitud, rng)
+    return polaridad, tema, tono, longitud, comentario
+
+
+def _filas_aleatorias(n_objetivo, rng):
+    """
+    Sorteo original: genera candidatos al azar y descarta textos repetidos,
+    rindiéndose tras `n_objetivo * 50` intentos. Los textos vistos se guardan
+    como hashes de 64 bits en una tabla numpy, no como cadenas.
+    """
+    # Para evitar texto idéntico, guardamos el hash de los comentarios ya usados
+    comentarios_usados = TablaHashes(n_objetivo)
+
+    # Contador para evitar bucles infinitos
+    intentos_maximos = n_objetivo * 50  # Ampliamos margen para combinaciones únicas
+    intentos = 0
+
+    while len(comentarios_usados) < n_objetivo and intentos < intentos_maximos:
+        intentos += 1
+        polaridad, tema, tono, longitud, comentario = _candidato_aleatorio(rng)
+
+        # Evitar duplicados exactos de texto
+        if not comentarios_usados.agregar(hash_texto(comentario)):
+            continue
+
+        yield fila_comentario(tema, polaridad, tono, longitud, comentario, rng)
+
+    if len(comentarios_usados) < n_objetivo:
+        print(f"Se agotaron las combinaciones posibles después de {intentos} intentos.")
+
+
+def generar_comentarios(n, seed=RANDOM_SEED, metodo="enumerativo", tamano_lote=TAMANO_LOTE):
+    """
+    Generador perezoso de filas del catálogo de comentarios (diccionarios).
+    Con `metodo="enumerativo"` se muestrea sin reemplazo el espacio de
+    combinaciones; con `"aleatorio"` se usa el sorteo original con
+    deduplicación por hashes. Nunca devuelve dos textos iguales.
+    """
+    rng = flujo("comentarios.generacion", semilla=seed)
+    if metodo == "enumerativo":
+        yield from _filas_enumerativas(n, rng, tamano_lote)
+    elif metodo == "aleatorio":
+        yield from _filas_aleatorias(n, rng)
+    else:
+        raise ValueError(f"Método de generación desconocido: {metodo}")
+
+
+def generar_comentarios_enumerativos(n, rng):
+    """DataFrame con `n` comentarios distintos del espacio de combinaciones."""
+    return pd.DataFrame(list(_filas_enumerativas(n, rng)))
+
+
+def generar_comentarios_aleatorios(n_objetivo, rng):
+    """DataFrame con el resultado del sorteo original."""
+    return pd.DataFrame(list(_filas_aleatorias(n_objetivo, rng)))
+
+
+def guardar_comentarios_csv(filas, ruta, tamano_lote=TAMANO_LOTE):
+    """
+    Escribe las filas en CSV por lotes de `tamano_lote`, sin acumular el
+    catálogo completo en memoria. Devuelve el número de filas escritas.
+    """
+    total = 0
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == tamano_lote:
+            pd.DataFrame(lote, columns=COLUMNAS_CATALOGO).to_csv(
+                ruta, mode="w" if total == 0 else "a", header=total == 0, index=False
+            )
+            total += len(lote)
+            lote = []
+            print(f"  Progreso: {total} comentarios escritos")
+    if lote or total == 0:
+        pd.DataFrame(lote, columns=COLUMNAS_CATALOGO).to_csv(
+            ruta, mode="w" if total == 0 else "a", header=total == 0, index=False
+        )
+        total += len(lote)
+    return total
+
+
+# ------------------------------------------------
+# 6. Generación en paralelo con deduplicación por shards
+# ------------------------------------------------
+#
+# Cada ronda tiene dos fases. En la primera, cada proceso genera candidatos
+# con su propio flujo de semillas y reparte cada uno al shard propietario de
+# su hash (hash % n_shards), escribiendo un fichero por shard. En la segunda,
+# cada propietario deduplica sus candidatos con su propia tabla de hashes y
+# añade los aceptados a su fichero. No hay ningún conjunto central; el
+# catálogo final es la concatenación de los ficheros de los shards.
+
+def _generar_candidatos(tarea):
+    ronda, trabajador, n_candidatos, n_shards, seed, directorio = tarea
+    rng = flujo("comentarios.candidatos", ronda, trabajador, semilla=seed)
+    filas = []
+    for _ in range(n_candidatos):
+        polaridad, tema, tono, longitud, comentario = _candidato_aleatorio(rng)
+        filas.append(fila_comentario(tema, polaridad, tono, longitud, comentario, rng))
+
+    df = pd.DataFrame(filas, columns=COLUMNAS_CATALOGO)
+    df["hash"] = hash_textos(df["comentario"].tolist())
+    propietario = df["hash"].to_numpy() % np.uint64(n_shards)
+    for shard in range(n_shards):
+        df[propietario == shard].to_pickle(
+            os.path.join(directorio, f"candidatos_r{ronda}_w{trabajador}_s{shard}.pkl")
+        )
+
+
+def _aceptar_shard(tarea):
+    ronda, shard, n_trabajadores, restantes, directorio = tarea
+    rutas = [
+        os.path.join(directorio, f"candidatos_r{ronda}_w{trabajador}_s{shard}.pkl")
+        for trabajador in range(n_trabajadores)
+    ]
+    aceptados = 0
+    if restantes > 0:
+        ruta_tabla = os.path.join(directorio, f"tabla_s{shard}.pkl")
+        if os.path.exists(ruta_tabla):
+            with open(ruta_tabla, "rb") as f:
+                tabla = pickle.load(f)
+        else:
+            tabla = TablaHashes(restantes)
+
+        candidatos = pd.concat([pd.read_pickle(ruta) for ruta in rutas], ignore_index=True)
+        nuevos = tabla.agregar_lote(candidatos["hash"].to_numpy())
+        df_aceptados = candidatos.loc[nuevos, COLUMNAS_CATALOGO].head(restantes)
+        df_aceptados.to_csv(
+            os.path.join(directorio, f"shard_{shard}.csv"), mode="a", header=False, index=False
+        )
+        aceptados = len(df_aceptados)
+        with open(ruta_tabla, "wb") as f:
+            pickle.dump(tabla, f)
+
+    for ruta in rutas:
+        os.remove(ruta)
+    return aceptados
+
+
+def generar_comentarios_paralelo(n, ruta_salida, n_procesos, seed=RANDOM_SEED,
+                                 sobremuestreo=1.3, max_rondas=50):
+    """
+    Genera `n` comentarios únicos con `n_procesos` procesos (sorteo aleatorio
+    con deduplicación por shards de hash) y los escribe en `ruta_salida`.
+    Para una misma semilla y número de procesos el resultado es reproducible.
+    Devuelve el número de comentarios escritos.
+    """
+    n = min(n, capacidad_combinaciones())
+    cupos = [n // n_procesos + (shard < n % n_procesos) for shard in range(n_procesos)]
+    aceptados = [0] * n_procesos
+
+    directorio_salida = os.path.dirname(ruta_salida) or "."
+    with tempfile.TemporaryDirectory(dir=directorio_salida) as directorio, \
+            ProcessPoolExecutor(max_workers=n_procesos) as pool:
+        for ronda in range(max_rondas):
+            deficit = max(c - a for c, a in zip(cupos, aceptados))
+            if deficit == 0:
+                break
+            # Cada shard recibe ~1/n_procesos de los candidatos de cada proceso
+            n_candidatos = int(np.ceil(deficit * sobremuestreo))
+            list(pool.map(_generar_candidatos, [
+                (ronda, trabajador, n_candidatos, n_procesos, seed, directorio)
+                for trabajador in range(n_procesos)
+            ]))
+            nuevos = pool.map(_aceptar_shard, [
+                (ronda, shard, n_procesos, cupos[shard] - aceptados[shard], directorio)
+                for shard in range(n_procesos)
+            ])
+            aceptados = [a + b for a, b in zip(aceptados, nuevos)]
+            print(f"  Ronda {ronda + 1}: {sum(aceptados)}/{n} comentarios únicos")
+
+        # Ensamblado: cabecera + ficheros de los shards, sin ordenar ni volver a parsear
+        with open(ruta_salida, "wb") as salida:
+            salida.write((",".join(COLUMNAS_CATALOGO) + "\n").encode("utf-8"))
+            for shard in range(n_procesos):
+                ruta_shard = os.path.join(directorio, f"shard_{shard}.csv")
+                if os.path.exists(ruta_shard):
+                    with open(ruta_shard, "rb") as f:
+                        shutil.copyfileobj(f, salida)
+    return sum(aceptados)
+
+
+# ------------------------------------------------
+# 7. Generación del dataset
+# ------------------------------------------------
+
+def main(n_objetivo=N_OBJETIVO, ruta_salida=OUTPUT_PATH, metodo=METODO, seed=RANDOM_SEED, n_procesos=None):
+    capacidad = capacidad_combinaciones()
+    print(f"Capacidad: {capacidad} comentarios distintos posibles")
+
+    n_generar = min(n_objetivo, capacidad)
+    if n_procesos:
+        print(f"Generando {n_generar} comentarios únicos con {n_procesos} procesos...")
+        total = generar_comentarios_paralelo(n_generar, ruta_salida, n_procesos, seed)
+    else:
+        print(f"Generando {n_generar} comentarios únicos ({metodo})...")
+        total = guardar_comentarios_csv(generar_comentarios(n_generar, seed, metodo), ruta_salida)
+
+    # Verificar si se generaron todos los comentarios
+    if total < n_objetivo:
+        print(f"\n[ADVERTENCIA] Solo se generaron {total} comentarios únicos de {n_objetivo} solicitados.")
+    else:
+        print(f"\n[OK] Se generaron exitosamente {total} comentarios únicos.")
+    print(f"[OK] Archivo '{ruta_salida}' guardado con {total} filas.")
+
+    print("\nPrimeras 5 filas:")
+    print(pd.read_csv(ruta_salida, nrows=5))
+
 
-# Guardar a CSV
-df_comentarios.to_csv(OUTPUT_PATH, index=False)
-print(f"[OK] Archivo '{OUTPUT_PATH}' guardado con {len(df_comentarios)} filas.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera el catálogo de comentarios sintéticos.")
+    parser.add_argument("--n", type=int, default=N_OBJETIVO)
+    parser.add_argument("--salida", default=OUTPUT_PATH)
+    parser.add_argument("--metodo", choices=["enumerativo", "aleatorio"], default=METODO)
+    parser.add_argument("--semilla", type=int, default=RANDOM_SEED)
+    parser.add_argument("--procesos", type=int, help="Generación en paralelo con N procesos (sorteo aleatorio)")
+    args = parser.parse_args()
 
-print("\nPrimeras 5 filas:")
-print(df_comentarios.head())
+    main(args.n, args.salida, args.metodo, args.semilla, args.procesos)
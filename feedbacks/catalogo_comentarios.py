@@ -0,0 +1,187 @@
+"""
+Formato compacto del catálogo de comentarios sintéticos.
+
+Un catálogo es un directorio con:
+  - polaridad.npy, tema.npy, tono.npy, longitud.npy, aspecto_variable.npy:
+    códigos uint8 de cada campo categórico (vocabularios en meta.json)
+  - bucket.npy: int32, bucket de matching de cada comentario
+  - estado.npy: uint8, 1 = texto válido, 2 = texto repetido (reserva), 0 = vacío
+  - textos.bin + offsets.npy: textos UTF-8 concatenados y sus offsets (n + 1)
+  - meta.json: vocabularios, claves de bucket (con sus rangos) y huella
+
+Todo se lee con memory map, de modo que cargar el catálogo no copia datos y
+solo se decodifican los textos que se piden.
+
+Uso:
+    python feedbacks/catalogo_comentarios.py feedbacks/comentarios_sinteticos_1500.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from matching_comentarios import COLUMNAS_CLAVE, codificar_comentarios
+
+VERSION_FORMATO = 1
+CAMPOS_CATEGORICOS = ["polaridad", "tema", "tono", "longitud", "aspecto_variable"]
+ESTADO_VACIO, ESTADO_VALIDO, ESTADO_RESERVA = 0, 1, 2
+
+
+class TextosCatalogo:
+    """Textos del catálogo sobre el blob mapeado: se decodifican bajo demanda."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _texto(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __getitem__(self, ids):
+        if np.isscalar(ids):
+            return self._texto(int(ids))
+        ids = np.asarray(ids, dtype=np.int64).ravel()
+        textos = np.empty(len(ids), dtype=object)
+        textos[:] = [self._texto(i) for i in ids]
+        return textos
+
+
+class ColumnaCodificada:
+    """Campo categórico como códigos uint8 más vocabulario."""
+
+    def __init__(self, codigos, vocabulario):
+        self.codigos = codigos
+        self.vocabulario = np.array(vocabulario, dtype=object)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, ids):
+        return self.vocabulario[self.codigos[ids]]
+
+
+def ruta_catalogo(ruta_csv):
+    """Directorio del catálogo compacto asociado a un CSV de comentarios."""
+    return os.path.splitext(ruta_csv)[0] + "_catalogo"
+
+
+def es_catalogo(ruta):
+    return os.path.isfile(os.path.join(ruta, "meta.json"))
+
+
+# ============================================================================
+# Escritura
+# ============================================================================
+
+def guardar_catalogo(df_comentarios, ruta):
+    """Convierte un DataFrame de comentarios al formato compacto en `ruta`."""
+    df = df_comentarios.reset_index(drop=True)
+    comentarios = codificar_comentarios(df)
+    os.makedirs(ruta, exist_ok=True)
+
+    vocabularios = {}
+    for campo in CAMPOS_CATEGORICOS:
+        valores = df[campo].fillna("ninguno").astype(str) if campo == "aspecto_variable" else df[campo].astype(str)
+        vocabulario = sorted(valores.unique())
+        if len(vocabulario) > 255:
+            raise ValueError(f"El campo {campo} tiene {len(vocabulario)} categorías (máximo 255)")
+        codigos = pd.Categorical(valores, categories=vocabulario).codes.astype(np.uint8)
+        np.save(os.path.join(ruta, f"{campo}.npy"), codigos)
+        vocabularios[campo] = vocabulario
+
+    estado = np.full(len(df), ESTADO_VACIO, dtype=np.uint8)
+    estado[comentarios["validos"]] = ESTADO_VALIDO
+    estado[comentarios["reserva"]] = ESTADO_RESERVA
+    np.save(os.path.join(ruta, "estado.npy"), estado)
+    np.save(os.path.join(ruta, "bucket.npy"), comentarios["bucket"])
+
+    codificados = [t.encode("utf-8") for t in comentarios["textos"]]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in codificados], out=offsets[1:])
+    with open(os.path.join(ruta, "textos.bin"), "wb") as f:
+        f.write(b"".join(codificados))
+    np.save(os.path.join(ruta, "offsets.npy"), offsets)
+
+    meta = {
+        "version": VERSION_FORMATO,
+        "n": len(df),
+        "vocabularios": vocabularios,
+        "claves": comentarios["claves"].to_dict(orient="list"),
+        "huella": comentarios["huella"],
+    }
+    # meta.json se escribe al final: un catálogo a medio escribir no se reconoce
+    with open(os.path.join(ruta, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return ruta
+
+
+# ============================================================================
+# Lectura
+# ============================================================================
+
+def cargar_catalogo(ruta):
+    """
+    Abre un catálogo compacto con memory map. Devuelve el mismo diccionario
+    que `codificar_comentarios`, listo para `construir_indice`, más los
+    campos categóricos codificados (`polaridad`, `tema`, ...).
+    """
+    with open(os.path.join(ruta, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != VERSION_FORMATO:
+        raise ValueError(f"Versión de catálogo no soportada en {ruta}: {meta.get('version')}")
+
+    def _mapear(nombre):
+        return np.load(os.path.join(ruta, f"{nombre}.npy"), mmap_mode="r")
+
+    ruta_blob = os.path.join(ruta, "textos.bin")
+    if os.path.getsize(ruta_blob) > 0:
+        blob = np.memmap(ruta_blob, dtype=np.uint8, mode="r")
+    else:
+        blob = np.zeros(0, dtype=np.uint8)
+
+    estado = _mapear("estado")
+    comentarios = {
+        "textos": TextosCatalogo(blob, _mapear("offsets")),
+        "huella": meta["huella"],
+        "validos": estado == ESTADO_VALIDO,
+        "reserva": estado == ESTADO_RESERVA,
+        "bucket": _mapear("bucket"),
+        "claves": pd.DataFrame(meta["claves"], columns=COLUMNAS_CLAVE),
+    }
+    for campo in CAMPOS_CATEGORICOS:
+        comentarios[campo] = ColumnaCodificada(_mapear(campo), meta["vocabularios"][campo])
+    return comentarios
+
+
+def cargar_comentarios(ruta):
+    """
+    Carga y codifica el catálogo de comentarios desde un catálogo compacto o,
+    si `ruta` es un CSV, desde el CSV.
+    """
+    if es_catalogo(ruta):
+        return cargar_catalogo(ruta)
+    df_comentarios = pd.read_csv(ruta).dropna(subset=["comentario"]).reset_index(drop=True)
+    return codificar_comentarios(df_comentarios)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte un CSV de comentarios al catálogo compacto.")
+    parser.add_argument("csv", nargs="?", default="feedbacks/comentarios_sinteticos_1500.csv")
+    parser.add_argument("--salida", help="Directorio del catálogo (por defecto <csv>_catalogo)")
+    args = parser.parse_args()
+
+    salida = args.salida or ruta_catalogo(args.csv)
+    df_comentarios = pd.read_csv(args.csv).dropna(subset=["comentario"])
+    guardar_catalogo(df_comentarios, salida)
+    print(f"[OK] Catálogo guardado en {salida}: {len(df_comentarios)} comentarios")
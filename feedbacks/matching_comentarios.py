@@ -0,0 +1,368 @@
+"""
+Núcleo numérico para asignar comentarios sintéticos a encuestas de satisfacción.
+
+El score de un comentario solo depende de su rango de satisfacción, de su
+`aspecto_variable` y del rango de valores de ese aspecto. Los comentarios se
+agrupan en buckets por esa clave y cada bucket mantiene una lista de libres,
+de modo que elegir el mejor comentario para una encuesta consiste en puntuar
+los buckets (unas decenas) en lugar de todos los comentarios.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from comun.semillas import RANDOM_SEED, secuencia
+
+# Mapeo de texto a número para variables de tipo matriz
+MATRIZ_A_NUMERO = {
+    "Pésimo": 1,
+    "Mal": 2,
+    "Regular": 3,
+    "Bien": 4,
+    "Genial": 5,
+}
+
+# Variables que son de tipo texto (matriz)
+VARIABLES_TEXTO = {
+    "clase_duracion",
+    "clase_horario",
+    "clase_conveniencia_dia",
+    "clase_calidad_conexion",
+    "clase_calidad_audio",
+    "clase_visibilidad_pantalla",
+}
+
+COLUMNAS_CLAVE = [
+    "satisfaccion_min",
+    "satisfaccion_max",
+    "aspecto_variable",
+    "aspecto_valor_min",
+    "aspecto_valor_max",
+]
+
+# Puntos del matching (mismos criterios que el script original)
+SCORE_SATISFACCION = 40
+SCORE_SATISFACCION_CERCA = 20
+SCORE_ASPECTO = 60
+SCORE_ASPECTO_CERCA = 30
+SCORE_SIN_ASPECTO = 30
+
+
+# ============================================================================
+# Codificación de comentarios y encuestas
+# ============================================================================
+
+def huella_textos(textos):
+    """Huella de los textos del catálogo: cambia si cambia cualquier comentario."""
+    hashes = pd.util.hash_pandas_object(pd.Series(textos, dtype=object), index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()
+
+
+def codificar_comentarios(df_comentarios):
+    """
+    Codifica el catálogo de comentarios en arrays numéricos.
+    Los comentarios vacíos o con texto repetido quedan marcados como no
+    válidos para que nunca se asignen dos veces.
+    """
+    textos = df_comentarios["comentario"].fillna("").astype(str).str.strip()
+    validos = (textos != "") & ~textos.duplicated()
+    # Copias de textos ya presentes: solo se usan como reserva si se agotan los únicos
+    reserva = (textos != "") & ~validos
+
+    claves_df = df_comentarios[COLUMNAS_CLAVE].copy()
+    claves_df["aspecto_variable"] = claves_df["aspecto_variable"].fillna("ninguno").astype(str)
+    bucket = claves_df.groupby(COLUMNAS_CLAVE, sort=True).ngroup().to_numpy(dtype=np.int32)
+    claves = claves_df.drop_duplicates().sort_values(COLUMNAS_CLAVE).reset_index(drop=True)
+
+    return {
+        "textos": textos.to_numpy(dtype=object),
+        "huella": huella_textos(df_comentarios["comentario"].fillna("").astype(str)),
+        "polaridad": df_comentarios["polaridad"].to_numpy(dtype=object),
+        "tema": df_comentarios["tema"].to_numpy(dtype=object),
+        "validos": validos.to_numpy(),
+        "reserva": reserva.to_numpy(),
+        "bucket": bucket,
+        "claves": claves,
+    }
+
+
+def valores_encuestas(df_encuestas, aspectos):
+    """
+    Devuelve la satisfacción general y una matriz (n_encuestas, n_aspectos)
+    con los valores numéricos de cada aspecto. Los aspectos que no existen en
+    la encuesta quedan como NaN (no puntúan).
+    """
+    n = len(df_encuestas)
+    sat = pd.to_numeric(
+        df_encuestas.get("satisfaccion_general", pd.Series(3, index=df_encuestas.index)),
+        errors="coerce",
+    ).fillna(3).to_numpy(dtype=np.float64)
+
+    valores = np.full((n, len(aspectos)), np.nan)
+    for j, aspecto in enumerate(aspectos):
+        if aspecto not in df_encuestas.columns:
+            continue
+        columna = df_encuestas[aspecto]
+        if aspecto in VARIABLES_TEXTO:
+            numeros = columna.map(MATRIZ_A_NUMERO).fillna(3)
+        else:
+            numeros = pd.to_numeric(columna, errors="coerce").fillna(3)
+        valores[:, j] = numeros.to_numpy(dtype=np.float64)
+    return sat, valores
+
+
+def _puntuar_rango(valor, minimo, maximo, puntos, puntos_cerca):
+    dentro = (minimo <= valor) & (valor <= maximo)
+    cerca = (np.abs(valor - minimo) == 1) | (np.abs(valor - maximo) == 1)
+    return np.where(dentro, puntos, np.where(cerca, puntos_cerca, 0))
+
+
+def puntuar_claves(df_encuestas, claves):
+    """
+    Calcula la matriz de scores (n_encuestas, n_buckets) entre cada encuesta
+    y cada clave de bucket.
+    """
+    aspecto_variable = claves["aspecto_variable"].to_numpy(dtype=object)
+    con_aspecto = aspecto_variable != "ninguno"
+    aspectos = sorted(set(aspecto_variable[con_aspecto]))
+    sat, valores = valores_encuestas(df_encuestas, aspectos)
+
+    sat_min = claves["satisfaccion_min"].to_numpy(dtype=np.float64)
+    sat_max = claves["satisfaccion_max"].to_numpy(dtype=np.float64)
+    scores = _puntuar_rango(
+        sat[:, None], sat_min, sat_max, SCORE_SATISFACCION, SCORE_SATISFACCION_CERCA
+    )
+
+    columna = np.array([aspectos.index(a) if a != "ninguno" else 0 for a in aspecto_variable])
+    if aspectos:
+        valor = valores[:, columna]
+        score_aspecto = _puntuar_rango(
+            valor,
+            claves["aspecto_valor_min"].to_numpy(dtype=np.float64),
+            claves["aspecto_valor_max"].to_numpy(dtype=np.float64),
+            SCORE_ASPECTO,
+            SCORE_ASPECTO_CERCA,
+        )
+    else:
+        score_aspecto = np.zeros_like(scores)
+    scores = scores + np.where(con_aspecto, score_aspecto, SCORE_SIN_ASPECTO)
+    return scores.astype(np.int16)
+
+
+# ============================================================================
+# Índice de buckets con listas de libres
+# ============================================================================
+
+def construir_indice(comentarios, usados=None):
+    """
+    Construye el índice de buckets: para cada clave, un array con los
+    comentarios válidos aún sin usar y el número de libres.
+    Si se pasa `usados` (bitmap sobre el catálogo), esos comentarios no se
+    ofrecen y el propio array se actualiza con las nuevas asignaciones.
+    """
+    n_buckets = len(comentarios["claves"])
+    if usados is None:
+        usados = np.zeros(len(comentarios["textos"]), dtype=bool)
+    ids_validos = np.flatnonzero(comentarios["validos"] & ~usados)
+    buckets_validos = comentarios["bucket"][ids_validos]
+    orden = np.argsort(buckets_validos, kind="stable")
+    cortes = np.searchsorted(buckets_validos[orden], np.arange(n_buckets + 1))
+    libres = [ids_validos[orden[cortes[k]:cortes[k + 1]]].copy() for k in range(n_buckets)]
+
+    return {
+        "comentarios": comentarios,
+        "libres": libres,
+        "n_libres": np.diff(cortes).astype(np.int64),
+        "usados": usados,
+    }
+
+
+def _tomar(indice, bucket, posicion):
+    """Saca de la lista de libres el comentario en `posicion` (O(1))."""
+    libres = indice["libres"][bucket]
+    ultimo = indice["n_libres"][bucket] - 1
+    elegido = libres[posicion]
+    libres[posicion] = libres[ultimo]
+    libres[ultimo] = elegido
+    indice["n_libres"][bucket] = ultimo
+    indice["usados"][elegido] = True
+    return elegido
+
+
+def asignar_con_indice(indice, df_encuestas, rng, tamano_bloque=65_536):
+    """
+    Asigna a cada encuesta, en orden, el mejor comentario libre.
+    Los empates se resuelven de forma uniforme entre todos los comentarios
+    con el score máximo. Los scores se calculan por bloques de
+    `tamano_bloque` encuestas para acotar la memoria.
+    Devuelve (ids de comentario o -1, scores).
+    """
+    n = len(df_encuestas)
+    elegidos = np.full(n, -1, dtype=np.int64)
+    scores_elegidos = np.zeros(n, dtype=np.int16)
+    if n == 0 or len(indice["libres"]) == 0:
+        return elegidos, scores_elegidos
+
+    n_libres = indice["n_libres"]
+    for inicio_bloque in range(0, n, tamano_bloque):
+        if not (n_libres > 0).any():
+            break
+        bloque = df_encuestas.iloc[inicio_bloque:inicio_bloque + tamano_bloque]
+        scores = puntuar_claves(bloque, indice["comentarios"]["claves"])
+        for i in range(len(bloque)):
+            disponibles = n_libres > 0
+            if not disponibles.any():
+                break
+            fila = np.where(disponibles, scores[i], -1)
+            mejor = fila.max()
+            candidatos = np.flatnonzero(fila == mejor)
+            acumulado = np.cumsum(n_libres[candidatos])
+            r = int(rng.integers(acumulado[-1]))
+            pos = int(np.searchsorted(acumulado, r, side="right"))
+            bucket = candidatos[pos]
+            inicio = acumulado[pos - 1] if pos > 0 else 0
+            elegidos[inicio_bloque + i] = _tomar(indice, bucket, r - inicio)
+            scores_elegidos[inicio_bloque + i] = mejor
+    return elegidos, scores_elegidos
+
+
+def mejor_de_reserva(indice, df_encuestas):
+    """
+    Para encuestas que se quedaron sin comentario único, devuelve el mejor
+    comentario de la reserva (textos repetidos del catálogo) sin consumirlo.
+    A igualdad de score gana el primer comentario del catálogo.
+    Devuelve (ids de comentario o -1, scores).
+    """
+    n = len(df_encuestas)
+    elegidos = np.full(n, -1, dtype=np.int64)
+    scores_elegidos = np.zeros(n, dtype=np.int16)
+    comentarios = indice["comentarios"]
+    ids_reserva = np.flatnonzero(comentarios["reserva"])
+    if n == 0 or len(ids_reserva) == 0:
+        return elegidos, scores_elegidos
+
+    # Primer comentario de reserva de cada bucket
+    n_buckets = len(comentarios["claves"])
+    primero = np.full(n_buckets, np.iinfo(np.int64).max)
+    np.minimum.at(primero, comentarios["bucket"][ids_reserva], ids_reserva)
+    con_reserva = primero < np.iinfo(np.int64).max
+
+    scores = np.where(con_reserva, puntuar_claves(df_encuestas, comentarios["claves"]), -1)
+    mejor = scores.max(axis=1)
+    empates = np.where(scores == mejor[:, None], primero, np.iinfo(np.int64).max)
+    elegidos[:] = empates.min(axis=1)
+    scores_elegidos[:] = mejor
+    return elegidos, scores_elegidos
+
+
+# ============================================================================
+# Matching paralelo por particiones
+# ============================================================================
+
+def bandas_satisfaccion(df_encuestas):
+    """Banda 1-5 de `satisfaccion_general` de cada encuesta (3 si falta)."""
+    sat, _ = valores_encuestas(df_encuestas, [])
+    return np.clip(np.rint(sat), 1, 5).astype(np.int8)
+
+
+def repartir_catalogo(indice, bandas):
+    """
+    Reparte los comentarios libres entre las bandas de satisfacción. Cada
+    bucket solo se reparte entre las bandas dentro de su rango de
+    satisfacción (las que pueden puntuarlo más alto), en tramos contiguos
+    proporcionales a la demanda de cada banda. Los buckets sin bandas
+    compatibles quedan para la reconciliación.
+    Devuelve {banda: bitmap de comentarios asignados a la banda}.
+    """
+    claves = indice["comentarios"]["claves"]
+    n_comentarios = len(indice["comentarios"]["textos"])
+    demanda = np.bincount(bandas, minlength=6)
+    particiones = {int(b): np.zeros(n_comentarios, dtype=bool) for b in np.unique(bandas)}
+
+    sat_min = claves["satisfaccion_min"].to_numpy()
+    sat_max = claves["satisfaccion_max"].to_numpy()
+    for k, (libres, n_libres) in enumerate(zip(indice["libres"], indice["n_libres"])):
+        compatibles = [b for b in particiones if sat_min[k] <= b <= sat_max[k]]
+        if n_libres == 0 or not compatibles:
+            continue
+        ids = np.sort(libres[:n_libres])
+        pesos = np.cumsum(demanda[compatibles])
+        cortes = np.concatenate(([0], pesos * n_libres // pesos[-1]))
+        for j, b in enumerate(compatibles):
+            particiones[b][ids[cortes[j]:cortes[j + 1]]] = True
+    return particiones
+
+
+def _asignar_particion(tarea):
+    """Proceso hijo: matching secuencial de una banda sobre su tramo del catálogo."""
+    comentarios, disponibles, df_particion, semilla_particion = tarea
+    indice = construir_indice(comentarios, usados=~disponibles)
+    rng = np.random.default_rng(semilla_particion)
+    return asignar_con_indice(indice, df_particion, rng)
+
+
+def asignar_en_paralelo(indice, df_encuestas, etapa, *fragmentos, semilla=RANDOM_SEED, n_procesos=None):
+    """
+    Variante paralela de `asignar_con_indice`. Las encuestas se parten por
+    banda de satisfacción, cada banda recibe un tramo disjunto del catálogo y
+    se empareja en su propio proceso con su propio flujo de semillas. Después
+    una pasada de reconciliación empareja, con los comentarios sobrantes, solo
+    las encuestas que se quedaron sin comentario.
+    Ningún comentario se asigna dos veces y, para una semilla fija, el
+    resultado no depende de `n_procesos`. El índice queda actualizado.
+    Devuelve (ids de comentario o -1, scores).
+    """
+    n = len(df_encuestas)
+    elegidos = np.full(n, -1, dtype=np.int64)
+    scores_elegidos = np.zeros(n, dtype=np.int16)
+    if n == 0 or not (indice["n_libres"] > 0).any():
+        return elegidos, scores_elegidos
+
+    comentarios = indice["comentarios"]
+    # Los procesos hijos solo necesitan las claves y los buckets, no los textos
+    comentarios_hijos = {k: comentarios[k] for k in ("claves", "bucket", "validos")}
+    columnas = [c for c in ["satisfaccion_general", *comentarios["claves"]["aspecto_variable"].unique()]
+                if c in df_encuestas.columns]
+    bandas = bandas_satisfaccion(df_encuestas)
+    particiones = repartir_catalogo(indice, bandas)
+
+    tareas = []
+    posiciones = []
+    for banda, disponibles in particiones.items():
+        filas = np.flatnonzero(bandas == banda)
+        posiciones.append(filas)
+        tareas.append((
+            comentarios_hijos,
+            disponibles,
+            df_encuestas.iloc[filas][columnas],
+            secuencia(etapa, *fragmentos, banda, semilla=semilla),
+        ))
+
+    if n_procesos is None:
+        n_procesos = min(len(tareas), os.cpu_count() or 1)
+    if n_procesos > 1:
+        with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+            resultados = list(pool.map(_asignar_particion, tareas))
+    else:
+        resultados = [_asignar_particion(tarea) for tarea in tareas]
+
+    for filas, (elegidos_banda, scores_banda) in zip(posiciones, resultados):
+        elegidos[filas] = elegidos_banda
+        scores_elegidos[filas] = scores_banda
+    indice["usados"][elegidos[elegidos >= 0]] = True
+
+    # Reconciliación: sobrantes de todas las bandas para las encuestas sin comentario
+    reconstruido = construir_indice(comentarios, usados=indice["usados"])
+    indice["libres"] = reconstruido["libres"]
+    indice["n_libres"] = reconstruido["n_libres"]
+    pendientes = np.flatnonzero(elegidos < 0)
+    if len(pendientes):
+        rng = np.random.default_rng(secuencia(etapa, *fragmentos, 0, semilla=semilla))
+        elegidos_rec, scores_rec = asignar_con_indice(indice, df_encuestas.iloc[pendientes], rng)
+        elegidos[pendientes] = elegidos_rec
+        scores_elegidos[pendientes] = scores_rec
+    return elegidos, scores_elegidos
@@ -3,121 +3,63 @@ Script para asignar comentarios sintéticos a las encuestas de satisfacción
 basándose en matching inteligente de polaridad, satisfacción y aspectos específicos.
 """
 
+import argparse
+import os
+import sys
+
 import pandas as pd
 import numpy as np
-from random import choice, seed
-
-# Configuración de semilla para reproducibilidad
-RANDOM_SEED = 42
-np.random.seed(RANDOM_SEED)
-seed(RANDOM_SEED)
-
-# Mapeo de texto a número para variables de tipo matriz
-MATRIZ_A_NUMERO = {
-    "Pésimo": 1,
-    "Mal": 2,
-    "Regular": 3,
-    "Bien": 4,
-    "Genial": 5
-}
-
-# Variables que son de tipo texto (matriz)
-VARIABLES_TEXTO = {
-    "clase_duracion", "clase_horario", "clase_conveniencia_dia",
-    "clase_calidad_conexion", "clase_calidad_audio", "clase_visibilidad_pantalla"
-}
-
-
-def convertir_valor_a_numero(valor, variable):
-    """
-    Convierte un valor a número para comparación.
-    Si es variable de texto, usa el mapeo. Si ya es numérico, lo devuelve tal cual.
-    """
-    if variable in VARIABLES_TEXTO:
-        # Es variable de tipo texto (matriz)
-        return MATRIZ_A_NUMERO.get(valor, 3)  # Default a 3 si no encuentra
-    else:
-        # Es variable numérica
-        if isinstance(valor, (int, float)):
-            return float(valor)
-        return 3  # Default
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Reproducibilidad: los desempates usan su propio flujo del registro de semillas
+from comun.semillas import flujo
+from catalogo_comentarios import cargar_comentarios
+from matching_comentarios import (
+    asignar_con_indice,
+    asignar_en_paralelo,
+    codificar_comentarios,
+    construir_indice,
+    mejor_de_reserva,
+)
+
+ARCHIVO_FEEDBACKS = 'feedbacks/Feedbacks.csv'
+ARCHIVO_COMENTARIOS = 'feedbacks/comentarios_sinteticos_1000.csv'
+# Bitmap persistente de comentarios del catálogo ya asignados (modo incremental)
+ARCHIVO_USADOS = 'feedbacks/comentarios_usados.npz'
 
-def calcular_score_matching(comentario_row, encuesta_row):
-    """
-    Calcula un score de matching entre un comentario y una encuesta.
-    Retorna un score de 0 a 100, donde 100 es match perfecto.
-    """
-    score = 0
-    max_score = 100
-    
-    # 1. Matching de satisfacción general (40 puntos)
-    sat_encuesta = encuesta_row['satisfaccion_general']
-    sat_min = comentario_row['satisfaccion_min']
-    sat_max = comentario_row['satisfaccion_max']
-    
-    if sat_min <= sat_encuesta <= sat_max:
-        # Match perfecto
-        score += 40
-    elif sat_encuesta < sat_min:
-        # Muy cerca por debajo
-        diferencia = sat_min - sat_encuesta
-        if diferencia == 1:
-            score += 20
-        else:
-            score += 0
-    elif sat_encuesta > sat_max:
-        # Muy cerca por encima
-        diferencia = sat_encuesta - sat_max
-        if diferencia == 1:
-            score += 20
-        else:
-            score += 0
-    
-    # 2. Matching de aspecto específico (60 puntos)
-    aspecto_variable = comentario_row['aspecto_variable']
-    
-    if aspecto_variable == 'ninguno':
-        # Si no hay aspecto específico, da puntos por default
-        score += 30
-    else:
-        # Verificar que la variable existe en la encuesta
-        if aspecto_variable in encuesta_row.index:
-            valor_encuesta = encuesta_row[aspecto_variable]
-            valor_encuesta_num = convertir_valor_a_numero(valor_encuesta, aspecto_variable)
-            
-            aspecto_min = comentario_row['aspecto_valor_min']
-            aspecto_max = comentario_row['aspecto_valor_max']
-            
-            if aspecto_min <= valor_encuesta_num <= aspecto_max:
-                # Match perfecto del aspecto
-                score += 60
-            elif valor_encuesta_num < aspecto_min:
-                diferencia = aspecto_min - valor_encuesta_num
-                if diferencia == 1:
-                    score += 30
-                else:
-                    score += 0
-            elif valor_encuesta_num > aspecto_max:
-                diferencia = valor_encuesta_num - aspecto_max
-                if diferencia == 1:
-                    score += 30
-                else:
-                    score += 0
-        else:
-            # Variable no existe en encuesta, no da puntos
-            score += 0
-    
-    return score
 
+def _codificar(df_comentarios):
+    """Acepta un DataFrame de comentarios o un catálogo ya codificado."""
+    if isinstance(df_comentarios, dict):
+        return df_comentarios
+    return codificar_comentarios(df_comentarios.reset_index(drop=True))
 
-def asignar_comentarios(df_encuestas, df_comentarios):
+
+def asignar_comentarios(df_encuestas, df_comentarios, rng=None, tamano_bloque=65_536, usados=None,
+                        n_procesos=None):
     """
     Asigna comentarios a las encuestas basándose en matching inteligente.
+    Usa el núcleo de matching por buckets: cada encuesta toma el mejor
+    comentario libre y, si se agotan los textos únicos, el mejor comentario
+    con texto repetido del catálogo.
+    Con `usados` (bitmap sobre el catálogo) solo se ofrecen comentarios no
+    asignados en ejecuciones anteriores, no se recurre a textos repetidos y
+    el bitmap se actualiza en el sitio.
+    Con `n_procesos` se usa el matching paralelo por bandas de satisfacción
+    (el resultado no depende del número de procesos).
+    `df_comentarios` puede ser un DataFrame o un catálogo ya codificado
+    (ver `catalogo_comentarios.cargar_comentarios`).
     """
+    comentarios = _codificar(df_comentarios)
+    if rng is None:
+        rng = flujo("mergear.asignacion")
+
     print("Iniciando asignación de comentarios...")
     print(f"  - Encuestas: {len(df_encuestas)}")
-    print(f"  - Comentarios disponibles: {len(df_comentarios)}")
+    print(f"  - Comentarios disponibles: {len(comentarios['textos'])}")
     
     # Crear copia del DataFrame de encuestas
     df_resultado = df_encuestas.copy()
@@ -127,118 +69,202 @@ def asignar_comentarios(df_encuestas, df_comentarios):
         print("  - Columna 'comentarios' ya existe, se actualizará")
     else:
         df_resultado['comentarios'] = ''
-    
-    # Crear lista de comentarios disponibles (para evitar duplicados)
-    comentarios_disponibles = df_comentarios.copy()
-    comentarios_texto_usados = set()  # Textos de comentarios ya asignados (para evitar duplicados)
-    
-    # Para cada encuesta, encontrar el mejor comentario
-    asignaciones = []
-    scores_promedio = []
-    
-    for idx, encuesta in df_encuestas.iterrows():
-        # Calcular scores solo para comentarios no usados
-        scores = []
-        comentarios_candidatos = []
-        indices_candidatos = []
-        
-        for comentario_idx, comentario in comentarios_disponibles.iterrows():
-            # Solo considerar comentarios que no se han usado antes (por texto)
-            comentario_texto = comentario['comentario']
-            if comentario_texto not in comentarios_texto_usados:
-                score = calcular_score_matching(comentario, encuesta)
-                scores.append(score)
-                comentarios_candidatos.append(comentario)
-                indices_candidatos.append(comentario_idx)
-        
-        # Seleccionar comentario con mejor score
-        if scores:
-            # Encontrar el mejor score
-            mejor_score = max(scores)
-            indices_mejores = [i for i, s in enumerate(scores) if s == mejor_score]
-            
-            # Si hay empate, elegir aleatoriamente entre los mejores
-            idx_elegido = choice(indices_mejores)
-            comentario_asignado = comentarios_candidatos[idx_elegido]
-            comentario_idx_original = indices_candidatos[idx_elegido]
-            
-            # Asignar comentario
-            comentario_texto = comentario_asignado['comentario']
-            df_resultado.at[idx, 'comentarios'] = comentario_texto
-            
-            # Marcar comentario como usado (por texto para evitar duplicados)
-            comentarios_texto_usados.add(comentario_texto)
-            
-            # Eliminar de la lista de disponibles
-            comentarios_disponibles = comentarios_disponibles.drop(comentario_idx_original)
-            
-            asignaciones.append({
-                'encuesta_idx': idx,
-                'comentario_idx': comentario_idx_original,
-                'score': mejor_score,
-                'polaridad': comentario_asignado['polaridad'],
-                'tema': comentario_asignado['tema']
-            })
-            
-            scores_promedio.append(mejor_score)
-        else:
-            # No hay comentarios disponibles sin usar
-            # En este caso, usar el mejor comentario disponible aunque esté duplicado
-            # (solo si ya se agotaron todos los comentarios únicos)
-            if len(comentarios_disponibles) > 0:
-                scores = []
-                comentarios_candidatos = []
-                
-                for _, comentario in comentarios_disponibles.iterrows():
-                    score = calcular_score_matching(comentario, encuesta)
-                    scores.append(score)
-                    comentarios_candidatos.append(comentario)
-                
-                if scores:
-                    mejor_score = max(scores)
-                    idx_elegido = scores.index(mejor_score)
-                    comentario_asignado = comentarios_candidatos[idx_elegido]
-                    comentario_texto = comentario_asignado['comentario']
-                    df_resultado.at[idx, 'comentarios'] = comentario_texto
-                    
-                    asignaciones.append({
-                        'encuesta_idx': idx,
-                        'comentario_idx': None,
-                        'score': mejor_score,
-                        'polaridad': comentario_asignado['polaridad'],
-                        'tema': comentario_asignado['tema']
-                    })
-                    scores_promedio.append(mejor_score)
-            else:
-                df_resultado.at[idx, 'comentarios'] = ''
-                asignaciones.append({
-                    'encuesta_idx': idx,
-                    'comentario_idx': None,
-                    'score': 0,
-                    'polaridad': None,
-                    'tema': None
-                })
+
+    indice = construir_indice(comentarios, usados=usados)
+    if n_procesos is None:
+        elegidos, scores = asignar_con_indice(indice, df_resultado, rng, tamano_bloque=tamano_bloque)
+    else:
+        fragmentos = () if usados is None else (int(indice["usados"].sum()),)
+        elegidos, scores = asignar_en_paralelo(
+            indice, df_resultado, "mergear.paralelo", *fragmentos, n_procesos=n_procesos
+        )
+
+    # Sin comentarios únicos disponibles: usar el mejor con texto repetido
+    sin_unico = np.flatnonzero(elegidos < 0) if usados is None else np.array([], dtype=np.int64)
+    reserva, scores_reserva = mejor_de_reserva(indice, df_resultado.iloc[sin_unico])
+    elegidos_finales = elegidos.copy()
+    elegidos_finales[sin_unico] = reserva
+    scores[sin_unico] = scores_reserva
+
+    asignado = elegidos_finales >= 0
+    posiciones = np.maximum(elegidos_finales, 0)
+    df_resultado['comentarios'] = np.where(asignado, comentarios["textos"][posiciones], '')
+
+    polaridades = comentarios["polaridad"][posiciones]
+    temas = comentarios["tema"][posiciones]
+    asignaciones = pd.DataFrame({
+        'encuesta_idx': df_encuestas.index,
+        'comentario_idx': pd.array(np.where(elegidos >= 0, elegidos, -1), dtype="Int64"),
+        'score': np.where(asignado, scores, 0),
+        'polaridad': np.where(asignado, polaridades, None),
+        'tema': np.where(asignado, temas, None),
+    })
+    asignaciones.loc[asignaciones['comentario_idx'] < 0, 'comentario_idx'] = pd.NA
+    scores_asignados = asignaciones.loc[asignado, 'score']
     
     # Estadísticas
     print(f"\n[OK] Asignación completada")
-    print(f"  - Comentarios asignados: {len([a for a in asignaciones if a['comentario_idx'] is not None])}")
-    print(f"  - Score promedio: {np.mean(scores_promedio):.2f}")
-    print(f"  - Score mínimo: {min(scores_promedio) if scores_promedio else 0}")
-    print(f"  - Score máximo: {max(scores_promedio) if scores_promedio else 0}")
+    print(f"  - Comentarios asignados: {asignaciones['comentario_idx'].notna().sum()}")
+    print(f"  - Score promedio: {scores_asignados.mean():.2f}")
+    print(f"  - Score mínimo: {scores_asignados.min() if len(scores_asignados) else 0}")
+    print(f"  - Score máximo: {scores_asignados.max() if len(scores_asignados) else 0}")
     
     # Distribución de polaridades asignadas
     print(f"\nDistribución de polaridades asignadas:")
-    polaridades_asignadas = [a['polaridad'] for a in asignaciones if a['polaridad']]
-    if polaridades_asignadas:
-        from collections import Counter
-        dist_polaridad = Counter(polaridades_asignadas)
-        for pol, count in dist_polaridad.most_common():
-            print(f"  - {pol}: {count}")
+    dist_polaridad = asignaciones['polaridad'].dropna().value_counts()
+    for pol, count in dist_polaridad.items():
+        print(f"  - {pol}: {count}")
     
     return df_resultado, asignaciones
 
 
-def main():
+# ============================================================================
+# Modo incremental
+# ============================================================================
+
+def _pendientes(df_encuestas):
+    """Máscara de encuestas sin comentario asignado."""
+    if 'comentarios' not in df_encuestas.columns:
+        return pd.Series(True, index=df_encuestas.index)
+    return df_encuestas['comentarios'].fillna('').astype(str).str.strip() == ''
+
+
+def reconstruir_usados(df_comentarios, comentarios_asignados):
+    """
+    Reconstruye el bitmap a partir de los comentarios ya presentes en el
+    histórico. Solo se marca la primera aparición de cada texto del catálogo,
+    que es la que el matching considera válida.
+    """
+    comentarios = _codificar(df_comentarios)
+    textos = pd.Series(comentarios["textos"][np.arange(len(comentarios["textos"]))], dtype=object)
+    asignados = set(comentarios_asignados.dropna().astype(str).str.strip())
+    return (textos.isin(asignados).to_numpy() & comentarios["validos"]).copy()
+
+
+def huella_historico(ruta_historico=ARCHIVO_FEEDBACKS):
+    """Tamaño y mtime del histórico: cambia si se regenera o se edita Feedbacks.csv."""
+    if not os.path.exists(ruta_historico):
+        return ""
+    estado = os.stat(ruta_historico)
+    return f"{estado.st_size}-{estado.st_mtime_ns}"
+
+
+def cargar_usados(df_comentarios, ruta=ARCHIVO_USADOS, ruta_historico=ARCHIVO_FEEDBACKS):
+    """
+    Carga el bitmap de comentarios usados. Si no existe o no corresponde al
+    catálogo actual o al histórico con el que se guardó (por ejemplo, porque
+    Feedbacks.csv se ha regenerado), se reconstruye una vez leyendo la columna
+    `comentarios` del histórico.
+    """
+    comentarios = _codificar(df_comentarios)
+    huella = comentarios["huella"]
+    n_comentarios = len(comentarios["textos"])
+    if os.path.exists(ruta):
+        guardado = np.load(ruta)
+        if (
+            str(guardado['huella']) == huella
+            and int(guardado['n']) == n_comentarios
+            and 'historico' in guardado.files
+            and str(guardado['historico']) == huella_historico(ruta_historico)
+        ):
+            usados = np.unpackbits(guardado['usados'], count=n_comentarios).astype(bool)
+            print(f"   [OK] Índice de usados cargado: {usados.sum()} comentarios ya asignados")
+            return usados, huella
+        print("   [WARN] El índice de usados no corresponde al catálogo o al histórico actual, se reconstruye")
+
+    if os.path.exists(ruta_historico):
+        historico = pd.read_csv(ruta_historico, usecols=lambda c: c == 'comentarios')
+        asignados = historico['comentarios'] if 'comentarios' in historico else pd.Series(dtype=object)
+    else:
+        asignados = pd.Series(dtype=object)
+    usados = reconstruir_usados(comentarios, asignados)
+    print(f"   [INFO] Índice de usados reconstruido desde el histórico: {usados.sum()} comentarios")
+    return usados, huella
+
+
+def guardar_usados(usados, huella, ruta=ARCHIVO_USADOS, ruta_historico=ARCHIVO_FEEDBACKS):
+    # Se guarda después de escribir el histórico, con su huella ya actualizada
+    np.savez(
+        ruta, usados=np.packbits(usados), n=len(usados), huella=huella,
+        historico=huella_historico(ruta_historico),
+    )
+    print(f"   [OK] Índice de usados guardado: {ruta} ({usados.sum()} comentarios)")
+
+
+def asignar_incremental(df_encuestas, df_comentarios, usados, n_procesos=None):
+    """
+    Asigna comentarios solo a las encuestas con `comentarios` vacío, sin
+    repetir ningún comentario ya asignado en ejecuciones anteriores.
+    """
+    df_resultado = df_encuestas.copy()
+    if 'comentarios' not in df_resultado.columns:
+        df_resultado['comentarios'] = ''
+    # Una columna vacía se lee como float: pasarla a texto antes de rellenarla
+    df_resultado['comentarios'] = df_resultado['comentarios'].fillna('').astype(object)
+    pendientes = _pendientes(df_resultado)
+    print(f"   [INFO] Encuestas pendientes de comentario: {pendientes.sum()} de {len(df_resultado)}")
+    if not pendientes.any():
+        return df_resultado
+
+    # Un flujo distinto por estado del índice para que cada edición desempate de forma independiente
+    rng = flujo("mergear.incremental", int(usados.sum()))
+    df_pendientes, _ = asignar_comentarios(
+        df_resultado.loc[pendientes], df_comentarios, rng=rng, usados=usados, n_procesos=n_procesos
+    )
+    df_resultado.loc[pendientes, 'comentarios'] = df_pendientes['comentarios']
+    sin_comentario = _pendientes(df_resultado).sum()
+    if sin_comentario:
+        print(f"   [WARN] {sin_comentario} encuestas siguen sin comentario: catálogo agotado")
+    return df_resultado
+
+
+def main_incremental(nuevas=None, n_procesos=None, ruta_comentarios=ARCHIVO_COMENTARIOS):
+    """
+    Modo incremental. Con `nuevas` se leen solo las encuestas de la nueva
+    edición y se añaden al final de Feedbacks.csv; sin él se rellenan las
+    filas de Feedbacks.csv que aún no tienen comentario.
+    """
+    print("=" * 60)
+    print("MERCEO INCREMENTAL DE COMENTARIOS")
+    print("=" * 60)
+
+    print("\n1. Cargando datos...")
+    try:
+        comentarios = cargar_comentarios(ruta_comentarios)
+        df_encuestas = pd.read_csv(nuevas if nuevas else ARCHIVO_FEEDBACKS)
+        print(f"   [OK] Encuestas cargadas: {len(df_encuestas)} registros")
+        print(f"   [OK] Comentarios cargados: {len(comentarios['textos'])} registros")
+    except FileNotFoundError as e:
+        print(f"   [ERROR] No se encontró el archivo: {e}")
+        return
+    usados, huella = cargar_usados(comentarios)
+
+    print("\n2. Asignando comentarios a encuestas pendientes...")
+    df_resultado = asignar_incremental(df_encuestas, comentarios, usados, n_procesos=n_procesos)
+
+    print("\n3. Guardando resultado...")
+    if nuevas:
+        # Añadir al histórico respetando su orden de columnas
+        columnas = pd.read_csv(ARCHIVO_FEEDBACKS, nrows=0).columns
+        faltantes = set(columnas) - set(df_resultado.columns)
+        if faltantes:
+            print(f"   [ERROR] Faltan columnas en {nuevas}: {sorted(faltantes)}")
+            return
+        df_resultado[columnas].to_csv(
+            ARCHIVO_FEEDBACKS, mode='a', header=False, index=False, encoding='utf-8'
+        )
+        print(f"   [OK] {len(df_resultado)} registros añadidos a {ARCHIVO_FEEDBACKS}")
+    else:
+        df_resultado.to_csv(ARCHIVO_FEEDBACKS, index=False, encoding='utf-8-sig')
+        print(f"   [OK] Archivo guardado: {ARCHIVO_FEEDBACKS}")
+    guardar_usados(usados, huella)
+
+    print("\n" + "=" * 60)
+    print("MERCEO INCREMENTAL COMPLETADO")
+    print("=" * 60)
+
+
+def main(n_procesos=None, ruta_comentarios=ARCHIVO_COMENTARIOS):
     print("=" * 60)
     print("MERCEO DE COMENTARIOS CON ENCUESTAS DE SATISFACCIÓN")
     print("=" * 60)
@@ -246,23 +272,28 @@ def main():
     # 1. Cargar datos
     print("\n1. Cargando datos...")
     try:
-        df_encuestas = pd.read_csv('feedbacks/Feedbacks.csv')
-        df_comentarios = pd.read_csv('feedbacks/comentarios_sinteticos_1000.csv')
+        df_encuestas = pd.read_csv(ARCHIVO_FEEDBACKS)
+        comentarios = cargar_comentarios(ruta_comentarios)
         print(f"   [OK] Encuestas cargadas: {len(df_encuestas)} registros")
-        print(f"   [OK] Comentarios cargados: {len(df_comentarios)} registros")
+        print(f"   [OK] Comentarios cargados: {len(comentarios['textos'])} registros")
     except FileNotFoundError as e:
         print(f"   [ERROR] No se encontró el archivo: {e}")
         return
     
     # 2. Asignar comentarios
     print("\n2. Asignando comentarios...")
-    df_resultado, asignaciones = asignar_comentarios(df_encuestas, df_comentarios)
+    df_resultado, asignaciones = asignar_comentarios(df_encuestas, comentarios, n_procesos=n_procesos)
     
     # 3. Guardar resultado
     print("\n3. Guardando resultado...")
-    archivo_salida = 'feedbacks/Feedbacks.csv'
+    archivo_salida = ARCHIVO_FEEDBACKS
     df_resultado.to_csv(archivo_salida, index=False, encoding='utf-8-sig')
     print(f"   [OK] Archivo guardado: {archivo_salida}")
+    # El reparto completo redefine qué comentarios están usados
+    guardar_usados(
+        reconstruir_usados(comentarios, df_resultado['comentarios']),
+        comentarios["huella"],
+    )
     
     # 4. Mostrar ejemplos
     print("\n" + "=" * 60)
@@ -311,5 +342,17 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Asigna comentarios sintéticos a las encuestas.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo asigna comentarios a encuestas sin comentario")
+    parser.add_argument("--nuevas", help="CSV con encuestas nuevas a añadir a Feedbacks.csv (implica --incremental)")
+    parser.add_argument("--procesos", type=int, help="Matching en paralelo con N procesos")
+    parser.add_argument("--comentarios", default=ARCHIVO_COMENTARIOS,
+                        help="CSV de comentarios o catálogo compacto (directorio)")
+    args = parser.parse_args()
+
+    if args.incremental or args.nuevas:
+        main_incremental(nuevas=args.nuevas, n_procesos=args.procesos, ruta_comentarios=args.comentarios)
+    else:
+        main(n_procesos=args.procesos, ruta_comentarios=args.comentarios)
 
@@ -1,5 +1,17 @@
+import os
+import sys
+
+import numpy as np
 import pandas as pd
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from catalogo_comentarios import cargar_catalogo, es_catalogo
+
+RUTA_CATALOGO = 'feedbacks/comentarios_sinteticos_1500_catalogo'
+
 # Leer el CSV
 df = pd.read_csv('feedbacks/Feedbacks.csv')
 
@@ -52,6 +64,17 @@ if total_comentarios > 0:
     print(f'  Maximo: {longitudes.max()} caracteres')
     print(f'  Mediana: {longitudes.median():.1f} caracteres')
 
+# Verificar contra el catálogo compacto (memory map; los textos válidos se decodifican una vez para comparar)
+if es_catalogo(RUTA_CATALOGO):
+    catalogo = cargar_catalogo(RUTA_CATALOGO)
+    print(f'\nCatalogo compacto: {RUTA_CATALOGO}')
+    print(f'  Comentarios en el catalogo: {len(catalogo["textos"])}')
+    print(f'  Textos unicos: {catalogo["validos"].sum()}')
+    print(f'  Textos repetidos (reserva): {catalogo["reserva"].sum()}')
+    textos_catalogo = set(catalogo['textos'][np.flatnonzero(catalogo['validos'])])
+    fuera_catalogo = (~comentarios_no_vacios.dropna().str.strip().isin(textos_catalogo)).sum()
+    print(f'  Comentarios asignados que no estan en el catalogo: {fuera_catalogo}')
+
 print('\n' + '=' * 70)
 if total_comentarios == comentarios_unicos:
     print('[OK] Todos los comentarios son unicos')
@@ -1,18 +1,39 @@
 """
-Script para unificar dos archivos Excel de formularios y generar 700 registros totales
-con correlaciones lógicas y máxima coherencia entre variables.
+Script para unificar dos archivos Excel de formularios y generar --nuevos
+registros adicionales (500 por defecto) con correlaciones lógicas y máxima
+coherencia entre variables.
+
+Uso:
+    python formularios/unificar_y_generar_formularios.py [--nuevos 500]
 """
 
+import argparse
 import pandas as pd
 import numpy as np
-import random
 import os
+import sys
 from collections import Counter
+from openpyxl import load_workbook
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Reproducibilidad: cada etapa usa su propio flujo del registro de semillas
+from comun.semillas import flujo
+from verificar_completo import verificar_formularios
+
+parser = argparse.ArgumentParser(description="Unifica los formularios y genera registros nuevos coherentes.")
+parser.add_argument("--nuevos", type=int, default=500, help="Número de registros nuevos a generar")
+N_NUEVOS = parser.parse_known_args()[0].nuevos
 
-# Configuración de semilla para reproducibilidad
-RANDOM_SEED = 42
-np.random.seed(RANDOM_SEED)
-random.seed(RANDOM_SEED)
+
+def _elegir(rng, opciones, weights=None):
+    """Equivalente a random.choice / random.choices(...)[0] sobre un Generator."""
+    if weights is None:
+        return opciones[rng.integers(len(opciones))]
+    pesos = np.asarray(weights, dtype=float)
+    return opciones[rng.choice(len(opciones), p=pesos / pesos.sum())]
 
 # Obtener el directorio del script
 try:
@@ -40,23 +61,46 @@ print("UNIFICACIÓN Y GENERACIÓN DE FORMULARIOS")
 print("=" * 70)
 
 print("\n1. Leyendo archivos Excel...")
-# Buscar archivos Excel originales (solo los que tienen ~100 registros, excluyendo unificado)
-archivos_excel = []
-for f in os.listdir(script_dir):
-    if f.endswith('.xlsx') and 'unificado' not in f.lower():
-        try:
-            df_temp = pd.read_excel(os.path.join(script_dir, f))
+
+def contar_filas_excel(ruta):
+    """
+    Cuenta los registros de la primera hoja sin cargar las celdas en un
+    DataFrame: usa la dimensión guardada en la hoja y, si el archivo no la
+    trae, recorre las filas en modo read-only de openpyxl.
+    """
+    libro = load_workbook(ruta, read_only=True)
+    try:
+        hoja = libro.worksheets[0]
+        if hoja.max_row is not None:
+            return max(0, hoja.max_row - 1)
+        filas = sum(1 for fila in hoja.iter_rows(values_only=True) if any(v is not None for v in fila))
+        return max(0, filas - 1)
+    finally:
+        libro.close()
+
+
+def seleccionar_archivos_formularios(directorio, min_filas=90, max_filas=110):
+    """Archivos .xlsx originales (~100 registros), ordenados por nombre."""
+    seleccionados = []
+    for f in os.listdir(directorio):
+        if f.endswith('.xlsx') and 'unificado' not in f.lower():
+            try:
+                n_filas = contar_filas_excel(os.path.join(directorio, f))
+            except Exception:
+                continue
             # Solo incluir archivos con aproximadamente 100 registros (archivos originales)
-            if 90 <= len(df_temp) <= 110:
-                archivos_excel.append((f, len(df_temp)))
-        except:
-            pass
+            if min_filas <= n_filas <= max_filas:
+                seleccionados.append((f, n_filas))
+    return sorted(seleccionados, key=lambda x: x[0])
+
+
+# Buscar archivos Excel originales (solo los que tienen ~100 registros, excluyendo unificado)
+archivos_excel = seleccionar_archivos_formularios(script_dir)
 
 if len(archivos_excel) < 2:
     raise FileNotFoundError(f"Se necesitan al menos 2 archivos Excel con ~100 registros. Encontrados: {[f[0] for f in archivos_excel]}")
 
-# Ordenar por nombre y usar los dos primeros
-archivos_excel.sort(key=lambda x: x[0])
+# Usar los dos primeros por nombre; cada uno se carga una sola vez
 archivo1 = os.path.join(script_dir, archivos_excel[0][0])
 archivo2 = os.path.join(script_dir, archivos_excel[1][0])
 df1 = pd.read_excel(archivo1)
@@ -117,54 +161,100 @@ print(f"   [OK] IDs duplicados encontrados: {len(duplicados)}")
 
 print("\n3. Creando mapeos de correlaciones lógicas...")
 
-# Mapeo: Área de interés -> Sectores laborales coherentes
-area_a_sector = {}
-if 'Área de interés para formarse' in valores_unicos:
-    areas_interes = valores_unicos['Área de interés para formarse']
-    sectores = valores_unicos.get('Sector laboral', [])
-    
-    # Crear mapeos lógicos basados en los datos existentes
-    for area in areas_interes:
-        # Buscar sectores que aparecen con esta área en los datos
-        sectores_coherentes = df_temp[df_temp['Área de interés para formarse'] == area]['Sector laboral'].unique().tolist()
-        if sectores_coherentes:
-            area_a_sector[area] = sectores_coherentes
-        else:
-            # Si no hay datos, usar todos los sectores disponibles
-            area_a_sector[area] = sectores
-
-# Mapeo: Titulación -> Áreas de estudio coherentes
-titulacion_a_area_estudios = {}
-if 'Titulación académica' in valores_unicos and 'Área de estudios' in valores_unicos:
-    titulaciones = valores_unicos['Titulación académica']
-    areas_estudios = valores_unicos['Área de estudios']
-    
-    for tit in titulaciones:
-        areas_coherentes = df_temp[df_temp['Titulación académica'] == tit]['Área de estudios'].unique().tolist()
-        if areas_coherentes:
-            titulacion_a_area_estudios[tit] = areas_coherentes
-        else:
-            titulacion_a_area_estudios[tit] = areas_estudios
-
-# Mapeo: País -> Ciudades coherentes
-pais_a_ciudad = {}
-if 'País' in valores_unicos and 'Ciudad' in valores_unicos:
-    paises = valores_unicos['País']
-    ciudades = valores_unicos['Ciudad']
-    
-    for pais in paises:
-        ciudades_coherentes = df_temp[df_temp['País'] == pais]['Ciudad'].unique().tolist()
-        if ciudades_coherentes:
-            pais_a_ciudad[pais] = ciudades_coherentes
-        else:
-            pais_a_ciudad[pais] = ciudades
+# Modelo condicional: P(hijo | padre) como matrices densas (filas = padres,
+# columnas = hijos), aprendidas de una sola agrupación sobre los registros semilla
+LIMITES_BANDAS_EDAD = [30, 40]  # 18-30, 31-40, 41-50
+LIMITES_TRAMOS_EXPERIENCIA = [0, 3, 8]  # 0, 1-3, 4-8, 9+ años
+
+
+def banda_edad(edades):
+    return np.searchsorted(LIMITES_BANDAS_EDAD, edades, side='left')
+
+
+def tramo_experiencia(experiencias):
+    return np.searchsorted(LIMITES_TRAMOS_EXPERIENCIA, experiencias, side='left')
+
+
+def tabla_probabilidad(conteos, padre, hijo, padres, hijos):
+    """
+    Matriz densa P(hijo | padre) a partir de los conteos conjuntos. Los
+    padres sin ningún registro usan la distribución marginal del hijo.
+    """
+    matriz = (
+        conteos.groupby(level=[padre, hijo]).sum()
+        .unstack(fill_value=0)
+        .reindex(index=padres, columns=hijos, fill_value=0)
+        .to_numpy(dtype=float, copy=True)
+    )
+    sin_datos = matriz.sum(axis=1) == 0
+    matriz[sin_datos] = matriz.sum(axis=0)
+    probabilidades = matriz / matriz.sum(axis=1, keepdims=True)
+    acumulada = np.cumsum(probabilidades, axis=1)
+    acumulada[:, -1] = 1.0
+    return {
+        'padres': np.array(padres, dtype=object),
+        'hijos': np.array(hijos, dtype=object),
+        'probabilidades': probabilidades,
+        'acumulada': acumulada,
+    }
+
+
+def aprender_modelo_condicional(df):
+    """Aprende todas las tablas condicionales con un único groupby sobre df."""
+    semillas = df.assign(
+        _banda_edad=banda_edad(df['Edad'].to_numpy()),
+        _tramo_experiencia=tramo_experiencia(df['Experiencia laboral'].to_numpy()),
+    )
+    relaciones = [
+        ('País', 'Ciudad'),
+        ('Área de interés para formarse', 'Sector laboral'),
+        ('Titulación académica', 'Área de estudios'),
+        ('_banda_edad', 'Experiencia laboral'),
+        ('_tramo_experiencia', 'Motivo de la formación'),
+    ]
+    columnas_modelo = list(dict.fromkeys(c for relacion in relaciones for c in relacion))
+    conteos = semillas.groupby(columnas_modelo, sort=False).size()
+
+    dominios = dict(valores_unicos)
+    dominios['_banda_edad'] = list(range(len(LIMITES_BANDAS_EDAD) + 1))
+    dominios['_tramo_experiencia'] = list(range(len(LIMITES_TRAMOS_EXPERIENCIA) + 1))
+    dominios['Experiencia laboral'] = list(range(int(df['Experiencia laboral'].max()) + 1))
+
+    return {
+        hijo: tabla_probabilidad(conteos, padre, hijo, dominios[padre], dominios[hijo])
+        for padre, hijo in relaciones
+    }
 
-# Mapeo: Experiencia -> Motivo de formación (lógica)
-# Personas con más experiencia tienden a buscar "Escalar", estudiantes buscan "Búsqueda de empleo"
-experiencia_a_motivo = {}
-motivos = valores_unicos.get('Motivo de la formación', [])
 
-print(f"   [OK] Mapeos de correlaciones creados")
+def muestrear_condicional(rng, tabla, codigos_padre, limite=None):
+    """
+    Muestreo vectorial por inversión de la CDF condicional de cada fila.
+    `limite` (opcional, por fila) restringe el hijo a los códigos <= limite;
+    las filas sin probabilidad en ese rango devuelven -1.
+    """
+    acumulada = tabla['acumulada']
+    n_padres, n_hijos = acumulada.shape
+    codigos_padre = np.asarray(codigos_padre, dtype=np.int64)
+    masa = np.ones(len(codigos_padre)) if limite is None else acumulada[codigos_padre, limite]
+    u = rng.random(len(codigos_padre)) * masa
+    # Cada fila de la CDF se desplaza por su índice para buscar en un solo array
+    desplazada = (acumulada + np.arange(n_padres)[:, None]).ravel()
+    codigos = np.searchsorted(desplazada, codigos_padre + u, side='right') - codigos_padre * n_hijos
+    codigos = np.minimum(codigos, n_hijos - 1)
+    codigos[masa <= 0] = -1
+    return codigos
+
+
+modelo_condicional = aprender_modelo_condicional(df_temp)
+
+# Mapeo: País -> Ciudades observadas (para la validación de coherencia)
+tabla_ciudades = modelo_condicional['Ciudad']
+pais_a_ciudad = {
+    pais: list(tabla_ciudades['hijos'][fila > 0])
+    for pais, fila in zip(tabla_ciudades['padres'], tabla_ciudades['probabilidades'])
+}
+
+print(f"   [OK] Modelo condicional aprendido: {', '.join(modelo_condicional)}")
 
 # ============================================================================
 # 4. UNIFICACIÓN DE IDs
@@ -193,11 +283,12 @@ n_30_40 = int(n_existentes * 0.30)
 n_40_50 = n_existentes - n_18_30 - n_30_40
 
 # Generar edades según distribución
+rng_edades = flujo("formularios.edades_existentes")
 edades_nuevas = []
-edades_nuevas.extend([random.randint(18, 30) for _ in range(n_18_30)])
-edades_nuevas.extend([random.randint(30, 40) for _ in range(n_30_40)])
-edades_nuevas.extend([random.randint(40, 50) for _ in range(n_40_50)])
-random.shuffle(edades_nuevas)
+edades_nuevas.extend(rng_edades.integers(18, 31, size=n_18_30).tolist())
+edades_nuevas.extend(rng_edades.integers(30, 41, size=n_30_40).tolist())
+edades_nuevas.extend(rng_edades.integers(40, 51, size=n_40_50).tolist())
+rng_edades.shuffle(edades_nuevas)
 
 for idx, row in df_existente.iterrows():
     nueva_edad = edades_nuevas[idx]
@@ -222,156 +313,137 @@ print(f"   [OK] IDs unificados: U0001 a U{len(df_existente):04d}")
 print(f"   [OK] Total registros existentes: {len(df_existente)}")
 
 # ============================================================================
-# 5. GENERACIÓN DE 500 REGISTROS NUEVOS
+# 5. GENERACIÓN DE REGISTROS NUEVOS
 # ============================================================================
 
-print("\n5. Generando 500 registros nuevos con correlaciones lógicas...")
-
-def generar_edad_coherente():
-    """Genera edad realista (18-50 años) con distribución específica"""
-    # Distribución: 60% 18-30, 30% 30-40, 10% 40-50
-    weights = [0.60, 0.30, 0.10]
-    rangos = [(18, 30), (30, 40), (40, 50)]
-    rango = random.choices(rangos, weights=weights)[0]
-    # Generar edad uniformemente dentro del rango seleccionado
-    return random.randint(rango[0], rango[1])
-
-def generar_experiencia_coherente(edad):
-    """Genera experiencia laboral coherente con la edad (rango 18-50)"""
-    # Experiencia máxima = edad - 18 (asumiendo que se empieza a trabajar a los 18)
-    max_exp = max(0, edad - 18)
-    
-    # Si es muy joven (18-22), probablemente estudiante (0-2 años exp)
-    if edad <= 22:
-        exp_max = min(2, max_exp)
-        return random.randint(0, exp_max)
-    # Si es joven (23-30), experiencia moderada (0-12 años, pero típicamente 1-8)
-    elif edad <= 30:
-        # La mayoría tiene 1-8 años, algunos tienen 0 (estudiantes), pocos tienen 9-12
-        if random.random() < 0.1:  # 10% estudiantes sin experiencia
-            return 0
-        elif random.random() < 0.8:  # 80% experiencia típica
-            return random.randint(1, min(8, max_exp))
-        else:  # 10% con más experiencia (solo si max_exp >= 9)
-            if max_exp >= 9:
-                return random.randint(9, min(12, max_exp))
-            else:
-                return random.randint(1, max_exp)
-    # Si es adulto joven (31-40), experiencia considerable (3-22 años)
-    elif edad <= 40:
-        exp_min = max(2, max_exp - 18)  # Mínimo 2 años, pero coherente con edad
-        exp_max = max_exp
-        if exp_min > exp_max:
-            exp_min = max(0, exp_max - 5)  # Ajustar si el mínimo es mayor que el máximo
-        return random.randint(exp_min, exp_max)
-    # Si es adulto (41-50), experiencia alta (5-32 años)
-    else:
-        exp_min = max(5, max_exp - 20)  # Mínimo 5 años, pero coherente con edad
-        exp_max = max_exp
-        if exp_min > exp_max:
-            exp_min = max(0, exp_max - 10)  # Ajustar si el mínimo es mayor que el máximo
-        return random.randint(exp_min, exp_max)
-
-def generar_motivo_por_experiencia(experiencia):
-    """Genera motivo de formación coherente con experiencia"""
-    if experiencia == 0:
-        return random.choices(
-            motivos,
-            weights=[0.4, 0.3, 0.1, 0.1, 0.1] if len(motivos) >= 5 else [1/len(motivos)]*len(motivos)
-        )[0]
-    elif experiencia <= 3:
-        # Búsqueda de empleo o ampliar conocimiento
-        return random.choice(motivos)
-    elif experiencia <= 8:
-        # Cambio de trabajo o escalar
-        return random.choice(motivos)
-    else:
-        # Escalar en el trabajo o ampliar conocimiento
-        return random.choice(motivos)
-
-def generar_sector_por_area(area_interes):
-    """Genera sector laboral coherente con área de interés"""
-    if area_interes in area_a_sector:
-        return random.choice(area_a_sector[area_interes])
-    else:
-        return random.choice(valores_unicos.get('Sector laboral', ['Tecnología']))
-
-def generar_area_estudios_por_titulacion(titulacion):
-    """Genera área de estudios coherente con titulación"""
-    if titulacion in titulacion_a_area_estudios:
-        return random.choice(titulacion_a_area_estudios[titulacion])
-    else:
-        return random.choice(valores_unicos.get('Área de estudios', ['Ingeniería']))
-
-def generar_ciudad_por_pais(pais):
-    """Genera ciudad coherente con país"""
-    if pais in pais_a_ciudad:
-        return random.choice(pais_a_ciudad[pais])
-    else:
-        return random.choice(valores_unicos.get('Ciudad', ['Madrid']))
-
-# Generar los 500 registros nuevos
-nuevos_registros = []
-inicio_id = len(df_existente) + 1
-
-for i in range(500):
-    # Generar edad y experiencia de forma coherente
-    edad = generar_edad_coherente()
-    experiencia = generar_experiencia_coherente(edad)
-    
-    # Asegurar coherencia: si la experiencia es mayor que lo permitido, ajustar
-    if experiencia > (edad - 18):
-        experiencia = max(0, edad - 18)
-    
-    # Generar otras variables con distribuciones realistas
-    genero = random.choices(
-        valores_unicos['Género'],
-        weights=[distribuciones['Género'].get(g, 0.25) for g in valores_unicos['Género']]
-    )[0]
-    
-    pais = random.choices(
-        valores_unicos['País'],
-        weights=[distribuciones['País'].get(p, 1/len(valores_unicos['País'])) for p in valores_unicos['País']]
-    )[0]
-    
-    ciudad = generar_ciudad_por_pais(pais)
-    
-    area_interes = random.choices(
-        valores_unicos['Área de interés para formarse'],
-        weights=[distribuciones['Área de interés para formarse'].get(a, 1/len(valores_unicos['Área de interés para formarse'])) for a in valores_unicos['Área de interés para formarse']]
-    )[0]
-    
-    sector_laboral = generar_sector_por_area(area_interes)
-    
-    titulacion = random.choices(
-        valores_unicos['Titulación académica'],
-        weights=[distribuciones['Titulación académica'].get(t, 1/len(valores_unicos['Titulación académica'])) for t in valores_unicos['Titulación académica']]
-    )[0]
-    
-    area_estudios = generar_area_estudios_por_titulacion(titulacion)
-    
-    motivo = generar_motivo_por_experiencia(experiencia)
-    
-    # Generar ID
-    id_usuario = f"U{inicio_id + i:04d}"
-    
-    nuevo_registro = {
-        'id_usuario': id_usuario,
-        'Ciudad': ciudad,
-        'País': pais,
-        'Edad': edad,
-        'Género': genero,
-        'Área de interés para formarse': area_interes,
-        'Titulación académica': titulacion,
-        'Área de estudios': area_estudios,
-        'Experiencia laboral': experiencia,
-        'Sector laboral': sector_laboral,
-        'Motivo de la formación': motivo
-    }
-    
-    nuevos_registros.append(nuevo_registro)
-
-df_nuevos = pd.DataFrame(nuevos_registros)
+print(f"\n5. Generando {N_NUEVOS} registros nuevos con correlaciones lógicas...")
+
+# Distribución de edades: 60% 18-30, 30% 30-40, 10% 40-50
+PESOS_RANGOS_EDAD = [0.60, 0.30, 0.10]
+RANGOS_EDAD = np.array([(18, 30), (30, 40), (40, 50)])
+
+
+def tabla_acumulada(pesos):
+    """Pesos acumulados para muestreo por inversión (se construye una vez por columna)."""
+    acumulada = np.cumsum(np.asarray(pesos, dtype=float))
+    return acumulada / acumulada[-1]
+
+
+def muestrear_codigos(rng, acumulada, n):
+    """Devuelve n índices muestreados según una tabla de pesos acumulados."""
+    return np.searchsorted(acumulada, rng.random(n), side='right')
+
+
+def tabla_categorica(col):
+    """Valores de la columna y sus pesos acumulados según la distribución observada."""
+    valores = valores_unicos[col]
+    pesos = [distribuciones[col].get(v, 1/len(valores)) for v in valores]
+    return np.array(valores, dtype=object), tabla_acumulada(pesos)
+
+
+def generar_edades(rng, n):
+    """Versión vectorial de la regla de edades (18-50 años) por rangos."""
+    rangos = RANGOS_EDAD[muestrear_codigos(rng, tabla_acumulada(PESOS_RANGOS_EDAD), n)]
+    return rng.integers(rangos[:, 0], rangos[:, 1] + 1)
+
+
+def generar_experiencias(rng, edades):
+    """
+    Regla de respaldo para edades cuya banda no tiene experiencias posibles
+    en el modelo condicional. Experiencia coherente con la edad, por tramos:
+      - 18-22: 0-2 años (estudiantes)
+      - 23-30: 10% sin experiencia, 72% entre 1 y 8 años, 18% entre 9 y 12
+        (o entre 1 y el máximo si la edad no da para 9)
+      - 31-40: entre max(2, máx - 18) y el máximo
+      - 41-50: entre max(5, máx - 20) y el máximo
+    siendo el máximo edad - 18 (se empieza a trabajar a los 18).
+    """
+    max_exp = np.maximum(0, edades - 18)
+    u_estudiante = rng.random(len(edades))
+    u_tipica = rng.random(len(edades))
+
+    minimo = np.zeros_like(max_exp)
+    maximo = np.minimum(2, max_exp)
+
+    joven = (edades > 22) & (edades <= 30)
+    tipica = joven & (u_estudiante >= 0.1) & (u_tipica < 0.8)
+    alta = joven & (u_estudiante >= 0.1) & (u_tipica >= 0.8)
+    alta_posible = alta & (max_exp >= 9)
+    minimo[joven] = 0
+    maximo[joven] = 0
+    minimo[tipica] = 1
+    maximo[tipica] = np.minimum(8, max_exp[tipica])
+    minimo[alta] = 1
+    maximo[alta] = max_exp[alta]
+    minimo[alta_posible] = 9
+    maximo[alta_posible] = np.minimum(12, max_exp[alta_posible])
+
+    adulto_joven = (edades > 30) & (edades <= 40)
+    minimo[adulto_joven] = np.maximum(2, max_exp[adulto_joven] - 18)
+    maximo[adulto_joven] = max_exp[adulto_joven]
+
+    adulto = edades > 40
+    minimo[adulto] = np.maximum(5, max_exp[adulto] - 20)
+    maximo[adulto] = max_exp[adulto]
+
+    # Si el mínimo supera al máximo, ajustarlo hacia abajo
+    invertido = minimo > maximo
+    minimo[invertido & adulto_joven] = np.maximum(0, maximo[invertido & adulto_joven] - 5)
+    minimo[invertido & adulto] = np.maximum(0, maximo[invertido & adulto] - 10)
+
+    return rng.integers(minimo, maximo + 1)
+
+
+def generar_experiencias_modelo(rng, edades):
+    """Experiencia según P(experiencia | banda de edad), truncada a edad - 18."""
+    tabla = modelo_condicional['Experiencia laboral']
+    limite = np.minimum(np.maximum(0, edades - 18), len(tabla['hijos']) - 1)
+    experiencias = muestrear_condicional(rng, tabla, banda_edad(edades), limite)
+    sin_masa = experiencias < 0
+    if sin_masa.any():
+        experiencias[sin_masa] = generar_experiencias(rng, edades[sin_masa])
+    return experiencias
+
+
+def generar_perfiles(n, rng, inicio_id=1):
+    """
+    Genera n perfiles coherentes de una vez: cada columna se muestrea en
+    bloque con numpy a partir de tablas de pesos construidas una sola vez.
+    """
+    edades = generar_edades(rng, n)
+    experiencias = generar_experiencias_modelo(rng, edades)
+    # Asegurar coherencia: la experiencia no puede superar edad - 18
+    experiencias = np.minimum(experiencias, np.maximum(0, edades - 18))
+
+    generos, acum_genero = tabla_categorica('Género')
+    paises, acum_pais = tabla_categorica('País')
+    areas, acum_area = tabla_categorica('Área de interés para formarse')
+    titulaciones, acum_titulacion = tabla_categorica('Titulación académica')
+
+    cod_pais = muestrear_codigos(rng, acum_pais, n)
+    cod_area = muestrear_codigos(rng, acum_area, n)
+    cod_titulacion = muestrear_codigos(rng, acum_titulacion, n)
+
+    def _hijos(columna, codigos_padre):
+        tabla = modelo_condicional[columna]
+        return tabla['hijos'][muestrear_condicional(rng, tabla, codigos_padre)]
+
+    return pd.DataFrame({
+        'id_usuario': [f"U{i:04d}" for i in range(inicio_id, inicio_id + n)],
+        'Ciudad': _hijos('Ciudad', cod_pais),
+        'País': paises[cod_pais],
+        'Edad': edades,
+        'Género': generos[muestrear_codigos(rng, acum_genero, n)],
+        'Área de interés para formarse': areas[cod_area],
+        'Titulación académica': titulaciones[cod_titulacion],
+        'Área de estudios': _hijos('Área de estudios', cod_titulacion),
+        'Experiencia laboral': experiencias,
+        'Sector laboral': _hijos('Sector laboral', cod_area),
+        'Motivo de la formación': _hijos('Motivo de la formación', tramo_experiencia(experiencias)),
+    })
+
+
+df_nuevos = generar_perfiles(N_NUEVOS, flujo("formularios.perfiles"), inicio_id=len(df_existente) + 1)
 print(f"   [OK] Generados {len(df_nuevos)} registros nuevos")
 
 # ============================================================================
@@ -380,53 +452,87 @@ print(f"   [OK] Generados {len(df_nuevos)} registros nuevos")
 
 print("\n6. Validando coherencia lógica de todos los registros...")
 
-def validar_coherencia(df):
-    """Valida y corrige inconsistencias lógicas"""
-    inconsistencias = []
-    
-    for idx, row in df.iterrows():
-        edad = row['Edad']
-        experiencia = row['Experiencia laboral']
-        
-        # Validar: edad debe estar en rango 18-50
-        if edad < 18:
-            df.at[idx, 'Edad'] = 18
-            inconsistencias.append(f"Fila {idx}: Ajustada edad mínima a 18")
-        elif edad > 50:
-            # Redistribuir según distribución objetivo
-            if random.random() < 0.60:
-                nueva_edad = random.randint(18, 30)
-            elif random.random() < 0.90:
-                nueva_edad = random.randint(30, 40)
+REGLAS_COHERENCIA = ['edad_minima', 'edad_maxima', 'experiencia', 'ciudad']
+
+
+def validar_coherencia(df, rng):
+    """
+    Valida y corrige inconsistencias lógicas con máscaras sobre columnas
+    completas. Devuelve, por regla, el número de filas corregidas y sus
+    etiquetas de índice:
+      - edad_minima: edad < 18, se fija en 18
+      - edad_maxima: edad > 50, se redistribuye según la distribución objetivo
+      - experiencia: experiencia > edad - 18, se limita a max(0, edad - 18)
+      - ciudad: ciudad que no pertenece al país, se elige otra del país
+    Solo las filas con edad > 50 o ciudad inválida consumen números
+    aleatorios, en orden de fila, de modo que las correcciones coinciden con
+    las de la validación fila a fila para el mismo flujo de semillas.
+    """
+    edades = df['Edad'].to_numpy(copy=True)
+    experiencias = df['Experiencia laboral'].to_numpy()
+    paises = df['País'].to_numpy()
+    ciudades = df['Ciudad'].to_numpy(dtype=object, copy=True)
+
+    edad_minima = edades < 18
+    edad_maxima = edades > 50
+    edades[edad_minima] = 18
+
+    pares_validos = pd.MultiIndex.from_tuples(
+        [(pais, ciudad) for pais, lista in pais_a_ciudad.items() for ciudad in lista]
+    )
+    ciudad_invalida = (
+        df['País'].isin(list(pais_a_ciudad)).to_numpy()
+        & ~pd.MultiIndex.from_arrays([paises, ciudades]).isin(pares_validos)
+    )
+
+    # Correcciones aleatorias: solo las filas marcadas, en orden de fila
+    for pos in np.flatnonzero(edad_maxima | ciudad_invalida):
+        if edad_maxima[pos]:
+            if rng.random() < 0.60:
+                edades[pos] = int(rng.integers(18, 31))
+            elif rng.random() < 0.90:
+                edades[pos] = int(rng.integers(30, 41))
             else:
-                nueva_edad = random.randint(40, 50)
-            df.at[idx, 'Edad'] = nueva_edad
-            inconsistencias.append(f"Fila {idx}: Ajustada edad ({edad} -> {nueva_edad})")
-            edad = nueva_edad  # Actualizar para validación de experiencia
-        
-        # Validar: experiencia no puede ser mayor que edad - 18
-        if experiencia > (edad - 18):
-            df.at[idx, 'Experiencia laboral'] = max(0, edad - 18)
-            inconsistencias.append(f"Fila {idx}: Ajustada experiencia ({experiencia} -> {df.at[idx, 'Experiencia laboral']}) para edad {edad}")
-        
-        # Validar: ciudad debe pertenecer al país (si tenemos el mapeo)
-        if row['País'] in pais_a_ciudad:
-            if row['Ciudad'] not in pais_a_ciudad[row['País']]:
-                # Corregir asignando una ciudad válida del país
-                df.at[idx, 'Ciudad'] = random.choice(pais_a_ciudad[row['País']])
-                inconsistencias.append(f"Fila {idx}: Corregida ciudad para país {row['País']}")
-    
-    return inconsistencias
+                edades[pos] = int(rng.integers(40, 51))
+        if ciudad_invalida[pos]:
+            ciudades[pos] = _elegir(rng, pais_a_ciudad[paises[pos]])
+
+    # Como en la validación fila a fila, una edad < 18 se compara sin ajustar
+    edades_referencia = np.where(edad_minima, df['Edad'].to_numpy(), edades)
+    exceso_experiencia = experiencias > (edades_referencia - 18)
+
+    if edad_minima.any() or edad_maxima.any():
+        df['Edad'] = edades
+    if exceso_experiencia.any():
+        df['Experiencia laboral'] = np.where(exceso_experiencia, np.maximum(0, edades_referencia - 18), experiencias)
+    if ciudad_invalida.any():
+        df['Ciudad'] = ciudades
+
+    filas = {
+        'edad_minima': df.index[edad_minima].to_numpy(),
+        'edad_maxima': df.index[edad_maxima].to_numpy(),
+        'experiencia': df.index[exceso_experiencia].to_numpy(),
+        'ciudad': df.index[ciudad_invalida].to_numpy(),
+    }
+    return {
+        'conteos': {regla: len(filas[regla]) for regla in REGLAS_COHERENCIA},
+        'filas': filas,
+    }
+
+
+def resumen_correcciones(correcciones):
+    return ", ".join(f"{regla}: {n}" for regla, n in correcciones['conteos'].items() if n)
+
 
 # Validar registros existentes
-inconsistencias_existentes = validar_coherencia(df_existente)
-if inconsistencias_existentes:
-    print(f"   [INFO] Corregidas {len(inconsistencias_existentes)} inconsistencias en registros existentes")
+correcciones_existentes = validar_coherencia(df_existente, flujo("formularios.validacion", 0))
+if any(correcciones_existentes['conteos'].values()):
+    print(f"   [INFO] Corregidas {sum(correcciones_existentes['conteos'].values())} inconsistencias en registros existentes ({resumen_correcciones(correcciones_existentes)})")
 
 # Validar registros nuevos
-inconsistencias_nuevos = validar_coherencia(df_nuevos)
-if inconsistencias_nuevos:
-    print(f"   [INFO] Corregidas {len(inconsistencias_nuevos)} inconsistencias en registros nuevos")
+correcciones_nuevos = validar_coherencia(df_nuevos, flujo("formularios.validacion", 1))
+if any(correcciones_nuevos['conteos'].values()):
+    print(f"   [INFO] Corregidas {sum(correcciones_nuevos['conteos'].values())} inconsistencias en registros nuevos ({resumen_correcciones(correcciones_nuevos)})")
 
 print(f"   [OK] Validación completada")
 
@@ -443,12 +549,20 @@ ids_unicos = df_final['id_usuario'].nunique()
 total_registros = len(df_final)
 assert ids_unicos == total_registros, f"Error: Hay IDs duplicados ({ids_unicos} únicos de {total_registros} totales)"
 
-# Ordenar por ID
-df_final = df_final.sort_values('id_usuario').reset_index(drop=True)
+# Ordenar por la parte numérica del ID (como texto, U10000 iría antes que U9999)
+df_final = df_final.sort_values('id_usuario', key=lambda s: s.str[1:].astype(int)).reset_index(drop=True)
 
 print(f"   [OK] Total registros: {len(df_final)}")
 print(f"   [OK] IDs únicos: {df_final['id_usuario'].nunique()}")
-print(f"   [OK] Rango de IDs: {df_final['id_usuario'].min()} a {df_final['id_usuario'].max()}")
+print(f"   [OK] Rango de IDs: {df_final['id_usuario'].iloc[0]} a {df_final['id_usuario'].iloc[-1]}")
+
+informe = verificar_formularios(df_final, n_esperado=len(df_existente) + N_NUEVOS, pais_a_ciudad=pais_a_ciudad)
+for error in informe['errores']:
+    print(f"   [ERROR] {error}")
+for adv in informe['advertencias']:
+    print(f"   [ADVERTENCIA] {adv}")
+if not informe['errores']:
+    print(f"   [OK] Verificación de reglas superada")
 
 # ============================================================================
 # 8. GUARDADO
@@ -1,302 +1,347 @@
 """
 Script de verificación completa del archivo generado
 Verifica todas las peculiaridades y requisitos configurados
-"""
-
-import pandas as pd
-import os
 
-# Obtener el directorio del script
-script_dir = os.path.dirname(os.path.abspath(__file__))
-archivo = os.path.join(script_dir, 'formularios_unificado.xlsx')
+Las reglas se evalúan como expresiones vectoriales sobre un único DataFrame
+cargado y devuelven un informe estructurado, de modo que el pipeline puede
+importarlo y verificar directamente los perfiles generados:
 
-print("=" * 70)
-print("VERIFICACIÓN COMPLETA DEL ARCHIVO GENERADO")
-print("=" * 70)
+    from verificar_completo import verificar_formularios
+    informe = verificar_formularios(df_final, n_esperado=len(df_final), pais_a_ciudad=pais_a_ciudad)
 
-# Leer el archivo
-try:
-    df = pd.read_excel(archivo)
-    print(f"\n[OK] Archivo leído correctamente: {archivo}")
-except Exception as e:
-    print(f"\n[ERROR] No se pudo leer el archivo: {e}")
-    exit(1)
+Uso:
+    python formularios/verificar_completo.py [archivo.xlsx] [--esperados 700]
+"""
 
-# ============================================================================
-# 1. VERIFICACIÓN BÁSICA
-# ============================================================================
+import argparse
+import os
+import sys
 
-print("\n" + "=" * 70)
-print("1. VERIFICACIÓN BÁSICA")
-print("=" * 70)
+import numpy as np
+import pandas as pd
 
-print(f"\nTotal de registros: {len(df)}")
-print(f"Total de columnas: {len(df.columns)}")
-print(f"Columnas: {list(df.columns)}")
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 
-# Verificar número de registros
-if len(df) != 700:
-    print(f"[ERROR] Número de registros incorrecto: {len(df)} (esperado: 700)")
-else:
-    print(f"[OK] Número de registros correcto: {len(df)}")
+from comun.cache_excel import leer_excel
 
-# Verificar columnas requeridas
-columnas_requeridas = ['id_usuario', 'Ciudad', 'País', 'Edad', 'Género', 
-                       'Área de interés para formarse', 'Titulación académica', 
-                       'Área de estudios', 'Experiencia laboral', 'Sector laboral', 
+COLUMNAS_REQUERIDAS = ['id_usuario', 'Ciudad', 'País', 'Edad', 'Género',
+                       'Área de interés para formarse', 'Titulación académica',
+                       'Área de estudios', 'Experiencia laboral', 'Sector laboral',
                        'Motivo de la formación']
-columnas_faltantes = [col for col in columnas_requeridas if col not in df.columns]
-if columnas_faltantes:
-    print(f"[ERROR] Columnas faltantes: {columnas_faltantes}")
-else:
-    print(f"[OK] Todas las columnas requeridas están presentes")
 
-# ============================================================================
-# 2. VERIFICACIÓN DE IDs
-# ============================================================================
-
-print("\n" + "=" * 70)
-print("2. VERIFICACIÓN DE IDs")
-print("=" * 70)
-
-ids_unicos = df['id_usuario'].nunique()
-total_ids = len(df)
-print(f"\nIDs únicos: {ids_unicos}")
-print(f"Total de registros: {total_ids}")
-
-if ids_unicos != total_ids:
-    print(f"[ERROR] Hay IDs duplicados: {total_ids - ids_unicos} duplicados")
-    duplicados = df[df.duplicated(subset=['id_usuario'], keep=False)]
-    print(f"Registros con IDs duplicados:\n{duplicados[['id_usuario']].head(10)}")
-else:
-    print(f"[OK] Todos los IDs son únicos")
-
-# Verificar formato de IDs
-print(f"\nPrimer ID: {df['id_usuario'].iloc[0]}")
-print(f"Último ID: {df['id_usuario'].iloc[-1]}")
-
-if df['id_usuario'].iloc[0] != 'U0001':
-    print(f"[ERROR] El primer ID no es U0001: {df['id_usuario'].iloc[0]}")
-else:
-    print(f"[OK] Primer ID correcto: U0001")
-
-if df['id_usuario'].iloc[-1] != 'U0700':
-    print(f"[ERROR] El último ID no es U0700: {df['id_usuario'].iloc[-1]}")
-else:
-    print(f"[OK] Último ID correcto: U0700")
-
-# Verificar formato de IDs
-formato_incorrecto = df[~df['id_usuario'].astype(str).str.match(r'^U\d{4}$')]
-if len(formato_incorrecto) > 0:
-    print(f"[ERROR] IDs con formato incorrecto: {len(formato_incorrecto)}")
-    print(formato_incorrecto[['id_usuario']].head())
-else:
-    print(f"[OK] Todos los IDs tienen el formato correcto (U####)")
-
-# ============================================================================
-# 3. VERIFICACIÓN DE EDADES
-# ============================================================================
+PATRON_ID = r'U\d{4,}'
+EDAD_MINIMA, EDAD_MAXIMA = 18, 50
+# Bandas de edad con su porcentaje objetivo: 18-30, 31-40, 41-50
+BANDAS_EDAD = [('18-30', 18, 30, 60), ('30-40', 31, 40, 30), ('40-50', 41, 50, 10)]
+TOLERANCIA = 5
 
-print("\n" + "=" * 70)
-print("3. VERIFICACIÓN DE EDADES")
-print("=" * 70)
-
-edad_min = df['Edad'].min()
-edad_max = df['Edad'].max()
-edad_media = df['Edad'].mean()
-
-print(f"\nEdad mínima: {edad_min}")
-print(f"Edad máxima: {edad_max}")
-print(f"Edad media: {edad_media:.2f}")
-
-# Verificar rango 18-50
-if edad_min < 18:
-    print(f"[ERROR] Hay edades menores a 18: mínimo {edad_min}")
-else:
-    print(f"[OK] Todas las edades son >= 18")
-
-if edad_max > 50:
-    print(f"[ERROR] Hay edades mayores a 50: máximo {edad_max}")
-else:
-    print(f"[OK] Todas las edades son <= 50")
-
-# Verificar distribución
-edad_18_30 = len(df[(df['Edad'] >= 18) & (df['Edad'] <= 30)])
-edad_30_40 = len(df[(df['Edad'] > 30) & (df['Edad'] <= 40)])
-edad_40_50 = len(df[(df['Edad'] > 40) & (df['Edad'] <= 50)])
-
-pct_18_30 = edad_18_30 / len(df) * 100
-pct_30_40 = edad_30_40 / len(df) * 100
-pct_40_50 = edad_40_50 / len(df) * 100
-
-print(f"\nDistribución de edades:")
-print(f"  18-30 años: {edad_18_30} ({pct_18_30:.1f}%) - Objetivo: 60%")
-print(f"  30-40 años: {edad_30_40} ({pct_30_40:.1f}%) - Objetivo: 30%")
-print(f"  40-50 años: {edad_40_50} ({pct_40_50:.1f}%) - Objetivo: 10%")
-
-# Verificar si está dentro de tolerancia (5%)
-tolerancia = 5
-if abs(pct_18_30 - 60) > tolerancia:
-    print(f"[ADVERTENCIA] Distribución 18-30 fuera de tolerancia: {pct_18_30:.1f}% (objetivo: 60% ± {tolerancia}%)")
-else:
-    print(f"[OK] Distribución 18-30 dentro de tolerancia")
-
-if abs(pct_30_40 - 30) > tolerancia:
-    print(f"[ADVERTENCIA] Distribución 30-40 fuera de tolerancia: {pct_30_40:.1f}% (objetivo: 30% ± {tolerancia}%)")
-else:
-    print(f"[OK] Distribución 30-40 dentro de tolerancia")
-
-if abs(pct_40_50 - 10) > tolerancia:
-    print(f"[ADVERTENCIA] Distribución 40-50 fuera de tolerancia: {pct_40_50:.1f}% (objetivo: 10% ± {tolerancia}%)")
-else:
-    print(f"[OK] Distribución 40-50 dentro de tolerancia")
+CORRELACIONES = [
+    ('País', 'Ciudad'),
+    ('Área de interés para formarse', 'Sector laboral'),
+    ('Titulación académica', 'Área de estudios'),
+]
 
-# ============================================================================
-# 4. VERIFICACIÓN DE COHERENCIA EDAD-EXPERIENCIA
-# ============================================================================
-
-print("\n" + "=" * 70)
-print("4. VERIFICACIÓN DE COHERENCIA EDAD-EXPERIENCIA")
-print("=" * 70)
 
-# Calcular experiencia máxima permitida (edad - 18)
-df['exp_max_permitida'] = df['Edad'] - 18
-df['coherencia_exp'] = df['Experiencia laboral'] <= df['exp_max_permitida']
+def _id_usuario(n):
+    return f"U{n:04d}"
 
-incoherentes = df[~df['coherencia_exp']]
 
-if len(incoherentes) > 0:
-    print(f"\n[ERROR] Encontrados {len(incoherentes)} registros con experiencia incoherente:")
-    print(incoherentes[['id_usuario', 'Edad', 'Experiencia laboral', 'exp_max_permitida']].head(10))
-else:
-    print(f"\n[OK] Todos los registros tienen coherencia edad-experiencia (100%)")
+def _regla(nivel, mascara, indice, mensaje):
+    """Resultado de una regla por filas: número de filas que fallan y sus etiquetas."""
+    filas = indice[mascara].to_numpy()
+    return {'nivel': nivel, 'n': len(filas), 'filas': filas, 'mensaje': mensaje}
 
-exp_min = df['Experiencia laboral'].min()
-exp_max = df['Experiencia laboral'].max()
-exp_media = df['Experiencia laboral'].mean()
-
-print(f"\nExperiencia laboral:")
-print(f"  Mínima: {exp_min} años")
-print(f"  Máxima: {exp_max} años")
-print(f"  Media: {exp_media:.2f} años")
 
 # ============================================================================
-# 5. VERIFICACIÓN DE VALORES NULOS
+# REGLAS
 # ============================================================================
 
-print("\n" + "=" * 70)
-print("5. VERIFICACIÓN DE VALORES NULOS")
-print("=" * 70)
-
-valores_nulos = df.isnull().sum()
-columnas_con_nulos = valores_nulos[valores_nulos > 0]
+def regla_ids(df):
+    ids = df['id_usuario'].astype(str)
+    return {
+        'ids_duplicados': _regla('error', ids.duplicated(keep=False).to_numpy(), df.index, "IDs duplicados"),
+        'formato_id': _regla('error', ~ids.str.fullmatch(PATRON_ID).to_numpy(dtype=bool),
+                             df.index, "IDs con formato incorrecto (U####)"),
+    }
+
+
+def regla_edades(df, edades):
+    fuera = (edades < EDAD_MINIMA) | (edades > EDAD_MAXIMA)
+    return {'rango_edad': _regla('error', fuera, df.index, f"Edades fuera del rango {EDAD_MINIMA}-{EDAD_MAXIMA}")}
+
+
+def regla_experiencia(df, edades):
+    incoherente = df['Experiencia laboral'].to_numpy() > (edades - EDAD_MINIMA)
+    return {'coherencia_experiencia': _regla('error', incoherente, df.index,
+                                             "Coherencia edad-experiencia: registros incoherentes")}
+
+
+def regla_pais_ciudad(df, pais_a_ciudad=None):
+    """
+    Con un mapeo País -> Ciudades, cada ciudad debe pertenecer a su país. Sin
+    mapeo, se marca toda ciudad que aparece en más de un país.
+    """
+    if pais_a_ciudad is not None:
+        pares_validos = pd.MultiIndex.from_tuples(
+            [(pais, ciudad) for pais, ciudades in pais_a_ciudad.items() for ciudad in ciudades]
+        )
+        incoherente = (
+            df['País'].isin(list(pais_a_ciudad)).to_numpy()
+            & ~pd.MultiIndex.from_arrays([df['País'], df['Ciudad']]).isin(pares_validos)
+        )
+    else:
+        paises_por_ciudad = df.groupby('Ciudad', sort=False)['País'].transform('nunique')
+        incoherente = (paises_por_ciudad > 1).to_numpy()
+    return {'pais_ciudad': _regla('error', incoherente, df.index, "Ciudades que no pertenecen a su país")}
+
+
+def distribucion_edades(edades):
+    """Conteos y porcentajes por banda de edad en una sola pasada (bincount)."""
+    limites = [b[2] for b in BANDAS_EDAD]
+    dentro = (edades >= EDAD_MINIMA) & (edades <= EDAD_MAXIMA)
+    conteos = np.bincount(np.searchsorted(limites, edades[dentro], side='left'), minlength=len(BANDAS_EDAD))
+    total = max(len(edades), 1)
+    return {
+        nombre: {'n': int(n), 'pct': n / total * 100, 'objetivo': objetivo}
+        for (nombre, _, _, objetivo), n in zip(BANDAS_EDAD, conteos)
+    }
 
-if len(columnas_con_nulos) > 0:
-    print(f"\n[ERROR] Columnas con valores nulos:")
-    for col, count in columnas_con_nulos.items():
-        print(f"  {col}: {count} valores nulos")
-else:
-    print(f"\n[OK] No hay valores nulos en ninguna columna")
 
 # ============================================================================
-# 6. VERIFICACIÓN DE CORRELACIONES LÓGICAS
+# MOTOR
 # ============================================================================
 
-print("\n" + "=" * 70)
-print("6. VERIFICACIÓN DE CORRELACIONES LÓGICAS")
-print("=" * 70)
+def verificar_formularios(df, n_esperado=700, pais_a_ciudad=None, tolerancia=TOLERANCIA):
+    """
+    Evalúa todas las reglas sobre `df` y devuelve un informe con las reglas
+    por filas (nivel, número de filas y etiquetas), las estadísticas, la
+    distribución de edades y las listas de errores y advertencias.
+    """
+    columnas_faltantes = [col for col in COLUMNAS_REQUERIDAS if col not in df.columns]
+    informe = {
+        'n_registros': len(df),
+        'n_esperado': n_esperado,
+        'columnas': list(df.columns),
+        'columnas_faltantes': columnas_faltantes,
+        'nulos': {col: int(n) for col, n in df.isnull().sum().items() if n > 0},
+        'reglas': {},
+        'errores': [],
+        'advertencias': [],
+    }
+    if columnas_faltantes:
+        informe['errores'].append(f"Columnas faltantes: {columnas_faltantes}")
+        return informe
+
+    edades = df['Edad'].to_numpy()
+    experiencias = df['Experiencia laboral'].to_numpy()
+    ids = df['id_usuario']
+
+    for resultado in (
+        regla_ids(df),
+        regla_edades(df, edades),
+        regla_experiencia(df, edades),
+        regla_pais_ciudad(df, pais_a_ciudad),
+    ):
+        informe['reglas'].update(resultado)
+
+    informe['ids'] = {
+        'unicos': int(ids.nunique()),
+        'primero': ids.iloc[0] if len(df) else None,
+        'ultimo': ids.iloc[-1] if len(df) else None,
+        'primero_esperado': _id_usuario(1),
+        'ultimo_esperado': _id_usuario(n_esperado),
+    }
+    informe['estadisticas'] = {
+        'Edad': {'min': edades.min(), 'max': edades.max(), 'media': edades.mean()},
+        'Experiencia laboral': {'min': experiencias.min(), 'max': experiencias.max(), 'media': experiencias.mean()},
+    }
+    informe['distribucion_edades'] = distribucion_edades(edades)
+
+    # Errores y advertencias
+    errores = informe['errores']
+    if len(df) != n_esperado:
+        errores.append(f"Número de registros incorrecto: {len(df)} (esperado: {n_esperado})")
+    if (informe['ids']['primero'], informe['ids']['ultimo']) != (informe['ids']['primero_esperado'],
+                                                                 informe['ids']['ultimo_esperado']):
+        errores.append("Rango de IDs incorrecto")
+    for regla in informe['reglas'].values():
+        if regla['n'] and regla['nivel'] == 'error':
+            errores.append(f"{regla['mensaje']}: {regla['n']}")
+    if informe['nulos']:
+        errores.append(f"Valores nulos en {len(informe['nulos'])} columnas")
+
+    for nombre, banda in informe['distribucion_edades'].items():
+        if abs(banda['pct'] - banda['objetivo']) > tolerancia:
+            informe['advertencias'].append(
+                f"Distribución {nombre}: {banda['pct']:.1f}% (objetivo: {banda['objetivo']}%)"
+            )
+    return informe
 
-# Verificar País-Ciudad (muestra de ejemplos)
-print("\nEjemplos de correlación País-Ciudad (primeros 10):")
-for idx, row in df.head(10).iterrows():
-    print(f"  {row['País']} -> {row['Ciudad']}")
-
-# Verificar Área de interés - Sector laboral
-print("\nEjemplos de correlación Área de interés - Sector laboral (primeros 10):")
-for idx, row in df.head(10).iterrows():
-    print(f"  {row['Área de interés para formarse']} -> {row['Sector laboral']}")
-
-# Verificar Titulación - Área de estudios
-print("\nEjemplos de correlación Titulación - Área de estudios (primeros 10):")
-for idx, row in df.head(10).iterrows():
-    print(f"  {row['Titulación académica']} -> {row['Área de estudios']}")
-
-# ============================================================================
-# 7. VERIFICACIÓN DE DISTRIBUCIONES
-# ============================================================================
-
-print("\n" + "=" * 70)
-print("7. VERIFICACIÓN DE DISTRIBUCIONES")
-print("=" * 70)
-
-print("\nDistribución de Género:")
-print(df['Género'].value_counts())
-
-print("\nDistribución de Países (top 5):")
-print(df['País'].value_counts().head())
-
-print("\nDistribución de Áreas de interés (top 5):")
-print(df['Área de interés para formarse'].value_counts().head())
 
 # ============================================================================
-# 8. RESUMEN FINAL
+# INFORME POR CONSOLA
 # ============================================================================
 
-print("\n" + "=" * 70)
-print("RESUMEN FINAL")
-print("=" * 70)
+def _titulo(texto):
+    print("\n" + "=" * 70)
+    print(texto)
+    print("=" * 70)
 
-errores = []
-advertencias = []
 
-# Resumen de verificaciones
-if len(df) != 700:
-    errores.append(f"Número de registros incorrecto: {len(df)} (esperado: 700)")
+def _mostrar_filas(df, regla, columnas):
+    if regla['n']:
+        print(df.loc[regla['filas'][:10], columnas].to_string())
 
-if df['id_usuario'].nunique() != len(df):
-    errores.append("Hay IDs duplicados")
 
-if df['id_usuario'].iloc[0] != 'U0001' or df['id_usuario'].iloc[-1] != 'U0700':
-    errores.append("Rango de IDs incorrecto")
+def imprimir_informe(informe, df):
+    _titulo("1. VERIFICACIÓN BÁSICA")
+    print(f"\nTotal de registros: {informe['n_registros']}")
+    print(f"Total de columnas: {len(informe['columnas'])}")
+    print(f"Columnas: {informe['columnas']}")
+    if informe['n_registros'] != informe['n_esperado']:
+        print(f"[ERROR] Número de registros incorrecto: {informe['n_registros']} (esperado: {informe['n_esperado']})")
+    else:
+        print(f"[OK] Número de registros correcto: {informe['n_registros']}")
+    if informe['columnas_faltantes']:
+        print(f"[ERROR] Columnas faltantes: {informe['columnas_faltantes']}")
+        return
+    print(f"[OK] Todas las columnas requeridas están presentes")
 
-if df['Edad'].min() < 18 or df['Edad'].max() > 50:
-    errores.append("Edades fuera del rango 18-50")
+    reglas = informe['reglas']
+    ids = informe['ids']
+    _titulo("2. VERIFICACIÓN DE IDs")
+    print(f"\nIDs únicos: {ids['unicos']}")
+    print(f"Total de registros: {informe['n_registros']}")
+    if reglas['ids_duplicados']['n']:
+        print(f"[ERROR] Hay IDs duplicados: {informe['n_registros'] - ids['unicos']} duplicados")
+        _mostrar_filas(df, reglas['ids_duplicados'], ['id_usuario'])
+    else:
+        print(f"[OK] Todos los IDs son únicos")
+    print(f"\nPrimer ID: {ids['primero']}")
+    print(f"Último ID: {ids['ultimo']}")
+    for clave, nombre in [('primero', 'primer'), ('ultimo', 'último')]:
+        if ids[clave] != ids[f'{clave}_esperado']:
+            print(f"[ERROR] El {nombre} ID no es {ids[f'{clave}_esperado']}: {ids[clave]}")
+        else:
+            print(f"[OK] {nombre.capitalize()} ID correcto: {ids[clave]}")
+    if reglas['formato_id']['n']:
+        print(f"[ERROR] IDs con formato incorrecto: {reglas['formato_id']['n']}")
+        _mostrar_filas(df, reglas['formato_id'], ['id_usuario'])
+    else:
+        print(f"[OK] Todos los IDs tienen el formato correcto (U####)")
+
+    edad = informe['estadisticas']['Edad']
+    _titulo("3. VERIFICACIÓN DE EDADES")
+    print(f"\nEdad mínima: {edad['min']}")
+    print(f"Edad máxima: {edad['max']}")
+    print(f"Edad media: {edad['media']:.2f}")
+    if reglas['rango_edad']['n']:
+        print(f"[ERROR] Hay {reglas['rango_edad']['n']} edades fuera del rango {EDAD_MINIMA}-{EDAD_MAXIMA}")
+    else:
+        print(f"[OK] Todas las edades están entre {EDAD_MINIMA} y {EDAD_MAXIMA}")
+    print(f"\nDistribución de edades:")
+    for nombre, banda in informe['distribucion_edades'].items():
+        print(f"  {nombre} años: {banda['n']} ({banda['pct']:.1f}%) - Objetivo: {banda['objetivo']}%")
+    for nombre, banda in informe['distribucion_edades'].items():
+        if abs(banda['pct'] - banda['objetivo']) > TOLERANCIA:
+            print(f"[ADVERTENCIA] Distribución {nombre} fuera de tolerancia: {banda['pct']:.1f}% "
+                  f"(objetivo: {banda['objetivo']}% ± {TOLERANCIA}%)")
+        else:
+            print(f"[OK] Distribución {nombre} dentro de tolerancia")
+
+    experiencia = informe['estadisticas']['Experiencia laboral']
+    _titulo("4. VERIFICACIÓN DE COHERENCIA EDAD-EXPERIENCIA")
+    if reglas['coherencia_experiencia']['n']:
+        print(f"\n[ERROR] Encontrados {reglas['coherencia_experiencia']['n']} registros con experiencia incoherente:")
+        _mostrar_filas(df, reglas['coherencia_experiencia'], ['id_usuario', 'Edad', 'Experiencia laboral'])
+    else:
+        print(f"\n[OK] Todos los registros tienen coherencia edad-experiencia (100%)")
+    print(f"\nExperiencia laboral:")
+    print(f"  Mínima: {experiencia['min']} años")
+    print(f"  Máxima: {experiencia['max']} años")
+    print(f"  Media: {experiencia['media']:.2f} años")
+
+    _titulo("5. VERIFICACIÓN DE VALORES NULOS")
+    if informe['nulos']:
+        print(f"\n[ERROR] Columnas con valores nulos:")
+        for col, count in informe['nulos'].items():
+            print(f"  {col}: {count} valores nulos")
+    else:
+        print(f"\n[OK] No hay valores nulos en ninguna columna")
+
+    _titulo("6. VERIFICACIÓN DE CORRELACIONES LÓGICAS")
+    if reglas['pais_ciudad']['n']:
+        print(f"\n[ERROR] {reglas['pais_ciudad']['n']} registros con ciudad que no pertenece a su país:")
+        _mostrar_filas(df, reglas['pais_ciudad'], ['id_usuario', 'País', 'Ciudad'])
+    else:
+        print(f"\n[OK] Todas las ciudades pertenecen a su país")
+    muestra = df.head(10)
+    for padre, hijo in CORRELACIONES:
+        print(f"\nEjemplos de correlación {padre} - {hijo} (primeros 10):")
+        print("\n".join(f"  {p} -> {h}" for p, h in zip(muestra[padre], muestra[hijo])))
+
+    _titulo("7. VERIFICACIÓN DE DISTRIBUCIONES")
+    print("\nDistribución de Género:")
+    print(df['Género'].value_counts())
+    print("\nDistribución de Países (top 5):")
+    print(df['País'].value_counts().head())
+    print("\nDistribución de Áreas de interés (top 5):")
+    print(df['Área de interés para formarse'].value_counts().head())
+
+
+def imprimir_resumen(informe):
+    _titulo("RESUMEN FINAL")
+    errores, advertencias = informe['errores'], informe['advertencias']
+    print(f"\nErrores encontrados: {len(errores)}")
+    if errores:
+        for error in errores:
+            print(f"  [ERROR] {error}")
+    else:
+        print("  [OK] No se encontraron errores")
+
+    print(f"\nAdvertencias: {len(advertencias)}")
+    if advertencias:
+        for adv in advertencias:
+            print(f"  [ADVERTENCIA] {adv}")
+    else:
+        print("  [OK] No hay advertencias")
 
-if len(incoherentes) > 0:
-    errores.append(f"Coherencia edad-experiencia: {len(incoherentes)} registros incoherentes")
+    print("\n" + "=" * 70)
+    if not errores:
+        print("[OK] VERIFICACIÓN COMPLETA: El archivo cumple con todos los requisitos")
+    else:
+        print("[ERROR] Se encontraron errores que deben corregirse")
+    print("=" * 70)
 
-if len(columnas_con_nulos) > 0:
-    errores.append(f"Valores nulos en {len(columnas_con_nulos)} columnas")
 
-if abs(pct_18_30 - 60) > tolerancia:
-    advertencias.append(f"Distribución 18-30: {pct_18_30:.1f}% (objetivo: 60%)")
+def main(archivo, n_esperado=700):
+    print("=" * 70)
+    print("VERIFICACIÓN COMPLETA DEL ARCHIVO GENERADO")
+    print("=" * 70)
 
-if abs(pct_30_40 - 30) > tolerancia:
-    advertencias.append(f"Distribución 30-40: {pct_30_40:.1f}% (objetivo: 30%)")
+    # Leer el archivo
+    try:
+        df = leer_excel(archivo)
+        print(f"\n[OK] Archivo leído correctamente: {archivo}")
+    except Exception as e:
+        print(f"\n[ERROR] No se pudo leer el archivo: {e}")
+        sys.exit(1)
 
-if abs(pct_40_50 - 10) > tolerancia:
-    advertencias.append(f"Distribución 40-50: {pct_40_50:.1f}% (objetivo: 10%)")
+    informe = verificar_formularios(df, n_esperado=n_esperado)
+    imprimir_informe(informe, df)
+    imprimir_resumen(informe)
+    return informe
 
-print(f"\nErrores encontrados: {len(errores)}")
-if errores:
-    for error in errores:
-        print(f"  [ERROR] {error}")
-else:
-    print("  [OK] No se encontraron errores")
 
-print(f"\nAdvertencias: {len(advertencias)}")
-if advertencias:
-    for adv in advertencias:
-        print(f"  [ADVERTENCIA] {adv}")
-else:
-    print("  [OK] No hay advertencias")
+if __name__ == "__main__":
+    # Obtener el directorio del script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
 
-if len(errores) == 0:
-    print("\n" + "=" * 70)
-    print("[OK] VERIFICACIÓN COMPLETA: El archivo cumple con todos los requisitos")
-    print("=" * 70)
-else:
-    print("\n" + "=" * 70)
-    print("[ERROR] Se encontraron errores que deben corregirse")
-    print("=" * 70)
+    parser = argparse.ArgumentParser(description="Verificación completa del archivo de formularios.")
+    parser.add_argument("archivo", nargs="?", default=os.path.join(script_dir, 'formularios_unificado.xlsx'))
+    parser.add_argument("--esperados", type=int, default=700, help="Número de registros esperado")
+    args = parser.parse_args()
 
+    main(args.archivo, n_esperado=args.esperados)
@@ -1,6 +1,15 @@
+import os
+import sys
+
 import pandas as pd
 
-df = pd.read_excel('formularios_unificado.xlsx')
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from comun.cache_excel import leer_excel
+
+df = leer_excel('formularios_unificado.xlsx')
 
 print('=' * 70)
 print('VERIFICACIÓN DEL ARCHIVO GENERADO')
@@ -11,17 +11,27 @@ Basado en Google ADK y arquitectura de agentes con tools
 # ============================================================================
 
 import os
-import io
 from dotenv import load_dotenv
 import pandas as pd
 from google.adk.agents import Agent
 from google.adk.models.google_llm import Gemini
 from google.adk.tools.function_tool import FunctionTool
 from google.genai import types
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 import random
 
+try:
+    from .agregados import AlmacenFeedbacks
+    from .busqueda import IndiceCursos, clave_curso
+    from .datos import Instantanea, descargar_drive, descargar_url, huella_origen, leer_archivo, leer_tabla
+    from .informes import CacheInformes, clave_informe
+    from .modelo import PoolModelo
+except ImportError:  # ejecutado como script: python immune_agent/agent.py
+    from agregados import AlmacenFeedbacks
+    from busqueda import IndiceCursos, clave_curso
+    from datos import Instantanea, descargar_drive, descargar_url, huella_origen, leer_archivo, leer_tabla
+    from informes import CacheInformes, clave_informe
+    from modelo import PoolModelo
+
 # ============================================================================
 # CONFIGURACIÓN
 # ============================================================================
@@ -53,11 +63,17 @@ API_KEY = GOOGLE_API_KEY
 # CARGA DE DATOS
 # ============================================================================
 
-# 1) Cursos
+# Los datos se cargan de forma perezosa desde instantáneas en disco con TTL y
+# se refrescan en segundo plano (ver datos.py): importar el agente no espera a la red.
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# 1) Cursos
 default_cursos_path = os.path.join(project_root, "cursos_immune", "cursos_immune_agente.xlsx")
 cursos_path = os.environ.get("COURSES_PATH", default_cursos_path)
-cursos_df = None
+cursos_url = os.environ.get(
+    "CURSOS_URL",
+    "https://docs.google.com/spreadsheets/d/1oegyMA1i4nxlA3QAfdNy9zO__1Xd-ZmP/export?format=csv",
+)
 
 def _load_cursos(path: str):
     try:
@@ -65,61 +81,69 @@ def _load_cursos(path: str):
     except Exception:
         return pd.read_csv(path)
 
-try:
-    print("🔄 Intentando descargar cursos de Google Sheet...")
-    cursos_url = "https://docs.google.com/spreadsheets/d/1oegyMA1i4nxlA3QAfdNy9zO__1Xd-ZmP/export?format=csv"
-    cursos_df = pd.read_csv(cursos_url)
-    print(f"✅ Cursos cargados desde Google Sheet: {len(cursos_df)} registros")
-except Exception as e_sheet:
-    print(f"⚠️ Falló carga de Google Sheet: {e_sheet}")
-    if cursos_path and os.path.exists(cursos_path):
-        try:
-            cursos_df = _load_cursos(cursos_path)
-            print(f"✅ Cursos cargados desde archivo local (fallback): {len(cursos_df)} registros")
-        except Exception as e_local:
-             print(f"⚠️ Falló carga local: {e_local}")
+def _descargar_cursos():
+    return pd.read_csv(descargar_url(cursos_url))
 
-if cursos_df is None:
-    print("⚠️ No se pudieron cargar cursos. Usando DataFrame vacío.")
-    cursos_df = pd.DataFrame(columns=["id_curso", "nombre", "tipo_de_programa", "sector", "modalidad", "inicio", "precio"])
+def _cursos_locales():
+    if cursos_path and os.path.exists(cursos_path):
+        return _load_cursos(cursos_path)
+    return None
+
+cursos = Instantanea(
+    "cursos",
+    descargar=_descargar_cursos,
+    respaldo=_cursos_locales,
+    columnas=["id_curso", "nombre", "tipo_de_programa", "sector", "modalidad", "inicio", "precio"],
+    derivar=IndiceCursos,
+    origen=lambda: huella_origen(cursos_url),
+)
 
 # 2) Feedbacks
-feedbacks_df = None
 default_feedbacks_path = os.path.join(project_root, "feedbacks", "Feedbacks.csv")
 feedbacks_path = os.environ.get("FEEDBACKS_PATH", default_feedbacks_path)
+feedbacks_url = os.environ.get("FEEDBACKS_URL")
 file_id = os.environ.get("FILE_ID_FEEDBACKS", "1K0bkoBxOsQW_CF8w2kvWOZZTTwVx00cD")
 
-def _load_feedbacks_from_buffer(buf: io.BytesIO):
-    buf.seek(0)
-    try:
-        return pd.read_csv(buf, sep=None, engine="python")
-    except Exception:
-        buf.seek(0)
-        try:
-            return pd.read_csv(buf, sep=";", engine="python")
-        except Exception:
-            buf.seek(0)
-            return pd.read_excel(buf)
-
-if feedbacks_path and os.path.exists(feedbacks_path):
-    with open(feedbacks_path, "rb") as fh_local:
-        buf = io.BytesIO(fh_local.read())
-    feedbacks_df = _load_feedbacks_from_buffer(buf)
-    print(f"✅ Feedbacks cargados desde FEEDBACKS_PATH: {len(feedbacks_df)} registros")
-else:
-    try:
-        drive_service = build("drive", "v3")
-        req = drive_service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, req)
-        done = False
-        while not done:
-            _, done = downloader.next_chunk()
-        feedbacks_df = _load_feedbacks_from_buffer(fh)
-        print(f"✅ Feedbacks cargados desde Drive: {len(feedbacks_df)} registros")
-    except Exception as e:
-        print("⚠️ No se pudo cargar feedbacks; usando DataFrame vacío.")
-        feedbacks_df = pd.DataFrame(columns=["Id_curso", "fecha", "comentarios"])
+def _descargar_feedbacks():
+    if feedbacks_url:
+        return leer_tabla(descargar_url(feedbacks_url))
+    if feedbacks_path and os.path.exists(feedbacks_path):
+        return leer_archivo(feedbacks_path)
+    return leer_tabla(descargar_drive(file_id))
+
+def _origen_feedbacks():
+    # Mismo orden que _descargar_feedbacks; el archivo local cuenta con su tamaño y fecha
+    if feedbacks_url:
+        return huella_origen(feedbacks_url)
+    if feedbacks_path and os.path.exists(feedbacks_path):
+        return huella_origen(feedbacks_path)
+    return f"drive:{file_id}"
+
+def _feedbacks_locales():
+    if feedbacks_path and os.path.exists(feedbacks_path):
+        return leer_archivo(feedbacks_path)
+    return None
+
+feedbacks = Instantanea(
+    "feedbacks",
+    descargar=_descargar_feedbacks,
+    respaldo=_feedbacks_locales,
+    columnas=["Id_curso", "fecha", "comentarios"],
+    derivar=AlmacenFeedbacks,
+    origen=_origen_feedbacks,
+)
+
+for _fuente in (cursos, feedbacks):
+    _fuente.iniciar()
+
+
+def __getattr__(name):
+    """Compatibilidad: `cursos_df` y `feedbacks_df` devuelven la instantánea vigente."""
+    if name == "cursos_df":
+        return cursos.obtener()
+    if name == "feedbacks_df":
+        return feedbacks.obtener()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ============================================================================
 # CUSTOM TOOLS
@@ -128,7 +152,7 @@ else:
 def get_unique_values(column_name: str):
     """Devuelve los valores únicos de una columna del dataframe de cursos."""
     print(f"🔎 DEBUG: get_unique_values llamado para '{column_name}'")
-    df = cursos_df
+    df = cursos.obtener()
     if df is None or df.empty:
         return "Error: No se han cargado datos de cursos."
         
@@ -142,79 +166,96 @@ def get_unique_values(column_name: str):
 unique_tool = FunctionTool(get_unique_values)
 
 def filtrar_cursos(query: str = "", modalidad: str = "", precio_max: float = None, top: int = 10):
-    """Filtra cursos según criterios de búsqueda."""
-    df = cursos_df
+    """Filtra cursos según criterios de búsqueda (sin distinguir mayúsculas ni tildes)."""
+    df, indice = cursos.obtener_con_derivado()
+    if indice is None:
+        indice = IndiceCursos(df)
     cols = [
         "id_curso", "nombre", "tipo_de_programa", "sector",
         "modalidad", "inicio", "precio", "duracion",
         "salidas_profesionales", "financiacion"
     ]
-    mask = True
-    if query:
-        mask &= (
-            df["nombre"].astype(str).str.contains(query, case=False, na=False)
-            | df["tipo_de_programa"].astype(str).str.contains(query, case=False, na=False)
-            | df["sector"].astype(str).str.contains(query, case=False, na=False)
-        )
-    if modalidad:
-        mask &= df["modalidad"].astype(str).str.contains(modalidad, case=False, na=False)
-    if precio_max is not None and "precio" in df.columns:
-        mask &= pd.to_numeric(df["precio"], errors="coerce") <= precio_max
-
-    result = df.loc[mask, cols].head(top)
+    posiciones = indice.buscar(query=query, modalidad=modalidad, precio_max=precio_max, top=top)
+    result = df.iloc[posiciones][cols]
     if result.empty:
         return [{"resultado": "sin resultados"}]
     return result.to_dict(orient="records")
 
 cursos_tool = FunctionTool(filtrar_cursos)
 
-def analyze_course_logic(course_name: str):
+MODELO_ANALISTA = "gemini-2.5-flash"
+
+PLANTILLA_INFORME = """
+    Eres un experto analista. Analiza los datos y comentarios del curso '{course_name}':
+    
+    {metrics_text}
+    
+    COMENTARIOS (Muestra):
+    {comments_text}
+    
+    Genera un reporte estructurado así:
+    ### 📊 Métricas Clave del Curso
+    (Presenta aquí los datos cuantitativos calculados de forma clara)
+    
+    ### Fortalezas
+    ### Debilidades
+    ### Sugerencias de Mejora
     """
-    Recibe el nombre exacto de un curso, busca sus feedbacks y genera un análisis de marketing.
+
+def _crear_cliente_gemini():
+    from google import genai
+    return genai.Client(api_key=API_KEY)
+
+# Un cliente por proceso, llamadas asíncronas acotadas (ver modelo.py).
+# En pruebas: pool_modelo.usar_cliente(ClienteFalso())
+pool_modelo = PoolModelo(_crear_cliente_gemini)
+
+# Informes por (curso, versión de sus feedbacks, plantilla, modelo), ver informes.py
+cache_informes = CacheInformes()
+
+def preparar_informe(course_name: str, course_id=None):
     """
-    # 0. Buscar Id_curso
-    course_id = None
-    try:
-        matches = cursos_df[cursos_df["nombre"].astype(str).str.contains(course_name, case=False, na=False)]
-        if not matches.empty:
-            course_id = matches.iloc[0]["id_curso"]
-    except Exception:
-        pass
+    Clave de caché y prompt del informe de un curso: (clave, prompt), o
+    (None, mensaje) si no hay feedbacks. Lo usan la tool y precalcular_informes.py.
+    """
+    # 0. Buscar Id_curso (nombre exacto o, si no, primer curso cuyo nombre contiene course_name)
+    if course_id is None:
+        cursos_df, indice = cursos.obtener_con_derivado()
+        try:
+            if indice is None:
+                indice = IndiceCursos(cursos_df)
+            fila = indice.buscar_curso(course_name)
+            if fila is not None:
+                course_id = cursos_df.iloc[fila]["id_curso"]
+        except Exception:
+            pass
 
-    # 1. Filtrar feedbacks
-    df_fb = feedbacks_df
+    # 1. Feedbacks del curso (agrupados por Id_curso exacto al cargar la instantánea)
+    df_fb, almacen = feedbacks.obtener_con_derivado()
     if df_fb is None or df_fb.empty:
-        return "No hay datos de feedback disponibles."
+        return None, "No hay datos de feedback disponibles."
+    if almacen is None:
+        almacen = AlmacenFeedbacks(df_fb)
 
-    if course_id:
-        mask = df_fb["Id_curso"].astype(str).str.contains(str(course_id), case=False, na=False)
-    else:
-        mask = df_fb["Id_curso"].astype(str).str.contains(course_name, case=False, na=False)
+    clave = course_id if course_id else course_name
+    resumen = almacen.resumen(clave)
 
-    course_feedbacks = df_fb[mask]
-    
-    if course_feedbacks.empty:
+    if resumen is None:
         if course_id:
-            return f"No se encontraron feedbacks para el curso '{course_name}' (Id_curso={course_id})."
-        return f"No se encontraron feedbacks para el curso '{course_name}'."
+            return None, f"No se encontraron feedbacks para el curso '{course_name}' (Id_curso={course_id})."
+        return None, f"No se encontraron feedbacks para el curso '{course_name}'."
     
     # 2. Muestra comentarios
     sample_size = 30
-    comments = course_feedbacks["comentarios"].dropna().astype(str).tolist()
-    comments_sample = comments[:sample_size]
+    comments_sample = almacen.comentarios(clave, limite=sample_size)
     comments_text = "\n- ".join(comments_sample)
     
-    # 2.1 Calcular Métricas Específicas del Curso
+    # 2.1 Métricas Específicas del Curso (precalculadas)
     try:
-        cols_metrics = ["satisfaccion_general", "recomendaria_profesor", "contenidos_adecuados", "dominio_materia"]
-        for col in cols_metrics:
-            if col in course_feedbacks.columns:
-                course_feedbacks.loc[:, col] = pd.to_numeric(course_feedbacks[col], errors='coerce')
-        
-        avg_sat = course_feedbacks["satisfaccion_general"].mean()
-        avg_prof = course_feedbacks["recomendaria_profesor"].mean()
-        avg_cont = course_feedbacks["contenidos_adecuados"].mean()
-        total_fb = len(course_feedbacks)
+        avg_sat = resumen["satisfaccion_general"]
+        avg_prof = resumen["recomendaria_profesor"]
+        avg_cont = resumen["contenidos_adecuados"]
+        total_fb = resumen["total"]
         
         metrics_text = f"""
         DATOS CUANTITATIVOS (Media sobre 5):
@@ -226,35 +267,53 @@ def analyze_course_logic(course_name: str):
     except Exception as e:
         metrics_text = "No se pudieron calcular las métricas específicas."
 
-    # 3. Generar análisis con Gemini
-    from google import genai
-    prompt = f"""
-    Eres un experto analista. Analiza los datos y comentarios del curso '{course_name}':
-    
-    {metrics_text}
-    
-    COMENTARIOS (Muestra):
-    {comments_text}
-    
-    Genera un reporte estructurado así:
-    ### 📊 Métricas Clave del Curso
-    (Presenta aquí los datos cuantitativos calculados de forma clara)
-    
-    ### Fortalezas
-    ### Debilidades
-    ### Sugerencias de Mejora
+    # 3. Prompt y clave de caché (cambia si cambian los feedbacks del curso)
+    prompt = PLANTILLA_INFORME.format(
+        course_name=course_name, metrics_text=metrics_text, comments_text=comments_text
+    )
+    clave_cache = clave_informe(clave_curso(clave), almacen.version(clave), PLANTILLA_INFORME, MODELO_ANALISTA)
+    return clave_cache, prompt
+
+async def analyze_course_logic(course_name: str):
     """
-    
+    Recibe el nombre exacto de un curso, busca sus feedbacks y genera un análisis de marketing.
+    """
+    clave_cache, prompt = preparar_informe(course_name)
+    if clave_cache is None:
+        return prompt
+
+    # Generar análisis con Gemini, o servir el ya generado (o precalculado) para
+    # la misma versión de feedbacks
+    def generar():
+        return pool_modelo.generar(prompt, MODELO_ANALISTA)
+
     try:
-        client = genai.Client(api_key=API_KEY)
-        response = client.models.generate_content(
-            model="gemini-2.5-flash", 
-            contents=prompt
-        )
-        return response.text
+        return await cache_informes.obtener_async(clave_cache, generar)
     except Exception as e:
         return f"Error generando análisis: {e}"
 
+async def analizar_curso_stream(course_name: str):
+    """
+    Como `analyze_course_logic`, pero devuelve el informe por fragmentos según
+    los genera el modelo (o de una vez si ya estaba en caché).
+    """
+    clave_cache, prompt = preparar_informe(course_name)
+    if clave_cache is None:
+        yield prompt
+        return
+
+    def generar_stream():
+        return pool_modelo.generar_stream(prompt, MODELO_ANALISTA)
+
+    emitido = False
+    try:
+        async for fragmento in cache_informes.obtener_stream(clave_cache, generar_stream):
+            emitido = True
+            yield fragmento
+    except Exception as e:
+        prefijo = "\n\n" if emitido else ""
+        yield f"{prefijo}Error generando análisis: {e}"
+
 analysis_tool = FunctionTool(analyze_course_logic)
 
 # NUEVA TOOL: Análisis de Métricas
@@ -266,20 +325,19 @@ def analyze_metrics_logic(analysis_type: str = "general"):
     - 'ranking': Ranking de los 3 cursos mejor y peor valorados.
     - 'profesorado': Datos específicos sobre la calidad docente.
     """
-    df = feedbacks_df
+    # Métricas y ranking materializados una vez por instantánea (ver agregados.py);
+    # el DataFrame compartido no se modifica.
+    df, almacen = feedbacks.obtener_con_derivado()
     if df is None or df.empty:
         return "No hay datos de feedback cargados para calcular métricas."
-    
-    # Asegurar numéricos
-    cols_to_numeric = ["satisfaccion_general", "recomendaria_profesor"]
-    for col in cols_to_numeric:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if almacen is None:
+        almacen = AlmacenFeedbacks(df)
+    medias = almacen.medias_globales
 
     if analysis_type == "general":
-        total = len(df)
-        sat_mean = df["satisfaccion_general"].mean()
-        prof_mean = df["recomendaria_profesor"].mean() if "recomendaria_profesor" in df.columns else 0
+        total = almacen.total
+        sat_mean = medias.get("satisfaccion_general", float("nan"))
+        prof_mean = medias.get("recomendaria_profesor", 0)
         
         return f"""### 📊 Resumen de Métricas Globales
 - **Total de Feedbacks analizados**: {total}
@@ -288,39 +346,35 @@ def analyze_metrics_logic(analysis_type: str = "general"):
 """
 
     elif analysis_type == "ranking":
-        if "Id_curso" not in df.columns:
+        if not almacen.por_curso:
             return "No se encuentra columna 'Id_curso' en los feedbacks."
             
-        # Agrupar por curso y calcular media
-        ranking = df.groupby("Id_curso")["satisfaccion_general"].mean().sort_values(ascending=False)
-        
-        # Mapear IDs a Nombres usando cursos_df
-        course_map = {}
-        if cursos_df is not None and not cursos_df.empty:
-            # Detectar columna ID en cursos_df (puede ser id_curso o Id_curso)
-            id_col = "id_curso" if "id_curso" in cursos_df.columns else "Id_curso"
-            if id_col in cursos_df.columns and "nombre" in cursos_df.columns:
-                course_map = pd.Series(cursos_df["nombre"].values, index=cursos_df[id_col].astype(str)).to_dict()
+        # Mapear IDs a Nombres con el índice de la instantánea de cursos
+        cursos_df, indice = cursos.obtener_con_derivado()
+        if indice is None and cursos_df is not None:
+            indice = IndiceCursos(cursos_df)
+
+        def nombre_curso(cid):
+            defecto = f"ID: {cid}"
+            return indice.nombre(cid, defecto) if indice is not None else defecto
         
-        top_3 = ranking.head(3)
-        bottom_3 = ranking.tail(3)
+        top_3 = almacen.ranking[:3]
+        bottom_3 = almacen.ranking[-3:]
         
         res = "### 🏆 Ranking de Cursos (Satisfacción)\n\n**TOP 3 MEJORES VALORADOS:**\n"
-        for cid, score in top_3.items():
-            name = course_map.get(str(cid), f"ID: {cid}")
-            res += f"1. **{name}**: {score:.2f}/5\n"
+        for cid, score in top_3:
+            res += f"1. **{nombre_curso(cid)}**: {score:.2f}/5\n"
             
         res += "\n**TOP 3 MENOS VALORADOS:**\n"
-        for cid, score in bottom_3.items():
-            name = course_map.get(str(cid), f"ID: {cid}")
-            res += f"1. **{name}**: {score:.2f}/5\n"
+        for cid, score in bottom_3:
+            res += f"1. **{nombre_curso(cid)}**: {score:.2f}/5\n"
             
         return res
 
     elif analysis_type == "profesorado":
-         if "recomendaria_profesor" not in df.columns:
+         if "recomendaria_profesor" not in medias:
              return "No hay datos de recomendación de profesor."
-         prof_mean = df["recomendaria_profesor"].mean()
+         prof_mean = medias["recomendaria_profesor"]
          return f"### 👨‍🏫 Calidad Docente\nLa valoración media del profesorado es de **{prof_mean:.2f}/5**."
          
     return "Opción de métricas no reconocida. Prueba 'general', 'ranking' o 'profesorado'."
@@ -345,10 +399,20 @@ fallback_tool = FunctionTool(get_random_fallback)
 # DEFINICIÓN DE AGENTES
 # ============================================================================
 
-# Tool Wrapper para análisis
-def consultar_analista(course_name: str):
-    print(f"🔄 Transfiriendo consulta al Analista para: {course_name}")
-    return analyze_course_logic(course_name)
+# Tool Wrapper para análisis. Con AGENTE_STREAMING_ANALISTA=1 la tool es un
+# generador asíncrono y ADK reenvía cada fragmento del informe al chat según
+# llega (streaming tools, solo en sesiones live: runner.run_live).
+STREAMING_ANALISTA = os.environ.get("AGENTE_STREAMING_ANALISTA", "0") == "1"
+
+if STREAMING_ANALISTA:
+    async def consultar_analista(course_name: str):
+        print(f"🔄 Transfiriendo consulta al Analista para: {course_name}")
+        async for fragmento in analizar_curso_stream(course_name):
+            yield fragmento
+else:
+    async def consultar_analista(course_name: str):
+        print(f"🔄 Transfiriendo consulta al Analista para: {course_name}")
+        return await analyze_course_logic(course_name)
 
 consultar_analista_tool = FunctionTool(consultar_analista)
 
@@ -0,0 +1,132 @@
+"""
+Feedbacks agrupados por curso para `analyze_course_logic`.
+
+Se construye una vez por instantánea de feedbacks:
+  - las filas se reordenan (de forma estable) por `Id_curso`, de modo que los
+    feedbacks de cada curso quedan en un rango contiguo [inicio, fin)
+  - las columnas de métricas se convierten a número una sola vez
+  - las medias y el número de opiniones de cada curso salen de un único groupby
+  - las medias globales y el ranking de cursos por satisfacción quedan
+    materializados para `analyze_metrics_logic`
+  - cada curso tiene una versión (hash de sus filas) con la que se invalidan
+    los informes cacheados cuando cambian sus feedbacks
+
+Una consulta es una búsqueda en diccionario más un slice. Nada de esto
+modifica el DataFrame de la instantánea, que se comparte entre sesiones.
+
+Uso:
+    almacen = AlmacenFeedbacks(feedbacks_df)
+    resumen = almacen.resumen("C0001")
+    comentarios = almacen.comentarios("C0001", limite=30)
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .busqueda import clave_curso
+except ImportError:  # ejecutado como script: python immune_agent/agent.py
+    from busqueda import clave_curso
+
+COLUMNA_CURSO = "Id_curso"
+COLUMNAS_METRICAS = ["satisfaccion_general", "recomendaria_profesor", "contenidos_adecuados", "dominio_materia"]
+METRICA_RANKING = "satisfaccion_general"
+
+
+class AlmacenFeedbacks:
+    def __init__(self, df):
+        self.metricas = [c for c in COLUMNAS_METRICAS if c in df.columns]
+        self.total = len(df)
+        self.por_curso = COLUMNA_CURSO in df.columns
+        self.medias_globales = {
+            c: float(pd.to_numeric(df[c], errors="coerce").mean()) for c in self.metricas
+        }
+        self.rangos = {}
+        self.medias = pd.DataFrame(columns=self.metricas)
+        self.conteos = {}
+        self.resumenes = {}
+        self.ranking = []
+        self.versiones = {}
+
+        if not self.por_curso or df.empty:
+            self.df = df.iloc[:0]
+            self.valores = {c: np.array([], dtype=float) for c in self.metricas}
+            self.textos = np.array([], dtype=object)
+            return
+
+        claves = df[COLUMNA_CURSO].map(clave_curso).to_numpy(dtype=object)
+        codigos, unicos = pd.factorize(claves, sort=True)
+        orden = np.argsort(codigos, kind="stable")
+        codigos = codigos[orden]
+
+        self.df = df.iloc[orden].reset_index(drop=True)
+        self.valores = {
+            c: pd.to_numeric(self.df[c], errors="coerce").to_numpy(dtype=float)
+            for c in self.metricas
+        }
+        if "comentarios" in self.df.columns:
+            self.textos = self.df["comentarios"].to_numpy(dtype=object)
+        else:
+            self.textos = np.full(len(self.df), None, dtype=object)
+
+        limites = np.searchsorted(codigos, np.arange(len(unicos) + 1))
+        self.rangos = {
+            clave: (int(limites[i]), int(limites[i + 1]))
+            for i, clave in enumerate(unicos)
+        }
+
+        # Versión de cada curso: hash de los hashes de sus filas
+        try:
+            hashes_filas = pd.util.hash_pandas_object(self.df, index=False).to_numpy()
+        except TypeError:
+            hashes_filas = pd.util.hash_pandas_object(self.df.astype(str), index=False).to_numpy()
+        self.versiones = {
+            clave: hashlib.sha256(hashes_filas[inicio:fin].tobytes()).hexdigest()[:16]
+            for clave, (inicio, fin) in self.rangos.items()
+        }
+
+        # Medias y conteos de todos los cursos en un único groupby
+        agregado = pd.DataFrame(self.valores, index=pd.RangeIndex(len(codigos))).groupby(codigos)
+        self.medias = agregado.mean().set_axis(unicos, axis=0)
+        self.conteos = dict(zip(unicos, agregado.size().to_numpy().tolist()))
+        self.resumenes = {
+            clave: {**medias, "total": self.conteos[clave]}
+            for clave, medias in self.medias.to_dict(orient="index").items()
+        }
+
+        # Ranking por satisfacción media (descendente, sin media al final) con el
+        # Id_curso tal como aparece en la primera fila de cada curso
+        if METRICA_RANKING in self.metricas:
+            ids = self.df[COLUMNA_CURSO].to_numpy(dtype=object)[limites[:-1]]
+            medias_ranking = self.medias[METRICA_RANKING].to_numpy(dtype=float)
+            orden_ranking = np.argsort(-medias_ranking, kind="stable")
+            self.ranking = [(ids[i], float(medias_ranking[i])) for i in orden_ranking]
+
+    def rango(self, id_curso):
+        """(inicio, fin) de las filas del curso, o None si no tiene feedbacks."""
+        return self.rangos.get(clave_curso(id_curso))
+
+    def version(self, id_curso):
+        """Hash de los feedbacks del curso (cambia si cambia cualquiera de sus filas)."""
+        return self.versiones.get(clave_curso(id_curso))
+
+    def comentarios(self, id_curso, limite=None):
+        """Primeros `limite` comentarios no vacíos del curso, en el orden original."""
+        rango = self.rango(id_curso)
+        if rango is None:
+            return []
+        resultado = []
+        for texto in self.textos[rango[0]:rango[1]]:
+            if texto is None or (not isinstance(texto, str) and pd.isna(texto)):
+                continue
+            resultado.append(str(texto))
+            if limite is not None and len(resultado) >= limite:
+                break
+        return resultado
+
+    def resumen(self, id_curso):
+        """{métrica: media, ..., 'total': opiniones} del curso, o None si no tiene feedbacks."""
+        resumen = self.resumenes.get(clave_curso(id_curso))
+        return dict(resumen) if resumen is not None else None
@@ -0,0 +1,231 @@
+"""
+Índice de búsqueda del catálogo de cursos para `filtrar_cursos`.
+
+Se construye una vez por instantánea de cursos y contiene:
+  - por columna de texto, el texto plegado (minúsculas y sin tildes), también
+    unido en una sola cadena, y postings de trigramas (arrays ordenados de
+    filas), de modo que "formacion" encuentra "Formación"
+  - el precio ya convertido a número
+  - un bitset (bits empaquetados de numpy) por modalidad
+  - el mapa id_curso -> nombre que usan los rankings y el mapa nombre plegado
+    -> fila con el que se resuelve el curso de un informe
+
+Una consulta de 3 o más caracteres interseca postings empezando por el más
+corto y solo verifica, en orden de fila, los candidatos necesarios hasta reunir
+`top` resultados. Las de 1 o 2 caracteres recorren el texto unido con
+`str.find` en orden de fila y paran al reunir `top` (si no aparecen en la
+columna se descartan sin recorrerla). Las columnas se combinan en orden de
+fila sin calcular su unión completa.
+
+Uso:
+    indice = IndiceCursos(cursos_df)
+    posiciones = indice.buscar(query="formacion", modalidad="online", precio_max=5000, top=10)
+    fila = indice.buscar_curso("ciberseguridad")
+"""
+
+import bisect
+import heapq
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_TEXTO = ["nombre", "tipo_de_programa", "sector"]
+_FIN_FILA = "\x00"  # separa las filas en el texto unido de cada columna
+
+
+def plegar(texto):
+    """Minúsculas y sin marcas diacríticas ("Formación" -> "formacion")."""
+    if not isinstance(texto, str):
+        return "" if texto is None or pd.isna(texto) else str(texto).casefold()
+    descompuesto = unicodedata.normalize("NFD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def clave_curso(valor):
+    """Clave exacta de un curso: sin espacios alrededor ni distinción de mayúsculas."""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ""
+    return str(valor).strip().casefold()
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _postings(claves_por_fila):
+    """{clave: array ordenado de filas} a partir de las claves de cada fila."""
+    filas_por_clave = {}
+    for fila, claves in enumerate(claves_por_fila):
+        for clave in claves:
+            filas_por_clave.setdefault(clave, []).append(fila)
+    return {clave: np.array(filas, dtype=np.int32) for clave, filas in filas_por_clave.items()}
+
+
+def _intersecar(listas):
+    """
+    Intersección de arrays ordenados sin repetidos, del más corto al más largo.
+    Cada paso busca los elementos del resultado (pocos) en la lista siguiente
+    con `searchsorted`, sin recorrer la lista entera.
+    """
+    listas = sorted(listas, key=len)
+    resultado = listas[0]
+    for lista in listas[1:]:
+        if not len(resultado) or not len(lista):
+            return resultado[:0]
+        posiciones = np.searchsorted(lista, resultado)
+        posiciones[posiciones == len(lista)] = 0
+        resultado = resultado[lista[posiciones] == resultado]
+    return resultado
+
+
+class ColumnaIndexada:
+    """Texto plegado de una columna, unido en una cadena, con sus postings de trigramas."""
+
+    def __init__(self, valores):
+        self.textos = [plegar(v).replace(_FIN_FILA, " ") for v in valores]
+        self.trigramas = _postings(trigramas(t) for t in self.textos)
+        # Subcadenas de 1 y 2 caracteres presentes en la columna (sacadas de los
+        # trigramas y de los textos cortos): descartan al momento las consultas
+        # cortas que no aparecen
+        self.cortas = set()
+        for texto in [*self.trigramas, *(t for t in self.textos if len(t) < 3)]:
+            self.cortas.update(texto[i:i + n] for n in (1, 2) for i in range(len(texto) - n + 1))
+        self.unido = _FIN_FILA.join(self.textos)
+        # Posición de inicio de cada fila en `unido`
+        self.inicios = []
+        posicion = 0
+        for texto in self.textos:
+            self.inicios.append(posicion)
+            posicion += len(texto) + 1
+
+    def filas(self, consulta, permitidas=None):
+        """
+        Filas, en orden, cuyo texto contiene `consulta` (ya plegada). Es un
+        generador: quien deja de pedir filas deja de buscar. Con `permitidas`
+        (máscara booleana) los candidatos de trigramas se filtran antes de
+        verificarlos.
+        """
+        if len(consulta) < 3:
+            yield from self._recorrer(consulta)
+            return
+        vacio = np.array([], dtype=np.int32)
+        listas = sorted((self.trigramas.get(t, vacio) for t in trigramas(consulta)), key=len)
+        base, resto = listas[0], listas[1:]
+        # La lista más corta se interseca por bloques crecientes: si hay muchas
+        # coincidencias basta el primer bloque y, si hay pocas, el coste total es
+        # el de intersecarla entera
+        inicio, bloque = 0, 256
+        while inicio < len(base):
+            candidatos = _intersecar([base[inicio:inicio + bloque], *resto])
+            if permitidas is not None:
+                candidatos = candidatos[permitidas[candidatos]]
+            for fila in candidatos.tolist():
+                if consulta in self.textos[fila]:
+                    yield fila
+            inicio += bloque
+            bloque *= 2
+
+    def _recorrer(self, consulta):
+        """Filas que contienen `consulta` buscándola en el texto unido (consultas cortas)."""
+        if consulta not in self.cortas or _FIN_FILA in consulta:
+            return
+        posicion = 0
+        while True:
+            encontrado = self.unido.find(consulta, posicion)
+            if encontrado < 0:
+                return
+            fila = bisect.bisect_right(self.inicios, encontrado) - 1
+            yield fila
+            if fila + 1 >= len(self.inicios):
+                return
+            posicion = self.inicios[fila + 1]
+
+
+class IndiceCursos:
+    def __init__(self, df):
+        self.n = len(df)
+
+        def columna(nombre):
+            return df[nombre].tolist() if nombre in df.columns else [None] * self.n
+
+        self.columnas = {c: ColumnaIndexada(columna(c)) for c in COLUMNAS_TEXTO}
+
+        # Primera fila de cada nombre plegado, para resolver nombres exactos
+        self.filas_por_nombre = {}
+        for fila, texto in enumerate(self.columnas["nombre"].textos):
+            self.filas_por_nombre.setdefault(texto.strip(), fila)
+
+        modalidades = np.array([plegar(m) for m in columna("modalidad")], dtype=object)
+        self.modalidades = {
+            valor: np.packbits(modalidades == valor, bitorder="little")
+            for valor in pd.unique(modalidades)
+        }
+
+        if "precio" in df.columns:
+            self.precios = pd.to_numeric(df["precio"], errors="coerce").to_numpy(dtype=float)
+        else:
+            self.precios = np.full(self.n, np.nan)
+
+        # Detectar columna ID (puede ser id_curso o Id_curso)
+        columna_id = "id_curso" if "id_curso" in df.columns else "Id_curso"
+        self.nombres = {}
+        if columna_id in df.columns and "nombre" in df.columns:
+            self.nombres = dict(zip(map(clave_curso, df[columna_id].tolist()), df["nombre"].tolist()))
+
+    def nombre(self, id_curso, defecto=None):
+        """Nombre del curso con ese id (exacto, sin distinguir mayúsculas)."""
+        return self.nombres.get(clave_curso(id_curso), defecto)
+
+    def _bitset_modalidad(self, modalidad):
+        bitset = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for valor, bits in self.modalidades.items():
+            if modalidad in valor:
+                bitset |= bits
+        return bitset
+
+    def buscar(self, query="", modalidad="", precio_max=None, top=10, columnas=None):
+        """
+        Posiciones (en orden de fila) de los primeros `top` cursos que cumplen los
+        filtros. `query` se busca en `columnas` (por defecto, todas las de texto).
+        """
+        consulta = plegar(query) if query else ""
+        indexadas = [self.columnas[c] for c in (columnas or COLUMNAS_TEXTO)]
+        permitidas = None  # None = todas las filas; si no, máscara de los filtros
+
+        if modalidad:
+            bitset = self._bitset_modalidad(plegar(modalidad))
+            permitidas = np.unpackbits(bitset, count=self.n, bitorder="little").astype(bool)
+
+        if precio_max is not None:
+            baratas = self.precios <= precio_max
+            permitidas = baratas if permitidas is None else permitidas & baratas
+
+        if not consulta:
+            if permitidas is None:
+                return list(range(min(top, self.n)))
+            return np.flatnonzero(permitidas)[:top].tolist()
+
+        # Filas de cada columna en orden, combinadas hasta reunir `top`
+        resultado = []
+        anterior = -1
+        for fila in heapq.merge(*(col.filas(consulta, permitidas) for col in indexadas)):
+            if fila == anterior or (permitidas is not None and not permitidas[fila]):
+                continue
+            anterior = fila
+            resultado.append(fila)
+            if len(resultado) >= top:
+                break
+        return resultado
+
+    def buscar_curso(self, nombre):
+        """
+        Posición del curso llamado `nombre`: el de nombre idéntico (sin distinguir
+        mayúsculas ni tildes) o, si no hay, el primero cuyo nombre lo contiene.
+        None si ninguno coincide.
+        """
+        fila = self.filas_por_nombre.get(plegar(nombre).strip())
+        if fila is not None:
+            return fila
+        posiciones = self.buscar(query=nombre, top=1, columnas=["nombre"])
+        return posiciones[0] if posiciones else None
@@ -0,0 +1,256 @@
+"""
+Carga perezosa de los datos del Immune Agent (cursos y feedbacks).
+
+Cada fuente se sirve desde una instantánea en memoria:
+  - Al importar el agente solo se lee la última instantánea guardada en disco
+    (si existe) y, si está caducada o no hay ninguna, se lanza la descarga en
+    segundo plano. Importar el agente nunca espera a la red.
+  - La primera consulta sin instantánea espera como mucho
+    AGENTE_PRESUPUESTO_ARRANQUE segundos; si la descarga no ha llegado se usa
+    el respaldo local (o un DataFrame vacío) y la descarga sigue en segundo
+    plano hasta sustituirlo.
+  - Pasado AGENTE_TTL_SEGUNDOS la instantánea se refresca en segundo plano
+    mientras se sigue sirviendo la última buena. Si la descarga falla se
+    conserva la última buena y no se reintenta hasta AGENTE_REINTENTO_SEGUNDOS.
+  - La instantánea en disco guarda el origen del que se descargó (la URL o, si
+    es un archivo local, su ruta, tamaño y fecha) y se descarta al arrancar si
+    el origen ha cambiado: regenerar Feedbacks.csv o cambiar FEEDBACKS_PATH o
+    CURSOS_URL se nota en el siguiente arranque.
+
+Las URLs se configuran con CURSOS_URL y FEEDBACKS_URL, así que los refrescos
+se pueden probar contra un servidor HTTP local:
+    python -m http.server 8000 --directory feedbacks
+    FEEDBACKS_URL=http://localhost:8000/Feedbacks.csv python immune_agent/agent.py
+"""
+
+import io
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+DIRECTORIO_CACHE = os.environ.get("AGENTE_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".cache"))
+TTL_SEGUNDOS = float(os.environ.get("AGENTE_TTL_SEGUNDOS", 6 * 3600))
+REINTENTO_SEGUNDOS = float(os.environ.get("AGENTE_REINTENTO_SEGUNDOS", 60))
+PRESUPUESTO_ARRANQUE = float(os.environ.get("AGENTE_PRESUPUESTO_ARRANQUE", 0.5))
+TIMEOUT_DESCARGA = float(os.environ.get("AGENTE_TIMEOUT_DESCARGA", 20))
+
+
+# ============================================================================
+# LECTORES
+# ============================================================================
+
+def descargar_url(url, timeout=TIMEOUT_DESCARGA):
+    """Descarga una URL completa en memoria."""
+    with urllib.request.urlopen(url, timeout=timeout) as respuesta:
+        return io.BytesIO(respuesta.read())
+
+
+def descargar_drive(file_id):
+    """Descarga un archivo de Google Drive en memoria."""
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaIoBaseDownload
+
+    drive_service = build("drive", "v3")
+    req = drive_service.files().get_media(fileId=file_id)
+    fh = io.BytesIO()
+    downloader = MediaIoBaseDownload(fh, req)
+    done = False
+    while not done:
+        _, done = downloader.next_chunk()
+    return fh
+
+
+def huella_origen(ubicacion):
+    """
+    Identidad de una fuente: la URL tal cual o, si es un archivo local (ruta o
+    file://), su ruta absoluta con tamaño y fecha de modificación.
+    """
+    if not ubicacion:
+        return ""
+    ruta = ubicacion
+    if ubicacion.startswith("file:"):
+        ruta = urllib.request.url2pathname(urllib.parse.urlparse(ubicacion).path)
+    elif "://" in ubicacion:
+        return ubicacion
+    ruta = os.path.abspath(ruta)
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return ruta
+    return f"{ruta}:{estado.st_size}-{estado.st_mtime_ns}"
+
+
+def leer_tabla(buf: io.BytesIO):
+    """CSV con separador detectado, CSV con ';' o, en último caso, Excel."""
+    buf.seek(0)
+    try:
+        return pd.read_csv(buf, sep=None, engine="python")
+    except Exception:
+        buf.seek(0)
+        try:
+            return pd.read_csv(buf, sep=";", engine="python")
+        except Exception:
+            buf.seek(0)
+            return pd.read_excel(buf)
+
+
+def leer_archivo(path: str):
+    with open(path, "rb") as fh_local:
+        return leer_tabla(io.BytesIO(fh_local.read()))
+
+
+# ============================================================================
+# INSTANTÁNEAS
+# ============================================================================
+
+class Instantanea:
+    """
+    DataFrame servido desde memoria, persistido en disco y refrescado en
+    segundo plano. `descargar` trae la versión remota; `respaldo` (opcional)
+    da una versión local para cuando no hay instantánea ni red. `derivar`
+    (opcional) construye estructuras derivadas (índices, agregados) una vez por
+    instantánea; se publican junto con el DataFrame. `origen` (opcional)
+    devuelve la identidad actual de la fuente (ver `huella_origen`); la
+    instantánea de disco solo se usa si coincide con la guardada.
+    """
+
+    def __init__(self, nombre, descargar, respaldo=None, columnas=(),
+                 ttl=TTL_SEGUNDOS, directorio=DIRECTORIO_CACHE, derivar=None, origen=None):
+        self.nombre = nombre
+        self.descargar = descargar
+        self.origen = origen
+        self.respaldo = respaldo
+        self.derivar = derivar
+        self.columnas = list(columnas)
+        self.ttl = ttl
+        self.ruta = os.path.join(directorio, f"{nombre}.pkl")
+        self._df = None
+        self._derivado = None
+        self._fecha = 0.0
+        self._ultimo_intento = float("-inf")
+        self._refresco = None
+        self._lock = threading.Lock()
+
+    @property
+    def caducada(self):
+        return self._df is None or time.time() - self._fecha > self.ttl
+
+    def _derivar(self, df):
+        if self.derivar is None:
+            return None
+        try:
+            return self.derivar(df)
+        except Exception as e:
+            print(f"⚠️ No se pudieron preparar los datos derivados de {self.nombre}: {e}")
+            return None
+
+    def _publicar(self, df, fecha):
+        # Lo derivado se calcula fuera del lock y se publica a la vez que el DataFrame
+        derivado = self._derivar(df)
+        with self._lock:
+            self._df, self._derivado, self._fecha = df, derivado, fecha
+
+    def _origen(self):
+        if self.origen is None:
+            return ""
+        try:
+            return self.origen()
+        except Exception:
+            return None  # origen desconocido: no coincide con ninguna instantánea
+
+    def _cargar_disco(self):
+        try:
+            guardado = pd.read_pickle(self.ruta)
+            fecha = os.path.getmtime(self.ruta)
+        except Exception:
+            return False
+        # Formato {"origen", "df"}; lo anterior o de otro origen se descarta
+        if not isinstance(guardado, dict) or guardado.get("origen") != self._origen():
+            return False
+        self._publicar(guardado["df"], fecha)
+        return True
+
+    def _guardar_disco(self, df, origen):
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        temporal = f"{self.ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pd.to_pickle({"origen": origen, "df": df}, temporal)
+        os.replace(temporal, self.ruta)
+
+    def _refrescar(self):
+        # El origen se toma antes de leer: si cambia durante la lectura, el
+        # siguiente arranque descarta la instantánea en lugar de servirla
+        origen = self._origen()
+        try:
+            df = self.descargar()
+        except Exception as e:
+            print(f"⚠️ No se pudo actualizar {self.nombre}: {e}")
+            return
+        self._publicar(df, time.time())
+        print(f"✅ {self.nombre.capitalize()} actualizados: {len(df)} registros")
+        if origen is None:
+            return
+        try:
+            self._guardar_disco(df, origen)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la instantánea de {self.nombre}: {e}")
+
+    def refrescar_en_segundo_plano(self):
+        """Lanza un refresco si no hay otro en curso ni uno fallido reciente."""
+        with self._lock:
+            if self._refresco is not None and self._refresco.is_alive():
+                return self._refresco
+            if time.time() - self._ultimo_intento < REINTENTO_SEGUNDOS:
+                return None
+            self._ultimo_intento = time.time()
+            self._refresco = threading.Thread(target=self._refrescar, name=f"refresco-{self.nombre}", daemon=True)
+            hilo = self._refresco
+        hilo.start()
+        return hilo
+
+    def iniciar(self):
+        """Carga la instantánea de disco y, si hace falta, lanza el refresco. No bloquea."""
+        if self._df is None:
+            self._cargar_disco()
+        if self.caducada:
+            self.refrescar_en_segundo_plano()
+
+    def _usar_respaldo(self):
+        df = None
+        if self.respaldo is not None:
+            try:
+                df = self.respaldo()
+                if df is not None:
+                    print(f"✅ {self.nombre.capitalize()} cargados desde archivo local (fallback): {len(df)} registros")
+            except Exception as e:
+                print(f"⚠️ Falló carga local de {self.nombre}: {e}")
+        if df is None:
+            print(f"⚠️ No se pudieron cargar {self.nombre}. Usando DataFrame vacío.")
+            df = pd.DataFrame(columns=self.columnas)
+        derivado = self._derivar(df)
+        with self._lock:
+            # Fecha 0: el respaldo cuenta como caducado y lo sustituirá el refresco
+            if self._df is None:
+                self._df, self._derivado, self._fecha = df, derivado, 0.0
+
+    def obtener(self, presupuesto=PRESUPUESTO_ARRANQUE):
+        """Devuelve la instantánea vigente, esperando como mucho `presupuesto` segundos si no hay ninguna."""
+        if self._df is None:
+            self.iniciar()
+            hilo = self._refresco
+            if hilo is not None:
+                hilo.join(presupuesto)
+            if self._df is None:
+                self._usar_respaldo()
+        elif self.caducada:
+            self.refrescar_en_segundo_plano()
+        return self._df
+
+    def obtener_con_derivado(self, presupuesto=PRESUPUESTO_ARRANQUE):
+        """Como `obtener`, pero devuelve (DataFrame, derivado) de la misma instantánea."""
+        self.obtener(presupuesto)
+        with self._lock:
+            return self._df, self._derivado
@@ -1,8 +1,14 @@
 import os
+import sys
 import pandas as pd
 
 # Rutas como en el agente
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from comun.cache_excel import leer_excel
+
 default_cursos_path = os.path.join(project_root, "cursos_immune", "cursos_immune.xlsx")
 cursos_path = os.environ.get("COURSES_PATH", default_cursos_path)
 
@@ -11,7 +17,7 @@ print(f"Buscando cursos en: {cursos_path}")
 if os.path.exists(cursos_path):
     try:
         # Intentar leer Excel
-        df = pd.read_excel(cursos_path)
+        df = leer_excel(cursos_path)
         print("\n--- Columnas encontradas (Excel local) ---")
         print(df.columns.tolist())
         print("\n--- Primeras filas ---")
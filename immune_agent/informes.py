@@ -0,0 +1,211 @@
+"""
+Caché de los informes del analista (`analyze_course_logic`).
+
+El informe de un curso solo cambia si cambian sus feedbacks, la plantilla del
+prompt o el modelo, así que se guarda con la clave
+(id del curso, versión de sus feedbacks, hash de la plantilla, modelo):
+  - en memoria: LRU de AGENTE_INFORMES_MAX entradas con caducidad
+    AGENTE_TTL_INFORMES segundos
+  - en disco: un JSON por clave en <AGENTE_CACHE_DIR>/informes, con la misma
+    caducidad; sobrevive a reinicios y se comparte entre procesos
+  - single-flight: si varias sesiones piden a la vez el mismo informe solo una
+    llama al modelo y las demás esperan su resultado
+  - `obtener_stream` devuelve el informe por fragmentos: los del modelo según
+    llegan o, si ya estaba guardado, el texto completo en un solo fragmento
+
+Los errores del modelo no se guardan, y una respuesta vacía cuenta como error.
+Cancelar a una de las sesiones que esperan no afecta a las demás.
+
+Uso:
+    cache = CacheInformes()
+    clave = clave_informe("C0001", version, plantilla, modelo)
+    texto = await cache.obtener_async(clave, lambda: llamar_modelo_async(prompt))
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+try:
+    from .datos import DIRECTORIO_CACHE
+except ImportError:  # ejecutado como script: python immune_agent/agent.py
+    from datos import DIRECTORIO_CACHE
+
+MAX_INFORMES = int(os.environ.get("AGENTE_INFORMES_MAX", 256))
+TTL_INFORMES = float(os.environ.get("AGENTE_TTL_INFORMES", 7 * 24 * 3600))
+
+
+def huella(texto):
+    """Hash corto y estable de un texto (plantillas, claves)."""
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def clave_informe(id_curso, version, plantilla, modelo):
+    """Clave de caché de un informe; cambia si cambia cualquiera de sus entradas."""
+    return json.dumps([str(id_curso), version, huella(plantilla), modelo], ensure_ascii=False)
+
+
+def _texto_valido(texto):
+    """El texto generado, o ValueError si el modelo no devolvió nada (no se guarda)."""
+    if not isinstance(texto, str) or not texto.strip():
+        raise ValueError("el modelo devolvió una respuesta vacía")
+    return texto
+
+
+class CacheInformes:
+    def __init__(self, max_entradas=MAX_INFORMES, ttl=TTL_INFORMES,
+                 directorio=os.path.join(DIRECTORIO_CACHE, "informes")):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.directorio = directorio
+        self._memoria = OrderedDict()  # clave -> (fecha, texto)
+        self._en_curso = {}  # clave -> Future del cálculo en marcha
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Memoria (LRU con TTL)
+    # ------------------------------------------------------------------
+
+    def _leer_memoria(self, clave):
+        entrada = self._memoria.get(clave)
+        if entrada is None:
+            return None
+        fecha, texto = entrada
+        if time.time() - fecha > self.ttl:
+            del self._memoria[clave]
+            return None
+        self._memoria.move_to_end(clave)
+        return texto
+
+    def _guardar_memoria(self, clave, fecha, texto):
+        self._memoria[clave] = (fecha, texto)
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Disco
+    # ------------------------------------------------------------------
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{huella(clave)}.json")
+
+    def _leer_disco(self, clave):
+        try:
+            with open(self._ruta(clave), encoding="utf-8") as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entrada.get("clave") != clave or time.time() - entrada.get("fecha", 0) > self.ttl:
+            return None
+        return entrada["fecha"], entrada["texto"]
+
+    def _guardar_disco(self, clave, fecha, texto):
+        ruta = self._ruta(clave)
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump({"clave": clave, "fecha": fecha, "texto": texto}, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el informe en disco: {e}")
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def _reservar(self, clave, forzar=False):
+        """(texto en memoria, futuro, soy_lider) para `clave`."""
+        with self._lock:
+            texto = None if forzar else self._leer_memoria(clave)
+            if texto is not None:
+                return texto, None, False
+            futuro = self._en_curso.get(clave)
+            if futuro is not None:
+                return None, futuro, False
+            futuro = self._en_curso[clave] = Future()
+            # En marcha: cancelar la espera de una sesión no cancela el cálculo compartido
+            futuro.set_running_or_notify_cancel()
+            return None, futuro, True
+
+    def _publicar(self, clave, futuro, entrada):
+        with self._lock:
+            self._guardar_memoria(clave, *entrada)
+            self._en_curso.pop(clave, None)
+        futuro.set_result(entrada[1])
+
+    def _fallar(self, clave, futuro, error):
+        with self._lock:
+            self._en_curso.pop(clave, None)
+        if not isinstance(error, Exception):
+            # Cancelación o cierre del stream: quien espera recibe un error normal
+            error = RuntimeError("la generación del informe se interrumpió")
+        futuro.set_exception(error)
+
+    async def obtener_async(self, clave, generar, forzar=False):
+        """
+        Devuelve el informe de `clave`, esperando a la corrutina `generar()` solo
+        si no está en memoria ni en disco y nadie lo está calculando ya. Con
+        `forzar` se regenera aunque haya informe guardado.
+        """
+        texto, futuro, lider = self._reservar(clave, forzar)
+        if texto is not None:
+            return texto
+        if not lider:
+            return await asyncio.wrap_future(futuro)
+        try:
+            entrada = None if forzar else self._leer_disco(clave)
+            if entrada is None:
+                entrada = (time.time(), _texto_valido(await generar()))
+                self._guardar_disco(clave, *entrada)
+        except BaseException as e:
+            self._fallar(clave, futuro, e)
+            raise
+        self._publicar(clave, futuro, entrada)
+        return entrada[1]
+
+    async def obtener_stream(self, clave, generar_stream):
+        """
+        Como `obtener_async`, pero `generar_stream()` es un iterador asíncrono de
+        fragmentos que se reenvían según llegan. El informe solo se guarda si el
+        stream termina; quien espera el mismo informe recibe el texto completo.
+        """
+        texto, futuro, lider = self._reservar(clave)
+        if texto is not None:
+            yield texto
+            return
+        if not lider:
+            yield await asyncio.wrap_future(futuro)
+            return
+        entrada = self._leer_disco(clave)
+        if entrada is not None:
+            self._publicar(clave, futuro, entrada)
+            yield entrada[1]
+            return
+
+        fragmentos = []
+        try:
+            async for fragmento in generar_stream():
+                fragmentos.append(fragmento)
+                yield fragmento
+            entrada = (time.time(), _texto_valido("".join(fragmentos)))
+            self._guardar_disco(clave, *entrada)
+        except BaseException as e:
+            self._fallar(clave, futuro, e)
+            raise
+        self._publicar(clave, futuro, entrada)
+
+    def contiene(self, clave):
+        """True si hay un informe vigente para `clave` en memoria o en disco."""
+        with self._lock:
+            if self._leer_memoria(clave) is not None:
+                return True
+        return self._leer_disco(clave) is not None
@@ -0,0 +1,74 @@
+"""
+Cliente de Gemini compartido por las tools del agente.
+
+Se crea un único cliente por proceso (al primer uso) y se reutiliza en todas
+las llamadas, de modo que las conexiones HTTP se mantienen abiertas entre
+análisis. Las llamadas asíncronas (`client.aio`) no ocupan un hilo mientras
+esperan al modelo y se limitan a AGENTE_MAX_LLAMADAS_MODELO simultáneas por
+bucle de eventos; el resto espera su turno.
+
+`generar_stream` devuelve el texto por fragmentos según los va produciendo el
+modelo (`generate_content_stream`), para mostrar el informe sin esperar a que
+termine.
+
+Para probar sin red basta con sustituir el cliente por uno falso que tenga
+`aio.models.generate_content(model=..., contents=...)` (asíncrono) y
+`aio.models.generate_content_stream(...)` si se usa `generar_stream`:
+    pool_modelo.usar_cliente(ClienteFalso())
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+
+MAX_LLAMADAS = int(os.environ.get("AGENTE_MAX_LLAMADAS_MODELO", 128))
+
+
+class PoolModelo:
+    def __init__(self, crear_cliente, max_concurrentes=MAX_LLAMADAS):
+        self.crear_cliente = crear_cliente
+        self.max_concurrentes = max_concurrentes
+        self.cliente = None
+        self._lock = threading.Lock()
+        self._semaforos = weakref.WeakKeyDictionary()  # bucle de eventos -> asyncio.Semaphore
+
+    def obtener_cliente(self):
+        if self.cliente is None:
+            with self._lock:
+                if self.cliente is None:
+                    self.cliente = self.crear_cliente()
+        return self.cliente
+
+    def usar_cliente(self, cliente):
+        """Sustituye el cliente (por ejemplo, por uno falso en pruebas)."""
+        with self._lock:
+            self.cliente = cliente
+
+    def _semaforo(self):
+        bucle = asyncio.get_running_loop()
+        with self._lock:
+            semaforo = self._semaforos.get(bucle)
+            if semaforo is None:
+                semaforo = self._semaforos[bucle] = asyncio.Semaphore(self.max_concurrentes)
+        return semaforo
+
+    async def generar(self, prompt, modelo):
+        """Texto generado por `modelo` para `prompt`, sin bloquear el bucle de eventos."""
+        async with self._semaforo():
+            respuesta = await self.obtener_cliente().aio.models.generate_content(
+                model=modelo,
+                contents=prompt,
+            )
+        return respuesta.text
+
+    async def generar_stream(self, prompt, modelo):
+        """Fragmentos de texto según llegan del modelo (la llamada cuenta en el límite hasta terminar)."""
+        async with self._semaforo():
+            respuesta = await self.obtener_cliente().aio.models.generate_content_stream(
+                model=modelo,
+                contents=prompt,
+            )
+            async for fragmento in respuesta:
+                if fragmento.text:
+                    yield fragmento.text
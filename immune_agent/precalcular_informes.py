@@ -0,0 +1,124 @@
+"""
+Precalcula los informes del analista para todos los cursos del catálogo.
+
+Recorre cada id_curso de la instantánea de cursos, construye el mismo prompt
+que `analyze_course_logic` (con las métricas ya agregadas) y llama al modelo
+en paralelo con un límite de llamadas simultáneas y de llamadas por minuto.
+Los informes se guardan en la caché en disco del agente con su clave
+versionada (curso, versión de sus feedbacks, plantilla, modelo), así que el
+agente los sirve directamente sin llamar al modelo.
+
+Con --incremental solo se generan los cursos sin informe para la versión
+actual de sus feedbacks (cursos nuevos o con feedbacks cambiados).
+
+Uso:
+    python immune_agent/precalcular_informes.py
+    python immune_agent/precalcular_informes.py --incremental --concurrencia 4 --rpm 30
+"""
+
+import argparse
+import asyncio
+import importlib
+import time
+
+try:
+    from .datos import TIMEOUT_DESCARGA
+    # El paquete reasigna su atributo `agent` al LlmAgent; aquí hace falta el módulo
+    agent = importlib.import_module(f"{__package__}.agent")
+except ImportError:  # ejecutado como script: python immune_agent/precalcular_informes.py
+    import agent
+    from datos import TIMEOUT_DESCARGA
+
+
+class LimiteRitmo:
+    """Espacia el inicio de las llamadas para no superar `por_minuto`."""
+
+    def __init__(self, por_minuto):
+        self.intervalo = 60.0 / por_minuto if por_minuto else 0.0
+        self.siguiente = 0.0
+        self._lock = asyncio.Lock()
+
+    async def esperar(self):
+        if not self.intervalo:
+            return
+        async with self._lock:
+            ahora = time.monotonic()
+            espera = self.siguiente - ahora
+            self.siguiente = max(ahora, self.siguiente) + self.intervalo
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+def cargar_actualizado(fuente):
+    """Espera (hasta TIMEOUT_DESCARGA) a la versión remota; si falla, usa la última buena."""
+    fuente.iniciar()
+    hilo = fuente.refrescar_en_segundo_plano()
+    if hilo is not None:
+        hilo.join(TIMEOUT_DESCARGA)
+    return fuente.obtener()
+
+
+async def precalcular(incremental=False, concurrencia=8, por_minuto=60):
+    """Genera los informes de todos los cursos y devuelve los conteos por estado."""
+    cursos_df = cargar_actualizado(agent.cursos)
+    cargar_actualizado(agent.feedbacks)
+
+    semaforo = asyncio.Semaphore(concurrencia)
+    ritmo = LimiteRitmo(por_minuto)
+    conteos = {"generados": 0, "al_dia": 0, "sin_feedbacks": 0, "errores": 0}
+
+    async def procesar(id_curso, nombre):
+        clave, prompt = agent.preparar_informe(nombre, course_id=id_curso)
+        if clave is None:
+            conteos["sin_feedbacks"] += 1
+            print(f"⚠️ {id_curso}: {prompt}")
+            return
+        if incremental and agent.cache_informes.contiene(clave):
+            conteos["al_dia"] += 1
+            return
+
+        async def generar():
+            await ritmo.esperar()
+            return await agent.pool_modelo.generar(prompt, agent.MODELO_ANALISTA)
+
+        async with semaforo:
+            try:
+                await agent.cache_informes.obtener_async(clave, generar, forzar=not incremental)
+            except Exception as e:
+                conteos["errores"] += 1
+                print(f"⚠️ {id_curso}: error generando el informe: {e}")
+                return
+        conteos["generados"] += 1
+        print(f"✅ {id_curso}: {nombre}")
+
+    if cursos_df is None or cursos_df.empty or "id_curso" not in cursos_df.columns:
+        print("⚠️ No hay cursos cargados.")
+        return conteos
+
+    catalogo = cursos_df[["id_curso", "nombre"]].dropna(subset=["id_curso"]).drop_duplicates("id_curso")
+    await asyncio.gather(*(procesar(id_curso, nombre) for id_curso, nombre in catalogo.itertuples(index=False)))
+    return conteos
+
+
+def main(incremental=False, concurrencia=8, por_minuto=60):
+    inicio = time.time()
+    modo = "incremental" if incremental else "completo"
+    print(f"🔄 Precalculando informes ({modo}, {concurrencia} en paralelo, {por_minuto or 'sin límite'}/min)")
+    conteos = asyncio.run(precalcular(incremental, concurrencia, por_minuto))
+    print(
+        f"✅ Informes: {conteos['generados']} generados, {conteos['al_dia']} al día, "
+        f"{conteos['sin_feedbacks']} sin feedbacks, {conteos['errores']} con error "
+        f"({time.time() - inicio:.1f} s)"
+    )
+    return conteos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precalcula los informes del analista de todos los cursos.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Solo genera los cursos cuyo informe no está al día con sus feedbacks")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Llamadas simultáneas al modelo")
+    parser.add_argument("--rpm", type=float, default=60, help="Máximo de llamadas por minuto (0 = sin límite)")
+    args = parser.parse_args()
+
+    main(incremental=args.incremental, concurrencia=args.concurrencia, por_minuto=args.rpm)
@@ -1,48 +1,21 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import random
 import os
-import unicodedata
+import sys
 
-# Configuración de semilla para reproducibilidad
-RANDOM_SEED = 42
-np.random.seed(RANDOM_SEED)
-random.seed(RANDOM_SEED)
-rng = np.random.default_rng(RANDOM_SEED)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Reproducibilidad: cada etapa usa su propio flujo del registro de semillas
+from comun.semillas import flujo
+from comun.cache_excel import leer_excel
 
 # ============================================================================
 # 1. UTILIDADES DE CARGA
 # ============================================================================
 
-def reparar_texto(texto):
-    """
-    Intenta corregir mojibake común y normaliza en Unicode NFC.
-    """
-    if not isinstance(texto, str):
-        return texto
-    reparado = texto.strip()
-    if any(token in reparado for token in ("Ã", "Â")):
-        try:
-            reparado = reparado.encode("latin-1").decode("utf-8")
-        except (UnicodeEncodeError, UnicodeDecodeError):
-            pass
-    reparado = unicodedata.normalize("NFC", reparado)
-    return reparado
-
-
-def limpiar_dataframe(df):
-    """
-    Aplica reparaciones de encoding a columnas y valores string.
-    """
-    df = df.copy()
-    df.columns = [reparar_texto(col) if isinstance(col, str) else col for col in df.columns]
-    object_cols = df.select_dtypes(include=["object"]).columns
-    for col in object_cols:
-        df[col] = df[col].apply(reparar_texto)
-    return df
-
-
 def normalizar_id_usuario(valor):
     """
     Normaliza cualquier representación de id_usuario al formato U####.
@@ -66,8 +39,7 @@ def cargar_ids_formularios(ruta_formularios='formularios/formularios_unificado.x
     - diccionario_id_pais: mapeo {id_usuario: pais} para coherencia
     """
     try:
-        df_formularios = pd.read_excel(ruta_formularios, engine='openpyxl')
-        df_formularios = limpiar_dataframe(df_formularios)
+        df_formularios = leer_excel(ruta_formularios)
         
         # Verificar que existe la columna id_usuario
         if 'id_usuario' not in df_formularios.columns:
@@ -117,8 +89,7 @@ def cargar_catalogo_cursos(ruta_cursos='cursos_immune/cursos_immune.xlsx'):
     Carga la lista de ids de curso para garantizar coherencia entre tablas.
     """
     try:
-        df_cursos = pd.read_excel(ruta_cursos, engine='openpyxl')
-        df_cursos = limpiar_dataframe(df_cursos)
+        df_cursos = leer_excel(ruta_cursos)
         if 'id_curso' not in df_cursos.columns:
             raise ValueError(f"La columna 'id_curso' no existe en {ruta_cursos}")
         catalogo = (
@@ -170,11 +141,11 @@ CIUDADES_EUROPA = {
 # Dispositivos normalizados
 DISPOSITIVOS = ["mobile", "desktop", "tablet"]
 
-def generar_id_sintetico():
+def generar_id_sintetico(rng):
     """Genera un identificador sintético con el formato U####."""
     return f"U{rng.integers(1, 10001):04d}"
 
-def generar_ip_usuario():
+def generar_ip_usuario(rng):
     """Genera una IP ficticia para simular diferentes entradas en web."""
     # Generar IPs IPv4 realistas
     return f"{rng.integers(1, 256)}.{rng.integers(0, 256)}.{rng.integers(0, 256)}.{rng.integers(1, 255)}"
@@ -204,6 +175,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
     # ===========================
     # 2. FECHA_HORA (Timestamp completo)
     # ===========================
+    rng_fechas = flujo("metricas.fechas")
     # Rango restringido al corte real para evitar fechas futuras
     start_date = pd.Timestamp("2024-01-01")
     corte_maximo = pd.Timestamp("2025-11-29")
@@ -219,7 +191,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
         # Fecha aleatoria
         rango_dias = (end_date - start_date).days + 1
         fecha = start_date + timedelta(
-            days=int(rng.integers(0, rango_dias))
+            days=int(rng_fechas.integers(0, rango_dias))
         )
         
         # Hora con más probabilidad en horario laboral
@@ -229,9 +201,9 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
         # Normalizar para asegurar que sumen exactamente 1.0
         suma_prob = sum(prob_horas)
         prob_horas = [p / suma_prob for p in prob_horas]
-        hora = rng.choice(list(range(24)), p=prob_horas)
-        minuto = rng.integers(0, 60)
-        segundo = rng.integers(0, 60)
+        hora = rng_fechas.choice(list(range(24)), p=prob_horas)
+        minuto = rng_fechas.integers(0, 60)
+        segundo = rng_fechas.integers(0, 60)
         
         timestamp = fecha.replace(hour=hora, minute=minuto, second=segundo)
         timestamps.append(timestamp)
@@ -241,20 +213,23 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
     # ===========================
     # 3. ORIGEN_PLATAFORMA
     # ===========================
+    rng_origen = flujo("metricas.origen")
     # Distribución realista: LinkedIn, Instagram, Google, Google Ads
     pesos_origen = [0.30, 0.30, 0.20, 0.20]  # LinkedIn, Instagram, Google, Google Ads
-    origen_plataforma = rng.choice(ORIGENES_PLATAFORMA, size=n_registros, p=pesos_origen)
+    origen_plataforma = rng_origen.choice(ORIGENES_PLATAFORMA, size=n_registros, p=pesos_origen)
     
     # ===========================
     # 4. DISPOSITIVO
     # ===========================
+    rng_dispositivo = flujo("metricas.dispositivo")
     # Distribución realista con taxonomía cerrada
     pesos_dispositivo = [0.55, 0.25, 0.20]  # mobile, desktop, tablet
-    dispositivo = rng.choice(DISPOSITIVOS, size=n_registros, p=pesos_dispositivo)
+    dispositivo = rng_dispositivo.choice(DISPOSITIVOS, size=n_registros, p=pesos_dispositivo)
     
     # ===========================
     # 5. ID_USUARIO (IDs normalizados, con ~15% nulls en los no vinculados)
     # ===========================
+    rng_ids = flujo("metricas.ids")
     # Los primeros IDs se asignan a TODOS los registros de formularios (hasta 1200)
     # y el resto sigue la lógica previa (nulls ~15% sólo en los no vinculados).
     id_usuario = [None] * n_registros
@@ -263,7 +238,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
     if n_ids_formularios > 0:
         ids_form_array = np.array(ids_formularios[:n_ids_formularios])
         id_usuario[:n_ids_formularios] = [
-            normalizar_id_usuario(val) or generar_id_sintetico()
+            normalizar_id_usuario(val) or generar_id_sintetico(rng_ids)
             for val in ids_form_array
         ]
     
@@ -271,14 +246,15 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
     if restantes > 0:
         target_nulls = int(restantes * 0.15)
         indices_disponibles = list(range(n_ids_formularios, n_registros))
-        indices_null = set(rng.choice(indices_disponibles, size=target_nulls, replace=False))
+        indices_null = set(rng_ids.choice(indices_disponibles, size=target_nulls, replace=False))
         for i in indices_disponibles:
             if i not in indices_null:
-                id_usuario[i] = generar_id_sintetico()
+                id_usuario[i] = generar_id_sintetico(rng_ids)
     
     # ===========================
     # 6. IP_USUARIO (IPs ficticias para simular diferentes entradas)
     # ===========================
+    rng_ips = flujo("metricas.ips")
     # Generar IPs que se repiten para el mismo usuario (simulando misma conexión)
     # pero diferentes IPs para diferentes sesiones
     ip_usuario = []
@@ -293,24 +269,25 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
             if usuario_id in ip_por_usuario:
                 ip_usuario.append(ip_por_usuario[usuario_id])
             else:
-                nueva_ip = generar_ip_usuario()
+                nueva_ip = generar_ip_usuario(rng_ips)
                 # Asegurar IP no usada por otro usuario
                 while nueva_ip in ips_asignadas:
-                    nueva_ip = generar_ip_usuario()
+                    nueva_ip = generar_ip_usuario(rng_ips)
                 ip_por_usuario[usuario_id] = nueva_ip
                 ips_asignadas.add(nueva_ip)
                 ip_usuario.append(nueva_ip)
         else:
             # Visitas sin ID: asignar IP única para no colisionar
-            nueva_ip = generar_ip_usuario()
+            nueva_ip = generar_ip_usuario(rng_ips)
             while nueva_ip in ips_asignadas:
-                nueva_ip = generar_ip_usuario()
+                nueva_ip = generar_ip_usuario(rng_ips)
             ips_asignadas.add(nueva_ip)
             ip_usuario.append(nueva_ip)
     
     # ===========================
     # 7. TIEMPO_EN_PAGINA (en segundos)
     # ===========================
+    rng_tiempo = flujo("metricas.tiempo")
     # Distribución realista: mayoría de visitas cortas, algunas largas
     # Correlacionado con si tiene Id_usuario (más tiempo si tiene ID)
     tiempo_en_pagina = []
@@ -320,11 +297,11 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
         
         if tiene_id:
             # Si tiene ID, tiempo promedio más largo (2-15 minutos)
-            tiempo = rng.exponential(300)  # Media de 5 minutos (300 segundos)
+            tiempo = rng_tiempo.exponential(300)  # Media de 5 minutos (300 segundos)
             tiempo = np.clip(tiempo, 60, 900)  # Entre 1 y 15 minutos
         else:
             # Si no tiene ID, tiempo más corto (10 segundos - 3 minutos)
-            tiempo = rng.exponential(60)  # Media de 1 minuto (60 segundos)
+            tiempo = rng_tiempo.exponential(60)  # Media de 1 minuto (60 segundos)
             tiempo = np.clip(tiempo, 10, 180)  # Entre 10 segundos y 3 minutos
         
         tiempo_en_pagina.append(int(tiempo))
@@ -332,6 +309,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
     # ===========================
     # 8. PROGRAMA_OFERTA_CLICK (asociado a id_curso, con secuencias)
     # ===========================
+    rng_clicks = flujo("metricas.clicks")
     # Crear secuencias donde usuarios consulten diferentes programas seguidos
     # Algunos usuarios consultarán múltiples programas en sesiones consecutivas
     cursos_para_click = CURSOS_DISPONIBLES or [f"C{i:04d}" for i in range(1, 21)]
@@ -350,14 +328,14 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
             # Este usuario ya consultó un curso antes, usar uno diferente
             curso_previo = curso_anterior_por_usuario[usuario_id]
             cursos_disponibles = [c for c in cursos_para_click if c != curso_previo]
-            if cursos_disponibles and rng.random() < 0.80:  # 80% probabilidad de cambiar
-                curso = rng.choice(cursos_disponibles)
+            if cursos_disponibles and rng_clicks.random() < 0.80:  # 80% probabilidad de cambiar
+                curso = rng_clicks.choice(cursos_disponibles)
             else:
                 # Mantener el mismo curso o selección aleatoria
-                curso = rng.choice(cursos_para_click) if rng.random() < click_probability else None
+                curso = rng_clicks.choice(cursos_para_click) if rng_clicks.random() < click_probability else None
         else:
             # Primer curso para este usuario o selección aleatoria
-            curso = rng.choice(cursos_para_click) if rng.random() < click_probability else None
+            curso = rng_clicks.choice(cursos_para_click) if rng_clicks.random() < click_probability else None
         
         programa_oferta_click.append((idx_ordenado, curso))
         if usuario_id and curso:
@@ -372,6 +350,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
     # ===========================
     # 10. LOCALIZACION (Ciudad, País)
     # ===========================
+    rng_localizacion = flujo("metricas.localizacion")
     # Distribución: 60% España, 30% LATAM, 10% Europa
     # PERO: si el ID coincide con formularios, usar el País de ese formulario
     localizaciones = []
@@ -386,42 +365,42 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
             
             # Buscar una ciudad apropiada para ese país
             if pais_formulario == "España":
-                ciudad = rng.choice(CIUDADES_ESPAÑA)
+                ciudad = rng_localizacion.choice(CIUDADES_ESPAÑA)
                 localizacion = f"{ciudad}, España"
             elif pais_formulario in CIUDADES_LATAM:
-                ciudad = rng.choice(CIUDADES_LATAM[pais_formulario])
+                ciudad = rng_localizacion.choice(CIUDADES_LATAM[pais_formulario])
                 localizacion = f"{ciudad}, {pais_formulario}"
             elif pais_formulario in CIUDADES_EUROPA:
-                ciudad = rng.choice(CIUDADES_EUROPA[pais_formulario])
+                ciudad = rng_localizacion.choice(CIUDADES_EUROPA[pais_formulario])
                 localizacion = f"{ciudad}, {pais_formulario}"
             else:
                 # País no reconocido, usar distribución normal
-                region = rng.choice(["ES", "LATAM", "EU"], p=[0.60, 0.30, 0.10])
+                region = rng_localizacion.choice(["ES", "LATAM", "EU"], p=[0.60, 0.30, 0.10])
                 if region == "ES":
-                    ciudad = rng.choice(CIUDADES_ESPAÑA)
+                    ciudad = rng_localizacion.choice(CIUDADES_ESPAÑA)
                     localizacion = f"{ciudad}, España"
                 elif region == "LATAM":
-                    pais = rng.choice(list(CIUDADES_LATAM.keys()))
-                    ciudad = rng.choice(CIUDADES_LATAM[pais])
+                    pais = rng_localizacion.choice(list(CIUDADES_LATAM.keys()))
+                    ciudad = rng_localizacion.choice(CIUDADES_LATAM[pais])
                     localizacion = f"{ciudad}, {pais}"
                 else:
-                    pais = rng.choice(list(CIUDADES_EUROPA.keys()))
-                    ciudad = rng.choice(CIUDADES_EUROPA[pais])
+                    pais = rng_localizacion.choice(list(CIUDADES_EUROPA.keys()))
+                    ciudad = rng_localizacion.choice(CIUDADES_EUROPA[pais])
                     localizacion = f"{ciudad}, {pais}"
         else:
             # ID no está en formularios, usar distribución normal
-            region = rng.choice(["ES", "LATAM", "EU"], p=[0.60, 0.30, 0.10])
+            region = rng_localizacion.choice(["ES", "LATAM", "EU"], p=[0.60, 0.30, 0.10])
             
             if region == "ES":
-                ciudad = rng.choice(CIUDADES_ESPAÑA)
+                ciudad = rng_localizacion.choice(CIUDADES_ESPAÑA)
                 localizacion = f"{ciudad}, España"
             elif region == "LATAM":
-                pais = rng.choice(list(CIUDADES_LATAM.keys()))
-                ciudad = rng.choice(CIUDADES_LATAM[pais])
+                pais = rng_localizacion.choice(list(CIUDADES_LATAM.keys()))
+                ciudad = rng_localizacion.choice(CIUDADES_LATAM[pais])
                 localizacion = f"{ciudad}, {pais}"
             else:  # EU
-                pais = rng.choice(list(CIUDADES_EUROPA.keys()))
-                ciudad = rng.choice(CIUDADES_EUROPA[pais])
+                pais = rng_localizacion.choice(list(CIUDADES_EUROPA.keys()))
+                ciudad = rng_localizacion.choice(CIUDADES_EUROPA[pais])
                 localizacion = f"{ciudad}, {pais}"
         
         localizaciones.append(localizacion)
@@ -429,6 +408,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
     # ===========================
     # 11. MATRICULADO (con correlaciones críticas)
     # ===========================
+    rng_matricula = flujo("metricas.matricula")
     # 32% True, pero con correlaciones lógicas:
     # - Matriculado=True → Id_usuario no null (obligatorio)
     # NO puede haber matrícula sin ID de usuario
@@ -457,7 +437,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
                 prob_base += 0.05
             
             prob_base = np.clip(prob_base, 0.0, 0.95)
-            matriculado.append(rng.random() < prob_base)
+            matriculado.append(rng_matricula.random() < prob_base)
     
     matriculado = np.array(matriculado)
     
@@ -471,24 +451,25 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
         candidates = [i for i in range(n_registros) 
                      if not matriculado[i] and id_usuario[i] is not None]
         additional = min(target_matriculados - current_matriculados, len(candidates))
-        for idx in rng.choice(candidates, size=additional, replace=False):
+        for idx in rng_matricula.choice(candidates, size=additional, replace=False):
             matriculado[idx] = True
     elif current_matriculados > target_matriculados:
         # Reducir matriculados aleatoriamente
         candidates = np.where(matriculado)[0]
         to_remove = min(current_matriculados - target_matriculados, len(candidates))
-        for idx in rng.choice(candidates, size=to_remove, replace=False):
+        for idx in rng_matricula.choice(candidates, size=to_remove, replace=False):
             matriculado[idx] = False
     
     # Asegurar que toda matrícula tenga programa asociado
     cursos_para_matricula = CURSOS_DISPONIBLES or [f"C{i:04d}" for i in range(1, 21)]
     for idx, esta_matriculado in enumerate(matriculado):
         if esta_matriculado and programa_oferta_click[idx] is None:
-            programa_oferta_click[idx] = rng.choice(cursos_para_matricula)
+            programa_oferta_click[idx] = rng_matricula.choice(cursos_para_matricula)
     
     # ===========================
     # 12. CREAR DATAFRAME
     # ===========================
+    rng_postprocesado = flujo("metricas.postprocesado")
     df = pd.DataFrame({
         "usuario_temp": usuario_temp,
         "origen_plataforma": origen_plataforma,
@@ -539,7 +520,7 @@ def generar_immune_metricas(n_registros=5000, ids_formularios=None, mapeo_id_pai
         else:
             # Evitar la primera visita si hay más de una
             choice_pool = idxs[1:] if len(idxs) > 1 else idxs
-            choice = rng.choice(choice_pool)
+            choice = rng_postprocesado.choice(choice_pool)
         df.at[choice, "Matriculado"] = True
     
     return df
@@ -6,6 +6,13 @@ Verifica todas las reglas de negocio, correlaciones lógicas y coherencia de dat
 import pandas as pd
 import numpy as np
 import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from comun.cache_excel import leer_excel
 
 # ============================================================================
 # CONFIGURACIÓN
@@ -263,7 +270,7 @@ def verificar_programa_oferta_click_secuencias(df):
 def verificar_coherencia_pais_formularios(df):
     """Verifica que los IDs de formularios tienen el País correcto en Localizacion"""
     try:
-        df_formularios = pd.read_excel(ARCHIVO_FORMULARIOS, engine='openpyxl')
+        df_formularios = leer_excel(ARCHIVO_FORMULARIOS)
         
         # Crear mapeo ID -> País
         mapeo_id_pais = {}
@@ -318,7 +325,7 @@ def verificar_coherencia_pais_formularios(df):
 def verificar_ids_formularios_cobertura(df):
     """Comprueba que los primeros 1200 IDs corresponden a formularios y no se repiten fuera."""
     try:
-        df_form = pd.read_excel(ARCHIVO_FORMULARIOS, engine='openpyxl')
+        df_form = leer_excel(ARCHIVO_FORMULARIOS)
         ids_form = (
             df_form['id_usuario']
             .astype(str)
@@ -373,7 +380,7 @@ def verificar_programa_matriculado(df):
 def verificar_ids_formularios_no_duplicados(df):
     """Comprueba que los IDs de formularios no están duplicados dentro de su bloque inicial."""
     try:
-        df_form = pd.read_excel(ARCHIVO_FORMULARIOS, engine='openpyxl')
+        df_form = leer_excel(ARCHIVO_FORMULARIOS)
         ids_form = (
             df_form['id_usuario']
             .astype(str)
@@ -0,0 +1,152 @@
+"""
+Configuración común de las pruebas.
+
+Los módulos del agente leen sus variables de entorno al importarse, así que se
+fijan aquí, antes de cualquier import de immune_agent: las instantáneas y los
+informes se guardan en un directorio temporal, los refrescos fallidos se
+pueden reintentar sin esperar y los cursos y feedbacks se leen de copias
+locales (file://) en lugar de Google Drive. El modelo se sustituye por
+`ClienteFalso`, que no usa la red.
+
+Uso (desde la raíz del proyecto):
+    python -m pytest -q
+"""
+
+import asyncio
+import importlib
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+DIRECTORIO_PRUEBAS = tempfile.mkdtemp(prefix="immune_agent_pruebas_")
+RUTA_CURSOS = os.path.join(DIRECTORIO_PRUEBAS, "datos", "cursos.csv")
+RUTA_FEEDBACKS = os.path.join(DIRECTORIO_PRUEBAS, "datos", "Feedbacks.csv")
+FEEDBACKS_ORIGINALES = os.path.join(PROJECT_ROOT, "feedbacks", "Feedbacks.csv")
+
+os.makedirs(os.path.dirname(RUTA_CURSOS))
+pd.read_excel(os.path.join(PROJECT_ROOT, "cursos_immune", "cursos_immune.xlsx")).to_csv(RUTA_CURSOS, index=False)
+shutil.copyfile(FEEDBACKS_ORIGINALES, RUTA_FEEDBACKS)
+
+os.environ["AGENTE_CACHE_DIR"] = os.path.join(DIRECTORIO_PRUEBAS, "cache")
+os.environ["AGENTE_REINTENTO_SEGUNDOS"] = "0"
+os.environ["CURSOS_URL"] = pathlib.Path(RUTA_CURSOS).as_uri()
+os.environ["FEEDBACKS_URL"] = pathlib.Path(RUTA_FEEDBACKS).as_uri()
+os.environ["COURSES_PATH"] = RUTA_CURSOS
+os.environ["FEEDBACKS_PATH"] = RUTA_FEEDBACKS
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DIRECTORIO_PRUEBAS, ignore_errors=True)
+
+
+# ============================================================================
+# MODELO FALSO
+# ============================================================================
+
+class ClienteFalso:
+    """
+    Sustituto de `genai.Client` con la misma forma (`aio.models.*`). Responde
+    `texto` (o lo lanza, si es una excepción) tras `retardo` segundos y anota
+    los prompts recibidos y el máximo de llamadas simultáneas.
+    """
+
+    def __init__(self, texto="### Informe de prueba", retardo=0.0, fragmentos=3):
+        self.texto = texto
+        self.retardo = retardo
+        self.fragmentos = fragmentos
+        self.prompts = []
+        self.activas = 0
+        self.max_activas = 0
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self._generar,
+            generate_content_stream=self._generar_stream,
+        ))
+
+    @property
+    def llamadas(self):
+        return len(self.prompts)
+
+    def _entrar(self, contents):
+        self.prompts.append(contents)
+        self.activas += 1
+        self.max_activas = max(self.max_activas, self.activas)
+
+    async def _generar(self, model, contents):
+        self._entrar(contents)
+        try:
+            await asyncio.sleep(self.retardo)
+            if isinstance(self.texto, BaseException):
+                raise self.texto
+            return SimpleNamespace(text=self.texto)
+        finally:
+            self.activas -= 1
+
+    async def _generar_stream(self, model, contents):
+        self._entrar(contents)
+        paso = -(-len(self.texto) // self.fragmentos)
+        partes = [self.texto[i:i + paso] for i in range(0, len(self.texto), paso)]
+
+        async def respuesta():
+            try:
+                for parte in partes:
+                    await asyncio.sleep(self.retardo)
+                    yield SimpleNamespace(text=parte)
+            finally:
+                self.activas -= 1
+
+        return respuesta()
+
+
+@pytest.fixture
+def cliente_falso():
+    return ClienteFalso()
+
+
+# ============================================================================
+# AGENTE
+# ============================================================================
+
+def refrescar(fuente):
+    """Recarga la instantánea desde su URL y espera a que termine."""
+    hilo = fuente.refrescar_en_segundo_plano()
+    if hilo is not None:
+        hilo.join(30)
+
+
+def editar_feedbacks(ids_curso, metrica="satisfaccion_general", valor=1):
+    """Cambia `metrica` en los feedbacks de `ids_curso` (cambia su versión)."""
+    df = pd.read_csv(RUTA_FEEDBACKS, encoding="utf-8-sig")
+    df.loc[df["Id_curso"].isin(ids_curso), metrica] = valor
+    df.to_csv(RUTA_FEEDBACKS, index=False, encoding="utf-8-sig")
+
+
+@pytest.fixture
+def agente(tmp_path, monkeypatch, cliente_falso):
+    """
+    Módulo `immune_agent.agent` con los datos de prueba recién cargados, una
+    caché de informes vacía en `tmp_path` y `cliente_falso` como modelo.
+    """
+    pytest.importorskip("google.adk")
+    # `immune_agent.agent` como atributo del paquete es el LlmAgent, no el módulo
+    modulo = importlib.import_module("immune_agent.agent")
+
+    shutil.copyfile(FEEDBACKS_ORIGINALES, RUTA_FEEDBACKS)
+    refrescar(modulo.cursos)
+    refrescar(modulo.feedbacks)
+    monkeypatch.setattr(modulo, "cache_informes", modulo.CacheInformes(directorio=str(tmp_path / "informes")))
+
+    cliente_anterior = modulo.pool_modelo.cliente
+    modulo.pool_modelo.usar_cliente(cliente_falso)
+    yield modulo
+    modulo.pool_modelo.usar_cliente(cliente_anterior)
+    shutil.copyfile(FEEDBACKS_ORIGINALES, RUTA_FEEDBACKS)
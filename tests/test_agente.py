@@ -0,0 +1,98 @@
+"""
+Pruebas de las tools del analista con el modelo sustituido por `ClienteFalso`:
+caché de informes (memoria, disco y single-flight), errores e invalidación por
+curso al cambiar sus feedbacks, y la tool en streaming.
+"""
+
+import asyncio
+import importlib
+import inspect
+import time
+
+import pytest
+
+from conftest import editar_feedbacks, refrescar
+
+CURSO = "Máster en Data Science"
+
+
+def test_segunda_consulta_sale_de_memoria(agente, cliente_falso):
+    assert asyncio.run(agente.analyze_course_logic(CURSO)) == cliente_falso.texto
+
+    inicio = time.perf_counter()
+    texto = asyncio.run(agente.analyze_course_logic(CURSO))
+    assert time.perf_counter() - inicio < 0.05
+    assert texto == cliente_falso.texto
+    assert cliente_falso.llamadas == 1
+
+
+def test_sesiones_simultaneas_comparten_una_llamada(agente, cliente_falso):
+    cliente_falso.retardo = 0.05
+
+    async def sesiones():
+        return await asyncio.gather(*(agente.analyze_course_logic(CURSO) for _ in range(20)))
+
+    assert asyncio.run(sesiones()) == [cliente_falso.texto] * 20
+    assert cliente_falso.llamadas == 1
+
+
+def test_informe_sobrevive_en_disco(agente, cliente_falso):
+    asyncio.run(agente.analyze_course_logic(CURSO))
+
+    # Caché nueva sobre el mismo directorio: memoria vacía, como tras reiniciar
+    agente.cache_informes = agente.CacheInformes(directorio=agente.cache_informes.directorio)
+    assert asyncio.run(agente.analyze_course_logic(CURSO)) == cliente_falso.texto
+    assert cliente_falso.llamadas == 1
+
+
+def test_errores_no_se_guardan(agente, cliente_falso):
+    cliente_falso.texto = RuntimeError("cuota agotada")
+    assert "cuota agotada" in asyncio.run(agente.analyze_course_logic(CURSO))
+
+    cliente_falso.texto = "### Informe"
+    assert asyncio.run(agente.analyze_course_logic(CURSO)) == "### Informe"
+    assert cliente_falso.llamadas == 2
+
+
+def test_cambiar_feedbacks_invalida_solo_ese_curso(agente, cliente_falso):
+    otro = "Curso de Python"
+    for curso in (CURSO, otro):
+        asyncio.run(agente.analyze_course_logic(curso))
+    assert cliente_falso.llamadas == 2
+
+    editar_feedbacks(["C0002"])
+    refrescar(agente.feedbacks)
+    for curso in (CURSO, otro):
+        asyncio.run(agente.analyze_course_logic(curso))
+    assert cliente_falso.llamadas == 3
+    assert CURSO in cliente_falso.prompts[-1]
+
+
+@pytest.fixture
+def agente_streaming(agente, cliente_falso, monkeypatch, tmp_path):
+    """El agente recargado con AGENTE_STREAMING_ANALISTA=1 (se restaura al terminar)."""
+    monkeypatch.setenv("AGENTE_STREAMING_ANALISTA", "1")
+    importlib.reload(agente)
+    agente.pool_modelo.usar_cliente(cliente_falso)
+    agente.cache_informes = agente.CacheInformes(directorio=str(tmp_path / "informes_stream"))
+    refrescar(agente.cursos)
+    refrescar(agente.feedbacks)
+    yield agente
+    monkeypatch.delenv("AGENTE_STREAMING_ANALISTA")
+    importlib.reload(agente)
+
+
+def test_analista_en_streaming(agente_streaming, cliente_falso):
+    assert agente_streaming.STREAMING_ANALISTA
+    assert inspect.isasyncgenfunction(agente_streaming.consultar_analista_tool.func)
+
+    async def leer():
+        return [f async for f in agente_streaming.consultar_analista(CURSO)]
+
+    fragmentos = asyncio.run(leer())
+    assert len(fragmentos) == cliente_falso.fragmentos
+    assert "".join(fragmentos) == cliente_falso.texto
+
+    # Ya guardado: el informe completo en un solo fragmento, sin llamar al modelo
+    assert asyncio.run(leer()) == [cliente_falso.texto]
+    assert cliente_falso.llamadas == 1
@@ -0,0 +1,56 @@
+"""
+Pruebas de `IndiceCursos`: filtros por columna, consultas cortas y resolución
+del curso por nombre.
+"""
+
+import pandas as pd
+
+from immune_agent.busqueda import IndiceCursos
+
+
+def indice():
+    return IndiceCursos(pd.DataFrame({
+        "id_curso": ["C0001", "C0002", "C0003", "C0004"],
+        "nombre": ["Máster en Python avanzado", "Bootcamp de Diseño", "Python", "Curso de Ciberseguridad"],
+        "tipo_de_programa": ["Máster", "Bootcamp", "Curso", "Curso"],
+        "sector": ["Tecnología", "Diseño", "Tecnología", "Seguridad"],
+        "modalidad": ["Online", "Presencial", "Online", "Online"],
+        "precio": [6000, 3000, 900, 1500],
+    }))
+
+
+def test_buscar_en_todas_las_columnas_por_defecto():
+    assert indice().buscar(query="diseno") == [1]
+    assert indice().buscar(query="curso") == [2, 3]
+
+
+def test_buscar_solo_en_las_columnas_indicadas():
+    assert indice().buscar(query="curso", columnas=["nombre"]) == [3]
+    assert indice().buscar(query="seguridad", columnas=["sector"], modalidad="online") == [3]
+
+
+def test_buscar_curso_prefiere_el_nombre_exacto():
+    assert indice().buscar_curso("PYTHON ") == 2
+    assert indice().buscar_curso("python avanzado") == 0
+
+
+def test_buscar_curso_no_mira_tipo_ni_sector():
+    assert indice().buscar_curso("Bootcamp") == 1
+    assert indice().buscar_curso("Tecnología") is None
+
+
+def test_consultas_de_uno_y_dos_caracteres():
+    assert indice().buscar(query="y") == [0, 2]
+    assert indice().buscar(query="É", columnas=["nombre"]) == [0, 1, 3]
+    assert indice().buscar(query="th", top=1) == [0]
+    assert indice().buscar(query="n ", columnas=["nombre"]) == [0]
+    assert indice().buscar(query="zq") == []
+    assert indice().buscar(query="o", modalidad="presencial", precio_max=2000) == []
+    assert indice().buscar(query="o", modalidad="online", precio_max=2000) == [2, 3]
+
+
+def test_catalogo_vacio():
+    vacio = IndiceCursos(pd.DataFrame(columns=["id_curso", "nombre"]))
+    assert vacio.buscar(query="a") == []
+    assert vacio.buscar(query="python") == []
+    assert vacio.buscar_curso("python") is None
@@ -0,0 +1,122 @@
+"""
+Pruebas de `Instantanea` contra un servidor HTTP local: sustitución en el
+refresco, conservación de la última versión buena y recarga desde disco; y
+contra un CSV local, cuya instantánea de disco se descarta si el archivo cambia.
+"""
+
+import functools
+import http.server
+import threading
+
+import pandas as pd
+import pytest
+
+from immune_agent.datos import Instantanea, descargar_url, huella_origen, leer_archivo, leer_tabla
+
+
+class ManejadorSilencioso(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    """Sirve `tmp_path/www` por HTTP en un hilo; devuelve (directorio, url base)."""
+    www = tmp_path / "www"
+    www.mkdir()
+    manejador = functools.partial(ManejadorSilencioso, directory=str(www))
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), manejador)
+    hilo = threading.Thread(target=httpd.serve_forever, daemon=True)
+    hilo.start()
+    yield www, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def escribir_csv(ruta, version, filas=3):
+    pd.DataFrame({"id_curso": [f"C{i:04d}" for i in range(1, filas + 1)], "version": version}).to_csv(ruta, index=False)
+
+
+def instantanea(url, directorio, ttl=0):
+    return Instantanea("cursos", lambda: leer_tabla(descargar_url(url)), directorio=str(directorio), ttl=ttl,
+                       origen=lambda: huella_origen(url))
+
+
+def instantanea_local(ruta, directorio):
+    """Como la de feedbacks del agente sin FEEDBACKS_URL: lee un archivo local."""
+    return Instantanea("feedbacks", lambda: leer_archivo(str(ruta)), directorio=str(directorio), ttl=3600,
+                       origen=lambda: huella_origen(str(ruta)))
+
+
+def refrescar(fuente):
+    hilo = fuente.refrescar_en_segundo_plano()
+    assert hilo is not None
+    hilo.join(10)
+
+
+def test_refresco_sustituye_la_instantanea(servidor, tmp_path):
+    www, base = servidor
+    escribir_csv(www / "cursos.csv", "v1")
+    fuente = instantanea(f"{base}/cursos.csv", tmp_path / "cache")
+
+    df = fuente.obtener(presupuesto=10)
+    assert set(df["version"]) == {"v1"}
+
+    escribir_csv(www / "cursos.csv", "v2", filas=5)
+    refrescar(fuente)
+    df = fuente.obtener()
+    assert set(df["version"]) == {"v2"}
+    assert len(df) == 5
+
+
+def test_descarga_fallida_conserva_la_ultima_buena(servidor, tmp_path):
+    www, base = servidor
+    escribir_csv(www / "cursos.csv", "v1")
+    fuente = instantanea(f"{base}/cursos.csv", tmp_path / "cache")
+    assert set(fuente.obtener(presupuesto=10)["version"]) == {"v1"}
+
+    (www / "cursos.csv").unlink()  # el servidor responde 404
+    refrescar(fuente)
+    assert set(fuente.obtener()["version"]) == {"v1"}
+
+
+def test_recarga_desde_disco_sin_red(servidor, tmp_path):
+    www, base = servidor
+    escribir_csv(www / "cursos.csv", "v1")
+    refrescar(instantanea(f"{base}/cursos.csv", tmp_path / "cache"))
+    assert (tmp_path / "cache" / "cursos.pkl").exists()
+
+    def sin_red():
+        raise OSError("sin red")
+
+    reiniciada = Instantanea("cursos", sin_red, directorio=str(tmp_path / "cache"), ttl=3600,
+                             origen=lambda: huella_origen(f"{base}/cursos.csv"))
+    df = reiniciada.obtener(presupuesto=0)
+    assert set(df["version"]) == {"v1"}
+    assert not reiniciada.caducada
+
+
+def test_archivo_local_cambiado_invalida_la_instantanea(tmp_path):
+    ruta = tmp_path / "Feedbacks.csv"
+    escribir_csv(ruta, "v1", filas=12)
+    assert len(instantanea_local(ruta, tmp_path / "cache").obtener(presupuesto=10)) == 12
+
+    # Mientras el archivo no cambie, el siguiente arranque usa la instantánea de disco
+    reiniciada = instantanea_local(ruta, tmp_path / "cache")
+    reiniciada.iniciar()
+    assert not reiniciada.caducada
+
+    escribir_csv(ruta, "v2", filas=2)
+    reiniciada = instantanea_local(ruta, tmp_path / "cache")
+    df = reiniciada.obtener(presupuesto=10)
+    assert set(df["version"]) == {"v2"}
+    assert len(df) == 2
+
+
+def test_otro_origen_no_usa_la_instantanea(tmp_path):
+    escribir_csv(tmp_path / "a.csv", "a")
+    escribir_csv(tmp_path / "b.csv", "b")
+    instantanea_local(tmp_path / "a.csv", tmp_path / "cache").obtener(presupuesto=10)
+
+    df = instantanea_local(tmp_path / "b.csv", tmp_path / "cache").obtener(presupuesto=10)
+    assert set(df["version"]) == {"b"}
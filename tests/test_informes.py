@@ -0,0 +1,105 @@
+"""
+Pruebas de `CacheInformes`: single-flight, cancelación de quien espera y
+respuestas vacías o fallidas, que no se guardan.
+"""
+
+import asyncio
+
+import pytest
+
+from immune_agent.informes import CacheInformes
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CacheInformes(directorio=str(tmp_path / "informes"))
+
+
+def test_cancelar_a_quien_espera_no_afecta_a_los_demas(cache):
+    async def escenario():
+        liberar = asyncio.Event()
+        llamadas = []
+
+        async def generar():
+            llamadas.append(1)
+            await liberar.wait()
+            return "informe"
+
+        lider = asyncio.create_task(cache.obtener_async("C0001", generar))
+        await asyncio.sleep(0)
+        cancelado = asyncio.create_task(cache.obtener_async("C0001", generar))
+        otro = asyncio.create_task(cache.obtener_async("C0001", generar))
+        await asyncio.sleep(0)
+
+        cancelado.cancel()
+        await asyncio.sleep(0)
+        liberar.set()
+        assert await lider == "informe"
+        assert await otro == "informe"
+        with pytest.raises(asyncio.CancelledError):
+            await cancelado
+        return len(llamadas)
+
+    assert asyncio.run(escenario()) == 1
+    assert cache.contiene("C0001")
+
+
+def test_cancelar_a_quien_espera_un_stream_no_afecta_a_los_demas(cache):
+    async def escenario():
+        liberar = asyncio.Event()
+
+        async def generar_stream():
+            yield "uno "
+            await liberar.wait()
+            yield "dos"
+
+        async def leer():
+            return "".join([f async for f in cache.obtener_stream("C0001", generar_stream)])
+
+        lider = asyncio.create_task(leer())
+        await asyncio.sleep(0)
+        cancelado = asyncio.create_task(leer())
+        otro = asyncio.create_task(leer())
+        await asyncio.sleep(0)
+
+        cancelado.cancel()
+        await asyncio.sleep(0)
+        liberar.set()
+        assert await lider == "uno dos"
+        assert await otro == "uno dos"
+        with pytest.raises(asyncio.CancelledError):
+            await cancelado
+
+    asyncio.run(escenario())
+    assert cache.contiene("C0001")
+
+
+@pytest.mark.parametrize("texto", [None, "", "  \n"])
+def test_respuesta_vacia_no_se_guarda(cache, texto):
+    async def vacio():
+        return texto
+
+    async def bueno():
+        return "informe"
+
+    with pytest.raises(ValueError):
+        asyncio.run(cache.obtener_async("C0001", vacio))
+    assert not cache.contiene("C0001")
+    assert asyncio.run(cache.obtener_async("C0001", bueno)) == "informe"
+
+
+def test_error_llega_a_quien_espera_y_no_se_guarda(cache):
+    async def escenario():
+        async def fallar():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("cuota agotada")
+
+        return await asyncio.gather(
+            cache.obtener_async("C0001", fallar),
+            cache.obtener_async("C0001", fallar),
+            return_exceptions=True,
+        )
+
+    resultados = asyncio.run(escenario())
+    assert all(isinstance(r, RuntimeError) for r in resultados)
+    assert not cache.contiene("C0001")
@@ -0,0 +1,55 @@
+"""
+Pruebas de `PoolModelo`: cliente único y sustituible y límite de llamadas
+simultáneas al modelo.
+"""
+
+import asyncio
+
+from conftest import ClienteFalso
+
+from immune_agent.modelo import PoolModelo
+
+
+def test_cliente_se_crea_una_vez_y_se_puede_sustituir():
+    creados = []
+
+    def crear():
+        creados.append(ClienteFalso(texto="real"))
+        return creados[-1]
+
+    pool = PoolModelo(crear)
+    assert asyncio.run(pool.generar("hola", "modelo")) == "real"
+    assert asyncio.run(pool.generar("hola", "modelo")) == "real"
+    assert len(creados) == 1
+
+    falso = ClienteFalso(texto="falso")
+    pool.usar_cliente(falso)
+    assert asyncio.run(pool.generar("hola", "modelo")) == "falso"
+    assert falso.prompts == ["hola"]
+    assert len(creados) == 1
+
+
+def test_limite_de_llamadas_simultaneas():
+    cliente = ClienteFalso(retardo=0.02)
+    pool = PoolModelo(lambda: cliente, max_concurrentes=4)
+
+    async def llamadas():
+        return await asyncio.gather(*(pool.generar(f"prompt {i}", "modelo") for i in range(20)))
+
+    assert len(asyncio.run(llamadas())) == 20
+    assert cliente.llamadas == 20
+    assert cliente.max_activas == 4
+
+
+def test_stream_cuenta_en_el_limite_hasta_terminar():
+    cliente = ClienteFalso(texto="uno dos tres cuatro", retardo=0.01, fragmentos=4)
+    pool = PoolModelo(lambda: cliente, max_concurrentes=2)
+
+    async def leer():
+        return "".join([f async for f in pool.generar_stream("hola", "modelo")])
+
+    async def llamadas():
+        return await asyncio.gather(*(leer() for _ in range(6)))
+
+    assert asyncio.run(llamadas()) == [cliente.texto] * 6
+    assert cliente.max_activas == 2
@@ -0,0 +1,42 @@
+"""
+Pruebas de `precalcular_informes.precalcular` con el modelo sustituido por
+`ClienteFalso`: pasada completa, pasada incremental sin cambios y
+regeneración de solo los cursos cuyos feedbacks cambian.
+"""
+
+import asyncio
+
+from conftest import editar_feedbacks
+
+from immune_agent import precalcular_informes
+
+
+def precalcular(incremental):
+    return asyncio.run(precalcular_informes.precalcular(incremental=incremental, por_minuto=0))
+
+
+def test_precalcular_completo_e_incremental(agente, cliente_falso):
+    assert precalcular_informes.agent is agente
+
+    conteos = precalcular(incremental=False)
+    total = conteos["generados"]
+    assert total > 0
+    assert conteos["errores"] == 0
+    assert cliente_falso.llamadas == total
+
+    # Sin cambios: nada que generar
+    conteos = precalcular(incremental=True)
+    assert conteos["generados"] == 0
+    assert conteos["al_dia"] == total
+    assert cliente_falso.llamadas == total
+
+    # Solo se regeneran los cursos con feedbacks cambiados
+    editar_feedbacks(["C0002", "C0011"])
+    conteos = precalcular(incremental=True)
+    assert conteos["generados"] == 2
+    assert conteos["al_dia"] == total - 2
+    assert cliente_falso.llamadas == total + 2
+
+    # Y el agente los sirve sin llamar al modelo
+    assert asyncio.run(agente.analyze_course_logic("Curso de Python")) == cliente_falso.texto
+    assert cliente_falso.llamadas == total + 2